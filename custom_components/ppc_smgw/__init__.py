@@ -1,133 +1,239 @@
 from datetime import timedelta
+from functools import partial
 import logging
+from typing import Any
 
 from homeassistant.const import (
     CONF_DEBUG,
     CONF_HOST,
+    CONF_NAME,
     CONF_PASSWORD,
     CONF_SCAN_INTERVAL,
     CONF_USERNAME,
+    EVENT_HOMEASSISTANT_STOP,
     Platform,
 )
-from homeassistant.core import HomeAssistant
+from homeassistant.core import Event, HomeAssistant, callback
 from homeassistant.exceptions import ConfigEntryNotReady
-from homeassistant.helpers.httpx_client import create_async_httpx_client
+import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.typing import ConfigType
 from homeassistant.loader import async_get_loaded_integration
+import httpx
 import voluptuous as vol
 
-from custom_components.ppc_smgw.gateways.emh.emh import EMHGateway
 from custom_components.ppc_smgw.gateways.gateway import Gateway
-from custom_components.ppc_smgw.gateways.ppc.ppc_smgw import PPC_SMGW
-from custom_components.ppc_smgw.gateways.theben.theben import ThebenConexa
+from custom_components.ppc_smgw.gateways.offload import (
+    DEFAULT_PARSE_WORKERS,
+    ParseExecutor,
+)
+from custom_components.ppc_smgw.gateways.operations import OperationQueue
+from custom_components.ppc_smgw.gateways.registry import (
+    is_gateway_loaded,
+    load_gateway_class,
+)
 from custom_components.ppc_smgw.gateways.vendors import Vendor
 
 from .const import (
+    CONF_EXACT_COUNTERS,
+    CONF_MAX_CONCURRENT_POLLS,
+    CONF_MAX_STALE_MINUTES,
     CONF_METER_TYPE,
+    CONF_PARSE_WORKERS,
+    CONF_PREWARM_SECONDS,
+    DATA_PARSE_EXECUTOR,
+    DATA_YAML_CONFIG,
+    DEFAULT_EXACT_COUNTERS,
+    DEFAULT_MAX_CONCURRENT_POLLS,
+    DEFAULT_MAX_STALE_MINUTES,
+    DEFAULT_PREWARM_SECONDS,
     DEFAULT_SCAN_INTERVAL,
     DOMAIN,
 )
 from .coordinator import ConfigEntry, Data, SMGwDataUpdateCoordinator
+from .deadband import CONF_DEADBAND, DEADBAND_SCHEMA
 from .gateways.emh.const import CONF_METER_ID as EMH_CONF_METER_ID
 from .gateways.ppc import const as ppc_const
+from .http_pool import async_get_http_pool
+from .scheduler import async_get_poll_scheduler
+from .websocket_api import async_register_websocket_commands
 
 _LOGGER = logging.getLogger(__name__)
-CONFIG_SCHEMA = vol.Schema({DOMAIN: vol.Schema({})}, extra=vol.ALLOW_EXTRA)
+CONFIG_SCHEMA = vol.Schema(
+    {
+        DOMAIN: vol.Schema(
+            {
+                vol.Optional(
+                    CONF_PARSE_WORKERS, default=DEFAULT_PARSE_WORKERS
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=8)),
+                vol.Optional(
+                    CONF_PREWARM_SECONDS, default=DEFAULT_PREWARM_SECONDS
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=60)),
+                vol.Optional(CONF_DEADBAND, default={}): DEADBAND_SCHEMA,
+                vol.Optional(
+                    CONF_MAX_CONCURRENT_POLLS, default=DEFAULT_MAX_CONCURRENT_POLLS
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=64)),
+                vol.Optional(
+                    CONF_MAX_STALE_MINUTES, default=DEFAULT_MAX_STALE_MINUTES
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=1440)),
+                vol.Optional(
+                    CONF_EXACT_COUNTERS, default=DEFAULT_EXACT_COUNTERS
+                ): cv.boolean,
+            }
+        )
+    },
+    extra=vol.ALLOW_EXTRA,
+)
 
 PLATFORMS: list[Platform] = [
     Platform.BUTTON,
     Platform.SENSOR,
 ]
 
+# Options applied to the running client and coordinator when they change, any
+# other change reloads the entry
+LIVE_OPTIONS = frozenset({CONF_NAME, CONF_SCAN_INTERVAL, CONF_DEBUG})
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up resources shared by all config entries."""
+    conf = config.get(DOMAIN, {})
+    hass.data[DATA_YAML_CONFIG] = conf
+
+    # Parsing of all gateways shares this pool instead of the default executor.
+    # Threads are only started on demand, so an idle pool costs nothing.
+    executor = ParseExecutor(conf.get(CONF_PARSE_WORKERS, DEFAULT_PARSE_WORKERS))
+    hass.data[DATA_PARSE_EXECUTOR] = executor
+
+    @callback
+    def _shutdown_executor(_event: Event) -> None:
+        executor.shutdown()
+
+    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, _shutdown_executor)
+
+    async_register_websocket_commands(hass)
+
+    return True
+
 
 async def async_setup_entry(
     hass: HomeAssistant,
     entry: ConfigEntry,
 ) -> bool:
     """Set up this integration using UI."""
-    scan_interval = timedelta(
-        minutes=entry.options.get(
-            CONF_SCAN_INTERVAL,
-            entry.data.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL),
-        )
-    )
     coordinator = SMGwDataUpdateCoordinator(
         hass=hass,
-        update_interval=scan_interval,
+        update_interval=_scan_interval(entry),
     )
 
-    development_mode = False
-    if CONF_DEBUG in entry.data:
-        development_mode = entry.data[CONF_DEBUG]
+    _LOGGER.debug(
+        "Vendor is: %s (%s)",
+        entry.data[CONF_METER_TYPE],
+        type(entry.data[CONF_METER_TYPE]),
+    )
+    vendor = Vendor(entry.data[CONF_METER_TYPE])
+    gateway_cls = await async_get_gateway_class(hass, vendor)
+    http_pool = async_get_http_pool(hass)
+    host = entry.data[CONF_HOST]
 
-    client: Gateway
+    websession = http_pool.acquire(host, vendor)
+    try:
+        _LOGGER.debug("Initializing %s client", vendor)
+        client = _create_client(
+            hass, entry, vendor, gateway_cls, websession, http_pool.operations(host)
+        )
 
-    _LOGGER.debug(
-        f"Vendor is: {entry.data[CONF_METER_TYPE]} ({type(entry.data[CONF_METER_TYPE])})"
+        entry.runtime_data = Data(
+            client=client,
+            integration=async_get_loaded_integration(hass, entry.domain),
+            coordinator=coordinator,
+        )
+
+        # Set the config entry reference for the coordinator
+        coordinator.config_entry = entry
+
+        try:
+            await coordinator.async_config_entry_first_refresh()
+        except Exception as err:
+            raise ConfigEntryNotReady(
+                f"Failed to connect to gateway at {host}: {err}"
+            ) from err
+
+        await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    except BaseException:
+        # async_unload_entry is not called for entries that failed to set up
+        await http_pool.async_release(host)
+        async_get_poll_scheduler(hass).release(entry.entry_id)
+        raise
+
+    entry.async_on_unload(
+        entry.add_update_listener(partial(async_update_options, _reload_data(entry)))
     )
-    match Vendor(entry.data[CONF_METER_TYPE]):
+
+    return True
+
+
+def _create_client(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    vendor: Vendor,
+    gateway_cls: type[Gateway],
+    websession: httpx.AsyncClient,
+    operations: OperationQueue,
+) -> Gateway:
+    gateway_kwargs = {
+        "host": entry.data[CONF_HOST],
+        "username": entry.data[CONF_USERNAME],
+        "password": entry.data[CONF_PASSWORD],
+        "websession": websession,
+        "logger": _LOGGER,
+        "debug": _development_mode(entry),
+        "parse_executor": hass.data.get(DATA_PARSE_EXECUTOR),
+        "operations": operations,
+        "exact_counters": hass.data.get(DATA_YAML_CONFIG, {}).get(
+            CONF_EXACT_COUNTERS, DEFAULT_EXACT_COUNTERS
+        ),
+    }
+    match vendor:
         case Vendor.PPC:
-            _LOGGER.debug("Initializing PPC SMGW client")
             # entry.data is the single source of truth (options are merged into
             # data by the options flow), matching how CONF_DEBUG is read above.
-            use_library = entry.data.get(
+            gateway_kwargs["use_library"] = entry.data.get(
                 ppc_const.CONF_USE_LIBRARY, ppc_const.DEFAULT_USE_LIBRARY
             )
-            client = PPC_SMGW(
-                host=entry.data[CONF_HOST],
-                username=entry.data[CONF_USERNAME],
-                password=entry.data[CONF_PASSWORD],
-                websession=create_async_httpx_client(hass, verify_ssl=False),
-                logger=_LOGGER,
-                debug=development_mode,
-                use_library=use_library,
-            )
-        case Vendor.Theben:
-            _LOGGER.debug("Initializing Theben client")
-            client = ThebenConexa(
-                host=entry.data[CONF_HOST],
-                username=entry.data[CONF_USERNAME],
-                password=entry.data[CONF_PASSWORD],
-                websession=create_async_httpx_client(hass, verify_ssl=False),
-                logger=_LOGGER,
-                debug=development_mode,
-            )
         case Vendor.EMH:
-            _LOGGER.debug("Initializing EMH CASA client")
-            client = EMHGateway(
-                host=entry.data[CONF_HOST],
-                username=entry.data[CONF_USERNAME],
-                password=entry.data[CONF_PASSWORD],
-                websession=create_async_httpx_client(hass, verify_ssl=False),
-                logger=_LOGGER,
-                debug=development_mode,
-                meter_id=entry.data.get(EMH_CONF_METER_ID) or None,
-            )
-        case _:
-            _LOGGER.error(
-                f"Unexpected error, no meter type matching for entry {entry}. Meter type: {entry.data[CONF_METER_TYPE]}"
-            )
-            return False
+            gateway_kwargs["meter_id"] = entry.data.get(EMH_CONF_METER_ID) or None
 
-    entry.runtime_data = Data(
-        client=client,
-        integration=async_get_loaded_integration(hass, entry.domain),
-        coordinator=coordinator,
+    return gateway_cls(**gateway_kwargs)
+
+
+def _scan_interval(entry: ConfigEntry) -> timedelta:
+    return timedelta(
+        minutes=entry.options.get(
+            CONF_SCAN_INTERVAL,
+            entry.data.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL),
+        )
     )
 
-    # Set the config entry reference for the coordinator
-    coordinator.config_entry = entry
 
-    try:
-        await coordinator.async_config_entry_first_refresh()
-    except Exception as err:
-        raise ConfigEntryNotReady(
-            f"Failed to connect to gateway at {entry.data[CONF_HOST]}: {err}"
-        ) from err
+def _development_mode(entry: ConfigEntry) -> bool:
+    return entry.data.get(CONF_DEBUG, False)
 
-    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
-    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
 
-    return True
+def _reload_data(entry: ConfigEntry) -> dict[str, Any]:
+    """Return the configuration that can only be changed by a reload."""
+    return {
+        key: value
+        for key, value in {**entry.data, **entry.options}.items()
+        if key not in LIVE_OPTIONS
+    }
+
+
+async def async_get_gateway_class(hass: HomeAssistant, vendor: Vendor) -> type[Gateway]:
+    """Return the gateway class for a vendor, importing it off the event loop."""
+    if is_gateway_loaded(vendor):
+        return load_gateway_class(vendor)
+
+    return await hass.async_add_import_executor_job(load_gateway_class, vendor)
 
 
 async def async_unload_entry(
@@ -135,15 +241,31 @@ async def async_unload_entry(
     entry: ConfigEntry,
 ) -> bool:
     """Handle removal of an entry."""
-    return await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+    unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+    if unload_ok:
+        await async_get_http_pool(hass).async_release(entry.data[CONF_HOST])
+        async_get_poll_scheduler(hass).release(entry.entry_id)
+    return unload_ok
 
 
-async def async_reload_entry(
+async def async_update_options(
+    reload_data: dict[str, Any],
     hass: HomeAssistant,
     entry: ConfigEntry,
 ) -> None:
-    """Reload config entry."""
-    await hass.config_entries.async_reload(entry.entry_id)
+    """Apply changed options, reloading the entry only if it has to be.
+
+    Host, credentials and options that change the entities need a new client
+    and new entities. The live options are set on the running client and
+    coordinator, so the entry neither logs in again nor recreates its entities.
+    """
+    if _reload_data(entry) != reload_data:
+        await hass.config_entries.async_reload(entry.entry_id)
+        return
+
+    _LOGGER.debug("Applying options to the running entry")
+    entry.runtime_data.client.debug = _development_mode(entry)
+    entry.runtime_data.coordinator.async_set_update_interval(_scan_interval(entry))
 
 
 async def async_migrate_entry(hass: HomeAssistant, config_entry: ConfigEntry):
@@ -8,6 +8,7 @@ from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from .const import RestartGatewayButtonDescription
 from .coordinator import SMGwDataUpdateCoordinator
 from .entity import SMGWEntity
+from .gateways.operations import Priority
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -21,7 +22,7 @@ async def async_setup_entry(
         config_entry.runtime_data.coordinator, RestartGatewayButtonDescription
     )
 
-    _LOGGER.debug(f"Adding button entities: {restart_button}")
+    _LOGGER.debug("Adding button entities: %s", restart_button)
     async_add_entities([restart_button])
 
 
@@ -44,4 +45,8 @@ class RestartGatewayButton(SMGWEntity, ButtonEntity):
     async def async_press(self) -> None:
         """Press the Restart Button."""
         _LOGGER.debug("Restart of Gateway requested")
-        await self.coordinator.config_entry.runtime_data.client.reboot()
+        client = self.coordinator.config_entry.runtime_data.client
+        # Runs before polls queued on the gateway, not during one
+        await client.operations.run(Priority.REBOOT, client.reboot, owner=client)
+        # The firmware may have been updated with the reboot
+        self.coordinator.async_request_metadata()
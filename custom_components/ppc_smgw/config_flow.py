@@ -1,4 +1,5 @@
 import logging
+import re
 from typing import Any
 
 from homeassistant import config_entries
@@ -12,31 +13,45 @@ from homeassistant.const import (
     CONF_USERNAME,
 )
 from homeassistant.core import HomeAssistant, callback
-from homeassistant.helpers.httpx_client import create_async_httpx_client
+from homeassistant.helpers import entity_registry as er
 from homeassistant.helpers.selector import (
     SelectSelector,
     SelectSelectorConfig,
+    SelectSelectorMode,
     TextSelector,
     TextSelectorConfig,
     TextSelectorType,
 )
+from obis_parser import OBIS
 import voluptuous as vol
 
 from .const import (
+    CONF_COMPACT_ENTITIES,
+    CONF_DISCOVERY_POLICY,
     CONF_METER_TYPE,
+    DEFAULT_COMPACT_ENTITIES,
     DEFAULT_DEBUG,
+    DEFAULT_DISCOVERY_POLICY,
     DEFAULT_SCAN_INTERVAL,
     DOMAIN,
     REPO_URL,
+    DiscoveryPolicy,
 )
+from .entity import entity_id_template
 from .gateways.emh import const as emh_const
 from .gateways.emh.emhcasa.emh_client import EMHCasaClient
+from .gateways.operations import Priority
 from .gateways.ppc import const as ppc_const
 from .gateways.theben import const as theben_const
 from .gateways.vendors import Vendor
+from .http_pool import async_get_http_pool
+from .obis_ha import MEASUREMENT_GROUPS, enabled_by_policy
 
 _LOGGER = logging.getLogger(__name__)
 
+# Slugified OBIS code at the end of a sensor unique id, e.g. 1_0_32_7_0
+_OBIS_UNIQUE_ID = re.compile(r"(\d+)_(\d+)_(\d+)_(\d+)_(\d+)")
+
 SCHEMA_VENDOR = vol.Schema(
     {
         vol.Required(CONF_METER_TYPE): vol.In(Vendor.__members__),
@@ -55,6 +70,9 @@ def build_username_password_schema(
     default_meter_id: str | None = None,
     allow_use_library: bool = False,
     default_use_library: bool = ppc_const.DEFAULT_USE_LIBRARY,
+    allow_compact_entities: bool = False,
+    default_compact_entities: bool = DEFAULT_COMPACT_ENTITIES,
+    default_discovery_policy: str | None = None,
 ) -> vol.Schema:
     """Build a schema for username/password configuration.
 
@@ -69,6 +87,11 @@ def build_username_password_schema(
         default_meter_id: If not None, include an optional meter_id field (EMH only).
         allow_use_library: Whether to include the library toggle (PPC options only).
         default_use_library: Default value for the library toggle (if allowed).
+        allow_compact_entities: Whether to include the compact entity toggle
+            (options only).
+        default_compact_entities: Default value for the compact entity toggle.
+        default_discovery_policy: If not None, include the discovery policy
+            selector (options only).
 
     Returns:
         A voluptuous Schema for the configuration form.
@@ -102,6 +125,22 @@ def build_username_password_schema(
     if default_meter_id is not None:
         schema[vol.Optional(emh_const.CONF_METER_ID, default=default_meter_id)] = str
 
+    if allow_compact_entities:
+        schema[
+            vol.Optional(CONF_COMPACT_ENTITIES, default=default_compact_entities)
+        ] = bool
+
+    if default_discovery_policy is not None:
+        schema[
+            vol.Optional(CONF_DISCOVERY_POLICY, default=default_discovery_policy)
+        ] = SelectSelector(
+            SelectSelectorConfig(
+                options=[policy.value for policy in DiscoveryPolicy],
+                mode=SelectSelectorMode.DROPDOWN,
+                translation_key=CONF_DISCOVERY_POLICY,
+            )
+        )
+
     return vol.Schema(schema)
 
 
@@ -229,7 +268,11 @@ class PPC_SMGLocalConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             elif await self._test_connection(
                 self.data[CONF_HOST], self.data[CONF_USERNAME], self.data[CONF_PASSWORD]
             ):
-                _LOGGER.debug(f"user_input: {user_input}")
+                _LOGGER.debug(
+                    "Creating entry for %s (%s)",
+                    self.data[CONF_HOST],
+                    self.data[CONF_METER_TYPE],
+                )
 
                 return self.async_create_entry(
                     title=self.data[CONF_NAME], data=self.data
@@ -263,14 +306,20 @@ class PPC_SMGLocalConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
     async def _discover_emh_meter_ids(self) -> list[str]:
         """Call the EMH gateway and return all available meter IDs."""
+        http_pool = async_get_http_pool(self.hass)
         client = EMHCasaClient(
             base_url=self.data[CONF_HOST],
             username=self.data[CONF_USERNAME],
             password=self.data[CONF_PASSWORD],
-            httpx_client=create_async_httpx_client(self.hass, verify_ssl=False),
+            httpx_client=http_pool.acquire(self.data[CONF_HOST], Vendor.EMH),
             logger=_LOGGER,
         )
-        return await client.discover_all_meter_ids()
+        try:
+            return await http_pool.operations(self.data[CONF_HOST]).run(
+                Priority.DIAGNOSTICS, client.discover_all_meter_ids
+            )
+        finally:
+            await http_pool.async_release(self.data[CONF_HOST])
 
     async def async_step_emh_meter_select(
         self, user_input: dict[str, Any] | None = None
@@ -439,6 +488,15 @@ class PPCSMGWLocalOptionsFlowHandler(config_entries.OptionsFlow):
                 emh_const.CONF_METER_ID, self.data.get(emh_const.CONF_METER_ID, "")
             )
 
+        current_compact_entities = self.options.get(
+            CONF_COMPACT_ENTITIES,
+            self.data.get(CONF_COMPACT_ENTITIES, DEFAULT_COMPACT_ENTITIES),
+        )
+        current_discovery_policy = self.options.get(
+            CONF_DISCOVERY_POLICY,
+            self.data.get(CONF_DISCOVERY_POLICY, DEFAULT_DISCOVERY_POLICY),
+        )
+
         return build_username_password_schema(
             default_name=current_name,
             default_url=current_host,
@@ -450,6 +508,9 @@ class PPCSMGWLocalOptionsFlowHandler(config_entries.OptionsFlow):
             default_meter_id=current_meter_id,
             allow_use_library=is_ppc,
             default_use_library=current_use_library,
+            allow_compact_entities=True,
+            default_compact_entities=current_compact_entities,
+            default_discovery_policy=current_discovery_policy,
         )
 
     def _update_options(self):
@@ -460,5 +521,65 @@ class PPCSMGWLocalOptionsFlowHandler(config_entries.OptionsFlow):
         inconsistency.
         """
         new_data = {**self._config_entry.data, **self.options}
+        if self._config_entry.data.get(
+            CONF_COMPACT_ENTITIES, DEFAULT_COMPACT_ENTITIES
+        ) and not new_data.get(CONF_COMPACT_ENTITIES, DEFAULT_COMPACT_ENTITIES):
+            self._remove_group_entities()
+        policy = new_data.get(CONF_DISCOVERY_POLICY, DEFAULT_DISCOVERY_POLICY)
+        previous = self._config_entry.data.get(
+            CONF_DISCOVERY_POLICY, DEFAULT_DISCOVERY_POLICY
+        )
+        if policy != previous:
+            self._apply_discovery_policy(
+                DiscoveryPolicy(policy), DiscoveryPolicy(previous)
+            )
         self.hass.config_entries.async_update_entry(self._config_entry, data=new_data)
         return self.async_create_entry(data={})
+
+    def _remove_group_entities(self) -> None:
+        """Remove the group entities of compact mode before it is switched off.
+
+        The single-code entities replacing them are discovered after the reload.
+        """
+        registry = er.async_get(self.hass)
+        entry_id = self._config_entry.entry_id
+        for group in MEASUREMENT_GROUPS:
+            unique_id = f"sensor.{entity_id_template(entry_id, group)}"
+            if entity_id := registry.async_get_entity_id("sensor", DOMAIN, unique_id):
+                registry.async_remove(entity_id)
+
+    def _apply_discovery_policy(
+        self, policy: DiscoveryPolicy, previous: DiscoveryPolicy
+    ) -> None:
+        """Enable or disable already registered sensors for a new policy.
+
+        Only sensors still in the state the previous policy gave them are
+        changed, sensors the user enabled or disabled are left alone.
+        """
+        registry = er.async_get(self.hass)
+        prefix = f"sensor.{entity_id_template(self._config_entry.entry_id, '')}_"
+        for entity in er.async_entries_for_config_entry(
+            registry, self._config_entry.entry_id
+        ):
+            if entity.domain != "sensor" or not entity.unique_id.startswith(prefix):
+                continue
+
+            suffix = entity.unique_id.removeprefix(prefix)
+            if suffix in MEASUREMENT_GROUPS:
+                wanted = policy is DiscoveryPolicy.ALL
+                default = previous is DiscoveryPolicy.ALL
+            elif (match := _OBIS_UNIQUE_ID.fullmatch(suffix)) and (
+                obis := OBIS.parse("{}-{}:{}.{}.{}".format(*match.groups()))
+            ):
+                wanted = enabled_by_policy(obis, policy)
+                default = enabled_by_policy(obis, previous)
+            else:
+                continue
+
+            if wanted and entity.disabled_by is er.RegistryEntryDisabler.INTEGRATION:
+                registry.async_update_entity(entity.entity_id, disabled_by=None)
+            elif not wanted and default and entity.disabled_by is None:
+                registry.async_update_entity(
+                    entity.entity_id,
+                    disabled_by=er.RegistryEntryDisabler.INTEGRATION,
+                )
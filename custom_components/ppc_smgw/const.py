@@ -1,3 +1,5 @@
+from enum import StrEnum
+
 from homeassistant.components.button import ButtonDeviceClass, ButtonEntityDescription
 from homeassistant.components.sensor import (
     SensorDeviceClass,
@@ -5,6 +7,10 @@ from homeassistant.components.sensor import (
     SensorStateClass,
 )
 from homeassistant.const import EntityCategory, UnitOfEnergy
+from homeassistant.helpers.typing import ConfigType
+from homeassistant.util.hass_dict import HassKey
+
+from .gateways.offload import ParseExecutor
 
 DOMAIN = "ppc_smgw"
 DEFAULT_NAME = "SMGW"
@@ -16,6 +22,39 @@ DEFAULT_DEBUG = False
 REPO_URL = "https://github.com/jannickfahlbusch/ha-ppc-smgw"
 
 CONF_METER_TYPE = "meter_type"
+CONF_COMPACT_ENTITIES = "compact_entities"
+DEFAULT_COMPACT_ENTITIES = False
+CONF_DISCOVERY_POLICY = "discovery_policy"
+
+
+class DiscoveryPolicy(StrEnum):
+    """Which dynamically discovered OBIS sensors are enabled by default."""
+
+    ENERGY = "energy"
+    ENERGY_POWER = "energy_power"
+    ALL = "all"
+
+
+DEFAULT_DISCOVERY_POLICY = DiscoveryPolicy.ALL
+
+# Integration-wide options, configured in YAML under the domain key
+CONF_PARSE_WORKERS = "parse_workers"
+CONF_PREWARM_SECONDS = "prewarm_seconds"
+CONF_MAX_CONCURRENT_POLLS = "max_concurrent_polls"
+CONF_MAX_STALE_MINUTES = "max_stale_minutes"
+CONF_EXACT_COUNTERS = "exact_counters"
+
+DEFAULT_PREWARM_SECONDS = 5
+DEFAULT_MAX_CONCURRENT_POLLS = 4
+DEFAULT_MAX_STALE_MINUTES = 60
+DEFAULT_EXACT_COUNTERS = False
+
+DATA_YAML_CONFIG: HassKey[ConfigType] = HassKey(f"{DOMAIN}_yaml_config")
+DATA_PARSE_EXECUTOR: HassKey[ParseExecutor] = HassKey(f"{DOMAIN}_parse_executor")
+
+# Dispatched with the entry id and a readings delta, see
+# SMGwDataUpdateCoordinator.async_update_listeners
+SIGNAL_READINGS_CHANGED = f"{DOMAIN}_readings_changed"
 
 SENSOR_TYPES = [
     SensorEntityDescription(
@@ -1,20 +1,47 @@
-from dataclasses import dataclass
-from datetime import timedelta
+from collections.abc import Callable
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta
+from decimal import Decimal
 import logging
+import time
+from typing import Any
 
 from homeassistant.config_entries import ConfigEntry as HAConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers.device_registry import DeviceInfo
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.event import async_call_later
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 from homeassistant.loader import Integration
+from obis_parser import OBIS
 
-from .const import DOMAIN
-from .gateways.gateway import Gateway
-from .gateways.reading import Information
+from .const import (
+    CONF_MAX_STALE_MINUTES,
+    CONF_PREWARM_SECONDS,
+    DATA_YAML_CONFIG,
+    DEFAULT_MAX_STALE_MINUTES,
+    DEFAULT_PREWARM_SECONDS,
+    DOMAIN,
+    SENSOR_TYPES,
+    SIGNAL_READINGS_CHANGED,
+)
+from .gateways.gateway import UNKNOWN_FIRMWARE_VERSION, Gateway
+from .gateways.operations import Priority
+from .gateways.reading import Information, Reading, json_value
+from .scheduler import async_get_poll_scheduler
 
 _LOGGER = logging.getLogger(__name__)
 
 type ConfigEntry = HAConfigEntry[Data]
 
+# Device metadata (firmware version) is fetched this often, readings every poll
+METADATA_INTERVAL = timedelta(hours=6)
+
+# Changes of the energy counters are sent to websocket subscribers as soon as
+# their readings are parsed, before the rest of the poll
+EARLY_CODES = frozenset(description.key for description in SENSOR_TYPES)
+
 
 class SMGwDataUpdateCoordinator(DataUpdateCoordinator[Information | None]):
     config_entry: ConfigEntry
@@ -25,28 +52,368 @@ class SMGwDataUpdateCoordinator(DataUpdateCoordinator[Information | None]):
         update_interval: timedelta,
     ) -> None:
         super().__init__(
-            hass=hass, logger=_LOGGER, name=DOMAIN, update_interval=update_interval
+            hass=hass,
+            logger=_LOGGER,
+            name=DOMAIN,
+            update_interval=update_interval,
+            # Listeners are only called when the snapshot differs from the last one
+            always_update=False,
+        )
+
+        self.prewarm_lead = timedelta(
+            seconds=hass.data.get(DATA_YAML_CONFIG, {}).get(
+                CONF_PREWARM_SECONDS, DEFAULT_PREWARM_SECONDS
+            )
+        )
+        self._unsub_prewarm: Callable[[], None] | None = None
+        # Readings missing from a poll keep their last value for this long
+        self.max_stale = timedelta(
+            minutes=hass.data.get(DATA_YAML_CONFIG, {}).get(
+                CONF_MAX_STALE_MINUTES, DEFAULT_MAX_STALE_MINUTES
+            )
+        )
+        # Monotonic time of the last fetch that delivered a stale reading
+        self._stale_since: dict[OBIS, float] = {}
+        self._last_fetch_time: float | None = None
+        self.scheduler = async_get_poll_scheduler(hass)
+        # Duration of the last fetch and how long it waited for the
+        # scheduler before, in seconds
+        self.last_fetch_duration: float | None = None
+        self.last_queue_lag: float | None = None
+        # OBIS codes of the sensors added to Home Assistant by unique id, None
+        # for a sensor that needs all readings
+        self._wanted_obis: dict[str, frozenset[str] | None] = {}
+        # Built once for all entities of the entry, see entity.entry_device_info
+        self.device_info: DeviceInfo | None = None
+        # The slow tier: the gateway fetches device metadata only with the
+        # first poll after this monotonic time, see async_request_metadata
+        self.metadata_interval = METADATA_INTERVAL
+        self._metadata_due = 0.0
+        # (name, manufacturer, model, firmware) the device was registered with
+        self._device_metadata: tuple[str, str, str, str] | None = None
+        # Reading values of the last readings delta, see async_update_listeners
+        self._delta_values: dict[OBIS, str | float | Decimal] = {}
+        # Values sent ahead of the delta of a poll that hasn't completed yet
+        self._early_values: dict[OBIS, str | float | Decimal] = {}
+        # Capture time the gateway's probe returned before the last fetch, and
+        # the OBIS codes that fetch converted
+        self._probed_capture: datetime | None = None
+        self._fetched_wanted: frozenset[str] | None = None
+
+    @callback
+    def _schedule_refresh(self) -> None:
+        interval = self.update_interval
+        if interval is None or self.config_entry.pref_disable_polling:
+            self._cancel_prewarm()
+            super()._schedule_refresh()
+            return
+
+        # Poll at the phase of the interval the scheduler assigned to this
+        # entry. The base class polls one update_interval from now.
+        loop = self.hass.loop
+        delay = self.scheduler.delay(self.config_entry.entry_id, loop.time(), interval)
+        # Like the base class, a refresh requested during the debouncer's
+        # cooldown is left queued
+        self._async_unsub_refresh()
+        self._unsub_refresh = loop.call_at(
+            loop.time() + delay, self._async_scheduled_refresh
+        ).cancel
+
+        # Open the connection to the gateway shortly before the next poll, so
+        # that the poll itself doesn't wait for the TLS handshake.
+        lead = self.prewarm_lead.total_seconds()
+        if lead and delay > lead:
+            self._unsub_prewarm = async_call_later(
+                self.hass, delay - lead, self._async_prewarm
+            )
+
+    @callback
+    def _async_scheduled_refresh(self) -> None:
+        self.config_entry.async_create_background_task(
+            self.hass,
+            self._handle_refresh_interval(),
+            name=f"{self.name} - {self.config_entry.title} - refresh",
+            eager_start=True,
+        )
+
+    @callback
+    def _async_unsub_refresh(self) -> None:
+        # Also called by async_shutdown, the pre-warm must not outlive the poll
+        super()._async_unsub_refresh()
+        self._cancel_prewarm()
+
+    @callback
+    def async_set_update_interval(self, interval: timedelta) -> None:
+        """Change the update interval, rescheduling a scheduled poll."""
+        if interval == self.update_interval:
+            return
+        self.update_interval = interval
+        if self._listeners:
+            self._schedule_refresh()
+
+    @callback
+    def async_want_obis(
+        self, unique_id: str, codes: frozenset[str] | None
+    ) -> Callable[[], None]:
+        """Request the readings of ``codes`` for a sensor until the callback is called.
+
+        Sensors of disabled entities are never added, so their values are not
+        converted by the gateway client.
+        """
+        self._wanted_obis[unique_id] = codes
+        self._update_wanted_obis()
+
+        @callback
+        def _release() -> None:
+            self._wanted_obis.pop(unique_id, None)
+            self._update_wanted_obis()
+
+        return _release
+
+    @callback
+    def _update_wanted_obis(self) -> None:
+        wanted: frozenset[str] | None = frozenset()
+        for codes in self._wanted_obis.values():
+            if codes is None:
+                wanted = None
+                break
+            wanted |= codes
+        self.config_entry.runtime_data.client.wanted_obis = wanted
+
+    @callback
+    def async_request_metadata(self) -> None:
+        """Fetch the device metadata with the next poll, e.g. after a reboot."""
+        self._metadata_due = 0.0
+
+    @callback
+    def _async_update_device(self, data: Information) -> None:
+        """Update the device registry entry if the device metadata changed."""
+        previous = self._device_metadata
+        firmware_version = data.firmware_version
+        if firmware_version == UNKNOWN_FIRMWARE_VERSION and previous is not None:
+            # A failed firmware request doesn't change the firmware
+            firmware_version = previous[3]
+        metadata = (data.name, data.manufacturer, data.model, firmware_version)
+        self._device_metadata = metadata
+
+        # The first snapshot is what the entities register the device with
+        if previous is None or metadata == previous:
+            return
+
+        # Entities added from now on get the new metadata
+        self.device_info = None
+        registry = dr.async_get(self.hass)
+        device = registry.async_get_device(
+            identifiers={(self.config_entry.domain, self.config_entry.entry_id)}
+        )
+        if device is None:
+            return
+
+        _LOGGER.info("Device metadata changed, firmware is %s", firmware_version)
+        name, manufacturer, model, sw_version = metadata
+        registry.async_update_device(
+            device.id,
+            name=name,
+            manufacturer=manufacturer,
+            model=model,
+            sw_version=sw_version,
+        )
+
+    def _merge_missing_readings(self, data: Information) -> Information:
+        """Keep the last readings of codes missing from a partial poll.
+
+        A failed request for one usage point, or a gateway leaving out some
+        values, would otherwise set their sensors to unknown until the next
+        poll. Codes that are only skipped are not missing.
+        """
+        previous = self.data
+        if previous is data:
+            # The probe found no new data, nothing was fetched
+            return data
+
+        fetched = time.monotonic()
+        last_fetch, self._last_fetch_time = self._last_fetch_time, fetched
+        missing: dict[OBIS, Reading] = {}
+        if isinstance(previous, Information) and last_fetch is not None:
+            missing = {
+                obis: reading
+                for obis, reading in previous.readings.items()
+                if obis not in data.readings and obis not in data.skipped
+            }
+        # Codes delivered again are no longer stale
+        for obis in self._stale_since.keys() - missing.keys():
+            del self._stale_since[obis]
+        if not missing or not self.max_stale:
+            return data
+
+        readings = dict(data.readings)
+        for obis, reading in missing.items():
+            # Stale since the fetch that last delivered the reading
+            since = self._stale_since.setdefault(obis, last_fetch)
+            if fetched - since > self.max_stale.total_seconds():
+                _LOGGER.debug("Reading %s is missing for too long, dropping it", obis)
+                del self._stale_since[obis]
+                continue
+            readings[obis] = reading
+        return replace(data, readings=readings)
+
+    def stale_readings(self) -> dict[OBIS, float]:
+        """Return the age in seconds of the readings kept from earlier polls."""
+        now = time.monotonic()
+        return {obis: now - since for obis, since in self._stale_since.items()}
+
+    @callback
+    def async_update_listeners(self) -> None:
+        super().async_update_listeners()
+
+        # Websocket subscribers get only the values that changed in this poll
+        if (delta := self._readings_delta()) is not None:
+            async_dispatcher_send(
+                self.hass, SIGNAL_READINGS_CHANGED, self.config_entry.entry_id, delta
+            )
+
+    def _readings_delta(self) -> dict[str, Any] | None:
+        """Return the readings changed since the last delta, None if there are none."""
+        if not isinstance(self.data, Information):
+            return None
+
+        # Compared with what subscribers were sent, so values sent early aren't
+        # repeated and those of a failed poll are set back to the data
+        sent = self._delta_values | self._early_values
+        values = {obis: reading.value for obis, reading in self.data.readings.items()}
+        changed = {
+            obis.canonical: json_value(value)
+            for obis, value in values.items()
+            if obis not in sent or sent[obis] != value
+        }
+        removed = [obis.canonical for obis in sent if obis not in values]
+        self._delta_values = values
+        self._early_values = {}
+        if not changed and not removed:
+            return None
+
+        return {
+            "last_update": isoformat(self.data.last_update),
+            "changed": changed,
+            "removed": removed,
+        }
+
+    @callback
+    def _cancel_prewarm(self) -> None:
+        if self._unsub_prewarm is not None:
+            self._unsub_prewarm()
+            self._unsub_prewarm = None
+
+    async def _async_prewarm(self, _now: datetime) -> None:
+        self._unsub_prewarm = None
+        await self.config_entry.runtime_data.client.prewarm()
+
+    async def _async_fetch(self, client: Gateway) -> Information | None:
+        """Fetch the data, unless the gateway's probe shows nothing new.
+
+        The probe's capture time is only compared with the one it returned
+        before the last fetch, so clocks of gateway and host may differ. Data
+        fetched for other wanted OBIS codes lacks the values of sensors added
+        since, it is fetched again right away.
+        """
+        captured = await client.probe()
+        wanted = client.wanted_obis
+        if (
+            captured is not None
+            and captured == self._probed_capture
+            and wanted == self._fetched_wanted
+            and isinstance(self.data, Information)
+            and not client.metadata_requested
+        ):
+            _LOGGER.debug("No new data on the gateway since %s", captured)
+            return self.data
+
+        async for readings in client.stream_readings():
+            self._async_publish_early(readings)
+        self._probed_capture = captured
+        self._fetched_wanted = wanted
+        if isinstance(client.data, Information):
+            # Whether or not the gateway knows its firmware version, the
+            # metadata is only due again on the slow tier
+            client.metadata_requested = False
+        return client.data
+
+    @callback
+    def _async_publish_early(self, readings: dict[OBIS, Reading]) -> None:
+        """Send changed energy counters of a chunk of readings right away.
+
+        They are kept apart from the last delta until the poll's snapshot is
+        sent, so the delta after the poll doesn't repeat them.
+        """
+        sent = self._delta_values | self._early_values
+        early = {
+            obis: reading
+            for obis, reading in readings.items()
+            if obis.canonical in EARLY_CODES
+            and (obis not in sent or sent[obis] != reading.value)
+        }
+        if not early:
+            return
+
+        changed: dict[str, str | float] = {}
+        for obis, reading in early.items():
+            self._early_values[obis] = reading.value
+            changed[obis.canonical] = json_value(reading.value)
+        # The counters are captured together
+        timestamp = next(iter(early.values())).timestamp
+        async_dispatcher_send(
+            self.hass,
+            SIGNAL_READINGS_CHANGED,
+            self.config_entry.entry_id,
+            {"last_update": isoformat(timestamp), "changed": changed, "removed": []},
         )
 
     async def _async_update_data(self) -> Information | None:
         try:
-            _LOGGER.debug("Fetching data from API")
-            data = await self.config_entry.runtime_data.client.get_data()
+            client = self.config_entry.runtime_data.client
+            if time.monotonic() >= self._metadata_due:
+                client.metadata_requested = True
+                self._metadata_due = (
+                    time.monotonic() + self.metadata_interval.total_seconds()
+                )
+
+            async with self.scheduler.poll() as queue_lag:
+                self.last_queue_lag = queue_lag
+                _LOGGER.debug("Fetching data from API")
+                start = time.monotonic()
+                data = await client.operations.run(
+                    Priority.POLL, self._async_fetch, client, owner=client
+                )
+                self.last_fetch_duration = time.monotonic() - start
+            _LOGGER.debug(
+                "Fetched data in %.2f s after waiting %.2f s",
+                self.last_fetch_duration,
+                queue_lag,
+            )
 
             # Validate data type at the source (issue #75)
             if data is not None and not isinstance(data, Information):
                 _LOGGER.error(
-                    f"Gateway returned unexpected type: {type(data).__name__}. "
-                    f"Expected Information or None."
+                    "Gateway returned unexpected type: %s. Expected Information or None.",
+                    type(data).__name__,
                 )
                 return None
 
+            if data is not None:
+                data = self._merge_missing_readings(data)
+                self._async_update_device(data)
+
             return data
         except Exception:
             _LOGGER.exception("Unexpected error during update")
             raise
 
 
+def isoformat(value: datetime | str) -> str:
+    """Return a timestamp of the gateway clients as ISO 8601 string."""
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
 @dataclass
 class Data:
     """Data for the Blueprint integration."""
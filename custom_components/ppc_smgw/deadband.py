@@ -0,0 +1,105 @@
+"""Deadband filtering for instantaneous (measurement) sensors.
+
+Power, voltage, current and similar values jitter in their last decimals on
+every poll. A deadband suppresses state writes for changes smaller than an
+absolute or relative threshold, while ``max_silence`` still writes the current
+value every so often. Energy counters are never filtered.
+
+Deadbands can be overridden in ``configuration.yaml`` per device class, per
+OBIS code or per entity id::
+
+    ppc_smgw:
+      deadband:
+        power: {absolute: 20}
+        "1-0:14.7.0": {absolute: 0.05}
+        sensor.smgw_voltage_l1: {relative: 0.005, max_silence: "00:30:00"}
+"""
+
+from __future__ import annotations
+
+from collections.abc import Mapping
+from dataclasses import dataclass
+from datetime import timedelta
+
+from homeassistant.components.sensor import SensorDeviceClass, SensorStateClass
+import homeassistant.helpers.config_validation as cv
+import voluptuous as vol
+
+CONF_DEADBAND = "deadband"
+CONF_ABSOLUTE = "absolute"
+CONF_RELATIVE = "relative"
+CONF_MAX_SILENCE = "max_silence"
+
+DEFAULT_MAX_SILENCE = timedelta(hours=1)
+
+
+@dataclass(frozen=True, slots=True)
+class Deadband:
+    """Changes up to ``absolute`` or ``relative`` (of the last value) are dropped."""
+
+    absolute: float = 0.0
+    relative: float = 0.0
+    max_silence: timedelta = DEFAULT_MAX_SILENCE
+
+    def exceeded(self, last: float, new: float) -> bool:
+        return abs(new - last) > max(self.absolute, abs(last) * self.relative)
+
+
+DEFAULT_DEADBANDS: dict[SensorDeviceClass, Deadband] = {
+    SensorDeviceClass.POWER: Deadband(absolute=10),
+    SensorDeviceClass.REACTIVE_POWER: Deadband(absolute=10),
+    SensorDeviceClass.APPARENT_POWER: Deadband(absolute=10),
+    SensorDeviceClass.VOLTAGE: Deadband(absolute=0.5),
+    SensorDeviceClass.CURRENT: Deadband(absolute=0.05),
+    SensorDeviceClass.FREQUENCY: Deadband(absolute=0.02),
+    SensorDeviceClass.POWER_FACTOR: Deadband(absolute=0.01),
+}
+
+
+def _to_deadband(value: dict) -> Deadband:
+    return Deadband(
+        absolute=value[CONF_ABSOLUTE],
+        relative=value[CONF_RELATIVE],
+        max_silence=value[CONF_MAX_SILENCE],
+    )
+
+
+DEADBAND_SCHEMA = vol.Schema(
+    {
+        cv.string: vol.All(
+            {
+                vol.Optional(CONF_ABSOLUTE, default=0.0): vol.All(
+                    vol.Coerce(float), vol.Range(min=0)
+                ),
+                vol.Optional(CONF_RELATIVE, default=0.0): vol.All(
+                    vol.Coerce(float), vol.Range(min=0, max=1)
+                ),
+                vol.Optional(
+                    CONF_MAX_SILENCE, default=DEFAULT_MAX_SILENCE
+                ): cv.positive_time_period,
+            },
+            _to_deadband,
+        )
+    }
+)
+
+
+def resolve_deadband(
+    overrides: Mapping[str, Deadband],
+    entity_id: str | None,
+    obis_key: str,
+    device_class: str | None,
+    state_class: str | None,
+) -> Deadband | None:
+    """Return the deadband for a sensor, or None if it must not be filtered.
+
+    The entity id wins over the OBIS code, which wins over the device class.
+    """
+    if state_class != SensorStateClass.MEASUREMENT:
+        return None
+
+    for key in (entity_id, obis_key, device_class):
+        if key is not None and key in overrides:
+            return overrides[key]
+
+    return DEFAULT_DEADBANDS.get(device_class)
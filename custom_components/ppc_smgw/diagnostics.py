@@ -0,0 +1,69 @@
+"""Diagnostics support for the SMGW integration."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
+from homeassistant.core import HomeAssistant
+
+from .coordinator import ConfigEntry
+from .gateways.reading import Information, json_value
+from .scheduler import async_get_poll_scheduler
+
+TO_REDACT = {CONF_PASSWORD, CONF_USERNAME}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    client = entry.runtime_data.client
+    coordinator = entry.runtime_data.coordinator
+
+    return {
+        "entry": async_redact_data(entry.as_dict(), TO_REDACT),
+        "coordinator": {
+            "last_update_success": coordinator.last_update_success,
+            "update_interval": str(coordinator.update_interval),
+            "last_fetch_duration": coordinator.last_fetch_duration,
+            "last_queue_lag": coordinator.last_queue_lag,
+            "last_exception": repr(coordinator.last_exception)
+            if coordinator.last_exception
+            else None,
+        },
+        "data": _information_as_dict(coordinator.data),
+        # Seconds since the readings missing from the last polls were fetched
+        "stale_readings": {
+            str(obis.canonical): round(age, 1)
+            for obis, age in coordinator.stale_readings().items()
+        },
+        "responses": client.responses.as_diagnostics(),
+        "parse_cache": client.parse_cache.as_diagnostics(),
+        "parse_executor": client.parse_executor.as_diagnostics()
+        if client.parse_executor
+        else None,
+        "poll_scheduler": async_get_poll_scheduler(hass).as_diagnostics(),
+    }
+
+
+def _information_as_dict(data: Information | None) -> dict[str, Any] | None:
+    if not isinstance(data, Information):
+        return None
+
+    return {
+        "name": data.name,
+        "model": data.model,
+        "manufacturer": data.manufacturer,
+        "firmware_version": data.firmware_version,
+        "last_update": str(data.last_update),
+        "readings": {
+            str(obis.canonical): {
+                "value": json_value(reading.value),
+                "timestamp": str(reading.timestamp),
+            }
+            for obis, reading in data.readings.items()
+        },
+        "skipped": sorted(str(obis.canonical) for obis in data.skipped),
+    }
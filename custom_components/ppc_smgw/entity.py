@@ -1,5 +1,9 @@
 import logging
+import re
+import time
+from typing import Any
 
+from homeassistant.core import callback
 from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.entity import EntityDescription
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
@@ -10,6 +14,40 @@ from .coordinator import SMGwDataUpdateCoordinator
 
 _LOGGER = logging.getLogger(__name__)
 
+# For plain ASCII, slugify boils down to lower-casing and joining the
+# alphanumeric runs with "_". Entry ids, OBIS codes and description keys
+# always are, so the much slower slugify is only needed as a fallback.
+_PLAIN_ASCII = re.compile(r"[A-Za-z0-9_.:\- ]+")
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def entity_id_template(entry_id: str, key: str) -> str:
+    """Return the slug entity and unique ids of an entry's entities are built from."""
+    raw = f"{entry_id}_{key}"
+    if _PLAIN_ASCII.fullmatch(raw) is None:
+        return slugify(raw)
+    return _NON_ALNUM.sub("_", raw.lower()).strip("_") or "unknown"
+
+
+def entry_device_info(coordinator: SMGwDataUpdateCoordinator) -> DeviceInfo:
+    """Return the device info shared by all entities of the coordinator's entry."""
+    if coordinator.device_info is None:
+        data = coordinator.data
+        coordinator.device_info = DeviceInfo(
+            identifiers={
+                (
+                    coordinator.config_entry.domain,
+                    coordinator.config_entry.entry_id,
+                ),
+            },
+            name=getattr(data, "name", DEFAULT_NAME),
+            manufacturer=getattr(data, "manufacturer", "Unknown"),
+            model=getattr(data, "model", "Unknown"),
+            sw_version=getattr(data, "firmware_version", "Unknown"),
+        )
+
+    return coordinator.device_info
+
 
 class SMGWEntity(CoordinatorEntity[SMGwDataUpdateCoordinator]):
     """Base class for all entities originating from SMGW."""
@@ -27,71 +65,43 @@ class SMGWEntity(CoordinatorEntity[SMGwDataUpdateCoordinator]):
         self.entity_description = entity_description
         self._coordinator = coordinator
 
-        _LOGGER.debug(
-            f"Initializing {entity_description.key}. EntryID: {coordinator.config_entry.entry_id}"
-        )
-
-        self._attr_device_info = DeviceInfo(
-            identifiers={
-                (
-                    coordinator.config_entry.domain,
-                    coordinator.config_entry.entry_id,
-                ),
-            },
-            name=self.get_name(),
-            manufacturer=self.get_manufacturer(),
-            model=self.get_model(),
-            sw_version=self.get_firmware_version(),
-        )
+        self._attr_device_info = entry_device_info(coordinator)
 
         self._attr_translation_key = self.entity_description.key.lower()
         self._attr_has_entity_name = True
 
-    def get_entity_id_template(self):
-        return slugify(
-            f"{self.coordinator.config_entry.entry_id}_{self.entity_description.key}"
+        # What was last written to the state machine (and when, monotonic
+        # seconds), see _state_fingerprint
+        self._written_fingerprint: tuple[Any, ...] | None = None
+        self._written_at = 0.0
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        # The platform writes the initial state right after this
+        self._written_fingerprint = self._state_fingerprint()
+        self._written_at = time.monotonic()
+
+    def _state_fingerprint(self) -> tuple[Any, ...]:
+        """Return the values a coordinator update can change on this entity."""
+        return (self.available,)
+
+    def _should_write(self, fingerprint: tuple[Any, ...]) -> bool:
+        """Decide whether a coordinator update is written to the state machine."""
+        return fingerprint != self._written_fingerprint
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        # Gateways mostly repeat the same 15-minute values, don't write
+        # unchanged states to the state machine and recorder again.
+        fingerprint = self._state_fingerprint()
+        if not self._should_write(fingerprint):
+            return
+
+        self._written_fingerprint = fingerprint
+        self._written_at = time.monotonic()
+        self.async_write_ha_state()
+
+    def get_entity_id_template(self) -> str:
+        return entity_id_template(
+            self.coordinator.config_entry.entry_id, self.entity_description.key
         )
-
-    def get_firmware_version(self) -> str:
-        firmware_version = "Unknown"
-        try:
-            firmware_version = self._coordinator.data.firmware_version
-        except AttributeError:
-            _LOGGER.debug(
-                f"Firmware version not available. Data available: {self._coordinator.data}"
-            )
-
-        return firmware_version
-
-    def get_manufacturer(self) -> str:
-        manufacturer = "Unknown"
-        try:
-            manufacturer = self._coordinator.data.manufacturer
-        except AttributeError:
-            _LOGGER.debug(
-                f"Manufacturer data not available. Data available: {self._coordinator.data}"
-            )
-
-        return manufacturer
-
-    def get_model(self) -> str:
-        model = "Unknown"
-        try:
-            model = self._coordinator.data.model
-        except AttributeError:
-            _LOGGER.debug(
-                f"Model data not available. Data available: {self._coordinator.data}"
-            )
-
-        return model
-
-    def get_name(self) -> str:
-        name = DEFAULT_NAME
-        try:
-            name = self._coordinator.data.name
-        except AttributeError:
-            _LOGGER.debug(
-                f"Name not available, using default. Data available: {self._coordinator.data}"
-            )
-
-        return name
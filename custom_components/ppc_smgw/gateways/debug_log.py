@@ -0,0 +1,79 @@
+"""Debug logging helpers that cost nothing while debug logging is off."""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+import logging
+from typing import Any
+
+import httpx
+
+# Raw payloads are cut after this many characters.
+DEFAULT_PAYLOAD_LIMIT = 2048
+# Only every n-th payload of a PayloadLogger is logged (the first one always is).
+DEFAULT_PAYLOAD_SAMPLE_EVERY = 10
+
+
+class LazyStr:
+    """Defer building a log argument until a handler actually formats it.
+
+    ``logger.debug("x: %s", LazyStr(expensive))`` only calls ``expensive``
+    when the record is emitted.
+    """
+
+    __slots__ = ("_args", "_func")
+
+    def __init__(self, func: Callable[..., Any], *args: Any) -> None:
+        self._func = func
+        self._args = args
+
+    def __str__(self) -> str:
+        return str(self._func(*self._args))
+
+    __repr__ = __str__
+
+
+class PayloadLogger:
+    """Log raw gateway responses at debug level, sampled and size-capped.
+
+    Nothing is decoded or formatted unless the logger is enabled for DEBUG.
+    Even then only every ``sample_every``-th payload is logged, truncated to
+    ``limit`` characters.
+    """
+
+    def __init__(
+        self,
+        logger: logging.Logger,
+        limit: int = DEFAULT_PAYLOAD_LIMIT,
+        sample_every: int = DEFAULT_PAYLOAD_SAMPLE_EVERY,
+    ) -> None:
+        self.logger = logger
+        self.limit = limit
+        self.sample_every = max(1, sample_every)
+        self._seen = 0
+
+    def log_response(self, response: httpx.Response, msg: str, *args: Any) -> None:
+        """Log ``msg % args`` followed by the status and (sampled) body."""
+        if not self.logger.isEnabledFor(logging.DEBUG):
+            return
+
+        self._seen += 1
+        if (self._seen - 1) % self.sample_every:
+            self.logger.debug(
+                f"{msg}: HTTP %s (payload not sampled)", *args, response.status_code
+            )
+            return
+
+        self.logger.debug(
+            f"{msg}: HTTP %s\nRaw response: %s",
+            *args,
+            response.status_code,
+            truncate(response.text, self.limit),
+        )
+
+
+def truncate(text: str, limit: int = DEFAULT_PAYLOAD_LIMIT) -> str:
+    """Cut ``text`` to ``limit`` characters, noting how much was dropped."""
+    if len(text) <= limit:
+        return text
+    return f"{text[:limit]}... [{len(text) - limit} more characters]"
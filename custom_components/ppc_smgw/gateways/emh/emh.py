@@ -1,18 +1,17 @@
 import asyncio
+from datetime import datetime
 import logging
 
 import httpx
-import urllib3
 
 from custom_components.ppc_smgw.gateways.emh.emhcasa.emh_client import (
     EMHCasaClient,
 )
 from custom_components.ppc_smgw.gateways.gateway import Gateway
+from custom_components.ppc_smgw.gateways.offload import ParseExecutor
+from custom_components.ppc_smgw.gateways.operations import OperationQueue
 from custom_components.ppc_smgw.gateways.reading import FakeInformation, Information
 
-# Needed as the SMGW uses a self-signed certificate
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-
 
 class EMHGateway(Gateway):
     def __init__(
@@ -23,9 +22,22 @@ class EMHGateway(Gateway):
         websession: httpx.AsyncClient,
         logger: logging.Logger,
         debug: bool = False,
+        parse_executor: ParseExecutor | None = None,
+        operations: OperationQueue | None = None,
+        exact_counters: bool = False,
         meter_id: str | None = None,
     ) -> None:
-        super().__init__(host, username, password, websession, logger, debug)
+        super().__init__(
+            host,
+            username,
+            password,
+            websession,
+            logger,
+            debug,
+            parse_executor,
+            operations,
+            exact_counters,
+        )
 
         self.client = EMHCasaClient(
             base_url=host,
@@ -34,8 +46,16 @@ class EMHGateway(Gateway):
             httpx_client=websession,
             logger=logger,
             meter_id=meter_id,
+            responses=self.responses,
+            parse_cache=self.parse_cache,
+            exact_counters=exact_counters,
         )
 
+    @property
+    def prewarm_url(self) -> str:
+        # The configured host may lack a scheme, the client normalises it
+        return self.client.base_url
+
     async def get_data(self) -> Information:
         self.logger.info("Getting data from EMH CASA gateway")
 
@@ -47,6 +67,12 @@ class EMHGateway(Gateway):
             await asyncio.sleep(15)
             self.data = FakeInformation
         else:
-            self.data = await self.client.get_data()
+            self.data = await self.client.get_data(self.wanted_obis)
+            self.metadata_fetched(self.data)
 
         return self.data
+
+    async def probe(self) -> datetime | None:
+        if self.debug:
+            return None
+        return await self.client.get_capture_time()
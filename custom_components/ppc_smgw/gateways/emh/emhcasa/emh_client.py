@@ -5,10 +5,22 @@ from datetime import UTC, datetime
 import httpx
 from obis_parser import OBIS
 
-from custom_components.ppc_smgw.gateways.reading import Information, Reading
+from custom_components.ppc_smgw.gateways.debug_log import LazyStr, PayloadLogger
+from custom_components.ppc_smgw.gateways.parse_cache import ParseCache, content_digest
+from custom_components.ppc_smgw.gateways.reading import (
+    Information,
+    Reading,
+    newest_timestamp,
+    parse_capture_time,
+    parse_value,
+)
+from custom_components.ppc_smgw.gateways.response_buffer import ResponseBuffer
 
 from ..const import DEFAULT_MODEL, DEFAULT_NAME, MANUFACTURER
 
+# Sent with every request instead of being set on the (shared) httpx client
+REQUEST_HEADERS = {"Content-Type": "application/json"}
+
 
 class EMHCasaClient:
     def __init__(
@@ -19,6 +31,9 @@ class EMHCasaClient:
         httpx_client: httpx.AsyncClient,
         logger,
         meter_id: str | None = None,
+        responses: ResponseBuffer | None = None,
+        parse_cache: ParseCache | None = None,
+        exact_counters: bool = False,
     ):
         if not base_url.startswith(("http://", "https://")):
             base_url = f"https://{base_url}"
@@ -31,46 +46,74 @@ class EMHCasaClient:
 
         self.httpx_client = httpx_client
         self.logger = logger
-
-        self.httpx_client.headers.setdefault("Content-Type", "application/json")
-        self.httpx_client.follow_redirects = True
+        self._payload_log = PayloadLogger(logger)
+        self.responses = responses if responses is not None else ResponseBuffer()
+        self.parse_cache = parse_cache if parse_cache is not None else ParseCache()
+        self.exact_counters = exact_counters
 
     def _get_auth(self) -> httpx.DigestAuth:
         return httpx.DigestAuth(self.username, self.password)
 
-    async def get_data(self) -> Information:
+    async def get_data(self, wanted: frozenset[str] | None = None) -> Information:
+        skipped: set[OBIS] = set()
+        readings = await self._get_readings(wanted, skipped)
         information = Information(
             name=DEFAULT_NAME,
             model=DEFAULT_MODEL,
             manufacturer=MANUFACTURER,
             firmware_version="Unknown",
-            last_update=datetime.now(UTC),
-            readings=await self._get_readings(),
+            last_update=newest_timestamp(readings, datetime.now(UTC)),
+            readings=readings,
+            skipped=frozenset(skipped),
         )
 
-        self.logger.debug(f"Returning information: {information}")
+        self.logger.debug("Returning information: %s", information)
 
         return information
 
+    async def get_capture_time(self) -> datetime | None:
+        """Return the capture time of the meter's newest values.
+
+        The plain meter endpoint is much smaller than the extended one the
+        readings are taken from. None while the meter is not known yet.
+        """
+        if self.meter_id is None:
+            return None
+
+        try:
+            response = await self.httpx_client.get(
+                f"{self.base_url}/json/metering/origin/{self.meter_id}",
+                auth=self._get_auth(),
+                headers=REQUEST_HEADERS,
+                follow_redirects=True,
+                timeout=10,
+            )
+            self.responses.record(response, "meter capture time")
+            return parse_capture_time(response.json()["capture_time"])
+        except Exception as e:
+            self.logger.debug("Failed to fetch the meter capture time: %s", e)
+            return None
+
     async def discover_all_meter_ids(self) -> list[str]:
         """Return all meter IDs available on this gateway via /json/metering/origin/."""
-        self.logger.debug(f"Discovering all meter IDs from {self.base_url}")
+        self.logger.debug("Discovering all meter IDs from %s", self.base_url)
 
         try:
             response = await self.httpx_client.get(
                 f"{self.base_url}/json/metering/origin/",
                 auth=self._get_auth(),
+                headers=REQUEST_HEADERS,
+                follow_redirects=True,
                 timeout=10,
             )
-            self.logger.debug(
-                f"Got meter list: \nStatus code: {response.status_code}\nRaw response: {response.text}"
-            )
+            self.responses.record(response, "meter list")
+            self._payload_log.log_response(response, "Got meter list")
             meter_ids: list[str] = response.json()
         except Exception as e:
-            self.logger.error(f"Failed to fetch meter list: {e}")
+            self.logger.error("Failed to fetch meter list: %s", e)
             return []
 
-        self.logger.debug(f"Discovered meter IDs: {meter_ids}")
+        self.logger.debug("Discovered meter IDs: %s", meter_ids)
         return meter_ids
 
     async def _discover_meter_id(self) -> str | None:
@@ -80,8 +123,17 @@ class EMHCasaClient:
         self.logger.error("No meter ID found")
         return None
 
-    async def _get_readings(self) -> dict[OBIS, Reading]:
-        self.logger.debug(f"Getting readings from {self.base_url}")
+    async def _get_readings(
+        self,
+        wanted: frozenset[str] | None = None,
+        skipped: set[OBIS] | None = None,
+    ) -> dict[OBIS, Reading]:
+        """Return the readings of the meter.
+
+        Values whose OBIS code is not in ``wanted`` are only added to
+        ``skipped``, without scaling them.
+        """
+        self.logger.debug("Getting readings from %s", self.base_url)
 
         if self.meter_id is None:
             self.meter_id = await self._discover_meter_id()
@@ -93,36 +145,70 @@ class EMHCasaClient:
             response = await self.httpx_client.get(
                 f"{self.base_url}/json/metering/origin/{self.meter_id}/extended",
                 auth=self._get_auth(),
+                headers=REQUEST_HEADERS,
+                follow_redirects=True,
                 timeout=10,
             )
-            self.logger.debug(
-                f"Got meter readings: \nStatus code: {response.status_code}\nRaw response: {response.text}"
-            )
-            meter_reading = response.json()
+            self.responses.record(response, "meter readings")
+            self._payload_log.log_response(response, "Got meter readings")
         except Exception as e:
-            self.logger.error(f"Failed to fetch meter readings: {e}")
+            self.logger.error("Failed to fetch meter readings: %s", e)
             return {}
 
+        digest = content_digest(response.content)
+        if (parsed := self.parse_cache.get(self.meter_id, digest, wanted)) is None:
+            try:
+                meter_reading = response.json()
+            except Exception as e:
+                self.logger.error("Failed to fetch meter readings: %s", e)
+                return {}
+            parsed = self._parse_readings(meter_reading, wanted)
+            self.parse_cache.put(self.meter_id, digest, wanted, parsed)
+        else:
+            self.logger.debug("Meter readings are unchanged")
+
+        readings, meter_skipped = parsed
+        if skipped is not None:
+            skipped.update(meter_skipped)
+        return readings
+
+    def _parse_readings(
+        self, meter_reading: dict, wanted: frozenset[str] | None
+    ) -> tuple[dict[OBIS, Reading], frozenset[OBIS]]:
+        """Return the readings and the skipped codes of the meter's values."""
         readings: dict[OBIS, Reading] = {}
-        now = datetime.now(UTC)
+        skipped: set[OBIS] = set()
+        # All values of the meter were captured together
+        captured = parse_capture_time(meter_reading.get("capture_time"))
+        if captured is None:
+            self.logger.warning(
+                "Invalid capture time: %s", meter_reading.get("capture_time")
+            )
+            captured = datetime.now(UTC)
 
         for meter_value in meter_reading.get("values", []):
             obis_obj = OBIS.parse(meter_value.get("logical_name", ""))
             if obis_obj is None:
                 continue
 
+            if wanted is not None and obis_obj.canonical not in wanted:
+                skipped.add(obis_obj)
+                continue
+
             # Scale value and convert Wh (unit 30) to kWh
-            scaler = meter_value.get("scaler", 0)
-            unit = meter_value.get("unit", 0)
-            value = float(meter_value["value"]) * (10**scaler)
-            if unit == 30:
-                value /= 1000
+            exponent = meter_value.get("scaler", 0)
+            if meter_value.get("unit", 0) == 30:
+                exponent -= 3
 
             readings[obis_obj] = Reading(
-                value=value,
-                timestamp=now,
+                value=parse_value(
+                    meter_value["value"], obis_obj, self.exact_counters, exponent
+                ),
+                timestamp=captured,
                 obis=obis_obj,
             )
 
-        self.logger.debug(f"Parsed {len(readings)} readings: {list(readings.keys())}")
-        return readings
+        self.logger.debug(
+            "Parsed %d readings: %s", len(readings), LazyStr(list, readings)
+        )
+        return readings, frozenset(skipped)
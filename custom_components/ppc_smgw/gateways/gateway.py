@@ -1,11 +1,22 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator, Awaitable, Callable
+from datetime import datetime
 import logging
+from typing import Any
 
 import httpx
+from obis_parser import OBIS
 
-from custom_components.ppc_smgw.gateways.reading import Information
+from custom_components.ppc_smgw.gateways.offload import ParseExecutor
+from custom_components.ppc_smgw.gateways.operations import OperationQueue
+from custom_components.ppc_smgw.gateways.parse_cache import ParseCache
+from custom_components.ppc_smgw.gateways.reading import Information, Reading
+from custom_components.ppc_smgw.gateways.response_buffer import ResponseBuffer
+
+PREWARM_TIMEOUT = 10
+UNKNOWN_FIRMWARE_VERSION = "Unknown"
 
 
 class Gateway(ABC):
@@ -17,6 +28,9 @@ class Gateway(ABC):
         websession: httpx.AsyncClient,
         logger: logging.Logger,
         debug: bool = False,
+        parse_executor: ParseExecutor | None = None,
+        operations: OperationQueue | None = None,
+        exact_counters: bool = False,
     ) -> None:
         self.host = host
         self.username = username
@@ -24,8 +38,79 @@ class Gateway(ABC):
         self.websession = websession
         self.logger = logger
         self.debug = debug
+        # Shared pool for off-loop parsing, the default executor is used without it
+        self.parse_executor = parse_executor
+        # Serializes the operations on this gateway's host, shared by all
+        # clients of the host. Callers run get_data and reboot through it.
+        self.operations = operations if operations is not None else OperationQueue()
+        # Energy counters are parsed to Decimals instead of floats
+        self.exact_counters = exact_counters
         self.dynamic_obis_discovery_enabled = False
+        # Canonical OBIS codes with an enabled entity, None while unknown. The
+        # values of other codes are not converted, only reported in
+        # Information.skipped. Gateways differ in whether they send the F
+        # group, so codes are compared by their canonical form.
+        self.wanted_obis: frozenset[str] | None = None
         self.data: Information | None = None
+        # Device metadata rarely changes. Clients that need extra requests for
+        # it reuse the last known value until the coordinator requests it
+        # again, the coordinator withdraws the request after a completed fetch.
+        self.metadata_requested = True
+        self.firmware_version: str | None = None
+        # Last raw responses of this gateway, exposed through diagnostics
+        self.responses = ResponseBuffer()
+        # Parse results of unchanged responses are reused
+        self.parse_cache = ParseCache()
+
+    @property
+    def prewarm_url(self) -> str:
+        """URL requested to open a connection ahead of a poll."""
+        return self.host
+
+    async def prewarm(self) -> None:
+        """Open a connection to the gateway ahead of the next poll.
+
+        The connection is left in the client's keep-alive pool, so the poll
+        that follows doesn't pay for the TLS handshake. Failures are only
+        logged, the poll itself will report them.
+        """
+        if self.debug:
+            return
+
+        try:
+            await self.websession.head(self.prewarm_url, timeout=PREWARM_TIMEOUT)
+        except httpx.HTTPError as err:
+            self.logger.debug(
+                "Pre-warming connection to %s failed: %s", self.prewarm_url, err
+            )
+
+    def cached_firmware_version(self) -> str | None:
+        """Return the firmware version to reuse for this poll, None to fetch it."""
+        return None if self.metadata_requested else self.firmware_version
+
+    def metadata_fetched(self, information: Information) -> None:
+        """Remember the firmware version of a poll.
+
+        An unknown firmware is not remembered, so it is fetched again with the
+        next poll until it is known.
+        """
+        if not isinstance(information, Information) or (
+            information.firmware_version in (None, UNKNOWN_FIRMWARE_VERSION)
+        ):
+            return
+        self.firmware_version = information.firmware_version
+
+    def keep_session(self, close: Callable[[], Awaitable[Any]]) -> bool:
+        """Return whether a client may keep its login session open.
+
+        Only if the next queued operation on the host is ours and can reuse
+        the session. The queue calls ``close`` if that operation doesn't run
+        next after all.
+        """
+        if self.operations.next_owner() is not self:
+            return False
+        self.operations.hold(self, close)
+        return True
 
     async def check_connection(self) -> bool:
         # ToDO: Implement a basic connection check
@@ -35,6 +120,27 @@ class Gateway(ABC):
     async def get_data(self) -> Information:
         """Fetch data from the gateway."""
 
+    async def stream_readings(self) -> AsyncIterator[dict[OBIS, Reading]]:
+        """Yield the readings of a poll in chunks, each as soon as it is parsed.
+
+        A chunk holds the readings of a meter, usage point or table. Once the
+        iteration finished, ``data`` holds the complete Information, like after
+        get_data. Vendors that read everything with one response yield it as a
+        single chunk.
+        """
+        data = await self.get_data()
+        if isinstance(data, Information):
+            yield data.readings
+
+    async def probe(self) -> datetime | None:
+        """Return the capture time of the newest data on the gateway, if known.
+
+        Vendors with a request much cheaper than get_data implement this, so
+        that polls which would return the same data again are skipped. Probe
+        failures return None, the poll then fetches the data.
+        """
+        return None
+
     async def reboot(self) -> None:
         """Reboot the gateway if supported."""
         raise NotImplementedError(
@@ -0,0 +1,101 @@
+"""Run CPU-bound response parsing off the event loop when it pays off."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+import threading
+from typing import Any
+
+# Payloads smaller than this are parsed inline. BeautifulSoup's fixed setup
+# cost (~100 us) already exceeds an idle executor round trip (~65 us), so only
+# near-empty bodies are worth parsing on the loop (measured with
+# scripts/benchmark_parse.py).
+INLINE_PARSE_THRESHOLD = 128
+
+DEFAULT_PARSE_WORKERS = 2
+
+
+class ParseExecutor:
+    """Small thread pool reserved for response parsing.
+
+    One instance is shared by all gateways so that many polls finishing at
+    once queue up here instead of occupying Home Assistant's default
+    executor. Queue depth is tracked so a parse backlog is visible.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = DEFAULT_PARSE_WORKERS,
+        thread_name_prefix: str = "ppc_smgw_parse",
+    ) -> None:
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix=thread_name_prefix
+        )
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.peak_queued = 0
+
+    async def run[T](self, func: Callable[..., T], *args: Any) -> T:
+        """Run ``func(*args)`` in the pool and wait for the result."""
+        with self._lock:
+            self.queued += 1
+            self.peak_queued = max(self.peak_queued, self.queued)
+
+        future = self._executor.submit(self._call, func, args)
+        future.add_done_callback(self._on_done)
+        return await asyncio.wrap_future(future)
+
+    def _call[T](self, func: Callable[..., T], args: tuple[Any, ...]) -> T:
+        with self._lock:
+            self.queued -= 1
+            self.running += 1
+        try:
+            return func(*args)
+        finally:
+            with self._lock:
+                self.running -= 1
+                self.completed += 1
+
+    def _on_done(self, future: Future) -> None:
+        # Jobs cancelled while still queued never reach _call
+        if future.cancelled():
+            with self._lock:
+                self.queued -= 1
+
+    def shutdown(self) -> None:
+        """Drop queued jobs and let running ones finish in the background."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def as_diagnostics(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "queued": self.queued,
+                "running": self.running,
+                "completed": self.completed,
+                "peak_queued": self.peak_queued,
+            }
+
+
+async def async_parse[T](
+    func: Callable[..., T],
+    *args,
+    executor: ParseExecutor | None = None,
+    inline_threshold: int = INLINE_PARSE_THRESHOLD,
+) -> T:
+    """Return ``func(*args)``, in a worker thread when the payloads are large.
+
+    The payload size is the combined length of all ``bytes`` arguments. Large
+    payloads go to ``executor``, or to the default executor without one.
+    """
+    size = sum(len(arg) for arg in args if isinstance(arg, bytes))
+    if size < inline_threshold:
+        return func(*args)
+    if executor is not None:
+        return await executor.run(func, *args)
+    return await asyncio.to_thread(func, *args)
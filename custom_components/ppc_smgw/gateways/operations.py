@@ -0,0 +1,137 @@
+"""Serialize the operations on one gateway host.
+
+The gateways are small embedded devices, the PPC even allows a single session
+only. All operations on a host - polls of every entry using it, reboots and
+config flow probes - therefore run one after the other. Waiting operations run
+by priority, then in the order they were queued; a running operation is never
+interrupted. An owner may keep a login session open for its next operation,
+the queue closes it if another operation comes first.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from enum import IntEnum
+import heapq
+import itertools
+from typing import Any
+
+
+class Priority(IntEnum):
+    """Priority of a gateway operation, lower values run first."""
+
+    REBOOT = 0
+    POLL = 1
+    BACKFILL = 2
+    DIAGNOSTICS = 3
+
+
+@dataclass(order=True, slots=True)
+class _Waiter:
+    priority: Priority
+    sequence: int
+    future: asyncio.Future[None] = field(compare=False)
+    owner: object | None = field(compare=False)
+
+
+class OperationQueue:
+    """Run gateway operations one at a time, by priority."""
+
+    def __init__(self) -> None:
+        self._busy = False
+        self._waiters: list[_Waiter] = []
+        self._sequence = itertools.count()
+        # Session kept open by an owner for its next operation, with the
+        # coroutine function closing it
+        self._held: tuple[object, Callable[[], Awaitable[Any]]] | None = None
+        self._closing: asyncio.Task[None] | None = None
+
+    @property
+    def pending(self) -> int:
+        """Number of operations waiting to run."""
+        return sum(not waiter.future.done() for waiter in self._waiters)
+
+    def next_owner(self) -> object | None:
+        """Return the owner of the operation that runs next, if one is waiting.
+
+        A client that owns the next operation may keep its session open for it.
+        """
+        waiting = [waiter for waiter in self._waiters if not waiter.future.done()]
+        return min(waiting).owner if waiting else None
+
+    def hold(self, owner: object, close: Callable[[], Awaitable[Any]]) -> None:
+        """Keep a session of ``owner`` open after its running operation.
+
+        ``close`` runs before the next operation of another owner, or on its
+        own once no operation waits anymore, e.g. because the next operation
+        of ``owner`` was cancelled.
+        """
+        self._held = (owner, close)
+
+    async def run[T](
+        self,
+        priority: Priority,
+        func: Callable[..., Awaitable[T]],
+        *args: Any,
+        owner: object | None = None,
+    ) -> T:
+        """Wait for the turn of ``func(*args)``, then run it."""
+        await self._acquire(priority, owner)
+        try:
+            await self._close_held(owner)
+            return await func(*args)
+        finally:
+            self._release()
+
+    async def _close_held(self, owner: object | None) -> None:
+        if self._held is None:
+            return
+        held_owner, close = self._held
+        self._held = None
+        # The owner itself reuses the session, and holds it again if it wants
+        if held_owner is not owner:
+            await close()
+
+    async def _close_when_idle(self) -> None:
+        await self._acquire(Priority.REBOOT, None)
+        try:
+            await self._close_held(None)
+        finally:
+            self._release()
+
+    async def _acquire(self, priority: Priority, owner: object | None) -> None:
+        if not self._busy and not self.pending:
+            self._busy = True
+            return
+
+        waiter = _Waiter(
+            priority,
+            next(self._sequence),
+            asyncio.get_running_loop().create_future(),
+            owner,
+        )
+        heapq.heappush(self._waiters, waiter)
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            # Cancelled right after the turn was handed over, pass it on
+            if waiter.future.done() and not waiter.future.cancelled():
+                self._release()
+            raise
+
+    def _release(self) -> None:
+        # The queue stays busy while the turn is handed to the next waiter
+        while self._waiters:
+            waiter = heapq.heappop(self._waiters)
+            if not waiter.future.done():
+                waiter.future.set_result(None)
+                return
+        self._busy = False
+
+        if self._held is not None:
+            # Nobody picked up the held session
+            self._closing = asyncio.get_running_loop().create_task(
+                self._close_when_idle()
+            )
@@ -0,0 +1,69 @@
+"""Reuse the parse results of gateway responses that didn't change.
+
+The gateways capture new values every 15 minutes or so, most polls therefore
+get the same responses again. Clients hash the raw content of a response,
+without volatile parts like session tokens, and only parse it if the hash or
+the wanted OBIS codes differ from those of the last parse under the same key.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+import hashlib
+from typing import Any
+
+
+def content_digest(*contents: bytes) -> bytes:
+    """Return a digest of one or more response bodies."""
+    digest = hashlib.blake2b(digest_size=16)
+    for content in contents:
+        # The length keeps the boundaries between contents apart
+        digest.update(len(content).to_bytes(8, "big"))
+        digest.update(content)
+    return digest.digest()
+
+
+@dataclass(slots=True, frozen=True)
+class _Entry:
+    digest: bytes
+    wanted: frozenset[str] | None
+    result: Any
+
+
+class ParseCache:
+    """The last parse result of a gateway's responses, by key.
+
+    Results are shared between polls and must not be modified.
+    """
+
+    def __init__(self) -> None:
+        self._entries: dict[str, _Entry] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str, digest: bytes, wanted: frozenset[str] | None) -> Any:
+        """Return the result parsed from the same content, None if there is none."""
+        entry = self._entries.get(key)
+        if entry is None or entry.digest != digest or entry.wanted != wanted:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry.result
+
+    def put(
+        self,
+        key: str,
+        digest: bytes,
+        wanted: frozenset[str] | None,
+        result: Any,
+    ) -> None:
+        self._entries[key] = _Entry(digest, wanted, result)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def as_diagnostics(self) -> dict[str, Any]:
+        return {"entries": len(self), "hits": self.hits, "misses": self.misses}
@@ -9,9 +9,10 @@ import httpx
 from obis_parser import OBIS
 from py_ppc_smgw import PPCSMGWClient
 from py_ppc_smgw.types import FirmwareVersion, Meter
-import urllib3
 
 from custom_components.ppc_smgw.gateways.gateway import Gateway
+from custom_components.ppc_smgw.gateways.offload import ParseExecutor
+from custom_components.ppc_smgw.gateways.operations import OperationQueue
 from custom_components.ppc_smgw.gateways.ppc.const import (
     DEFAULT_MODEL,
     DEFAULT_NAME,
@@ -23,11 +24,9 @@ from custom_components.ppc_smgw.gateways.reading import (
     Information,
     Reading,
     build_fake_information,
+    parse_value,
 )
 
-# Needed as the PPC SMGW uses a self-signed certificate
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-
 
 class PPC_SMGW(Gateway):
     def __init__(
@@ -38,9 +37,22 @@ class PPC_SMGW(Gateway):
         websession: httpx.AsyncClient,
         logger: logging.Logger,
         debug: bool = False,
+        parse_executor: ParseExecutor | None = None,
+        operations: OperationQueue | None = None,
+        exact_counters: bool = False,
         use_library: bool = DEFAULT_USE_LIBRARY,
     ) -> None:
-        super().__init__(host, username, password, websession, logger, debug)
+        super().__init__(
+            host,
+            username,
+            password,
+            websession,
+            logger,
+            debug,
+            parse_executor,
+            operations,
+            exact_counters,
+        )
 
         # Feature toggle flag: route through the py-ppc-smgw library instead of the
         # built-in client. Default uses the py-ppc-smgw library.
@@ -53,6 +65,11 @@ class PPC_SMGW(Gateway):
             password=password,
             httpx_client=websession,
             logger=logger,
+            responses=self.responses,
+            parse_cache=self.parse_cache,
+            parse_executor=parse_executor,
+            keep_session=self.keep_session,
+            exact_counters=exact_counters,
         )
 
     async def get_data(self) -> Information:
@@ -68,9 +85,12 @@ class PPC_SMGW(Gateway):
         elif self.use_library:
             self.logger.debug("Using py-ppc-smgw library for data fetching")
             self.data = await self._get_data_via_library()
+            self.metadata_fetched(self.data)
         else:
             self.logger.debug("Using legacy in-tree PPC client")
-            self.data = await self.ppc_smgw_client.get_data()
+            # The firmware version is on a page read anyway
+            self.data = await self.ppc_smgw_client.get_data(self.wanted_obis)
+            self.metadata_fetched(self.data)
 
         return self.data
 
@@ -89,6 +109,7 @@ class PPC_SMGW(Gateway):
             logger=self.logger,
         ) as client:
             readings: dict[OBIS, Reading] = {}
+            skipped: set[OBIS] = set()
             last_ts: datetime | None = None
 
             meters: list[Meter] = await client.get_meters()
@@ -96,17 +117,28 @@ class PPC_SMGW(Gateway):
                 meter_readings = await client.get_meter_reading(meters[0])
                 for obis, reading in meter_readings.items():
                     ts = self._as_aware(reading.timestamp)
+                    if ts is not None and (last_ts is None or ts > last_ts):
+                        last_ts = ts
+
+                    # The library already parsed the page, only the mapping
+                    # of unwanted values is saved here
+                    if (
+                        self.wanted_obis is not None
+                        and obis.canonical not in self.wanted_obis
+                    ):
+                        skipped.add(obis)
+                        continue
+
                     readings[obis] = Reading(
-                        value=self._coerce_reading_value(reading.value),
+                        value=parse_value(reading.value, obis, self.exact_counters),
                         timestamp=ts,
                         obis=obis,
                     )
-                    if ts is not None and (last_ts is None or ts > last_ts):
-                        last_ts = ts
 
-            firmware = self._construct_firmware_version(
-                await client.get_firmware_versions()
-            )
+            if (firmware := self.cached_firmware_version()) is None:
+                firmware = self._construct_firmware_version(
+                    await client.get_firmware_versions()
+                )
 
         return Information(
             name=DEFAULT_NAME,
@@ -115,6 +147,7 @@ class PPC_SMGW(Gateway):
             firmware_version=firmware,
             last_update=last_ts or now(),
             readings=readings,
+            skipped=frozenset(skipped),
         )
 
     @staticmethod
@@ -128,14 +161,6 @@ class PPC_SMGW(Gateway):
             return None
         return dt.replace(tzinfo=now().tzinfo) if dt.tzinfo is None else dt
 
-    @staticmethod
-    def _coerce_reading_value(value: str | float) -> str | float:
-        """Return numeric gateway values as numbers when possible."""
-        try:
-            return float(value)
-        except (TypeError, ValueError):
-            return value
-
     @staticmethod
     def _construct_firmware_version(firmware_versions: list[FirmwareVersion]) -> str:
         """Rebuild the built-in client's firmware string.
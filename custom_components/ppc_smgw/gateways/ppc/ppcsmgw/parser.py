@@ -0,0 +1,143 @@
+"""HTML parsing for the PPC SMGW web frontend.
+
+The session token and meter id are needed between requests and are pulled out
+with a regex search, which is cheap enough for the event loop. The meter value
+table is parsed with BeautifulSoup in ``parse_poll``, once per poll, see
+``gateways.offload.async_parse``.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, tzinfo
+import logging
+import re
+
+from bs4 import BeautifulSoup, SoupStrainer
+from obis_parser import OBIS
+
+from custom_components.ppc_smgw.gateways.reading import Reading, parse_value
+
+# Values may be quoted or not; tokens and meter ids never contain whitespace
+_FIRST_INPUT_VALUE = re.compile(
+    rb"<input\b[^>]*?\bvalue=[\"']?([^\"'\s>]*)", re.IGNORECASE
+)
+_FIRST_METER_ID = re.compile(
+    rb"\bid=[\"']?meterform_select_meter\b.*?<option\b[^>]*?\bvalue=[\"']?([^\"'\s>]*)",
+    re.IGNORECASE | re.DOTALL,
+)
+
+_ONLY_FIRMWARE = SoupStrainer(id="div_fwversion")
+_ONLY_METER_VALUES = SoupStrainer("table", id="metervalue")
+
+
+def parse_token(content: bytes) -> str:
+    """Return the session token from the hidden input of the login page."""
+    if (match := _FIRST_INPUT_VALUE.search(content)) is None:
+        msg = "No session token found in login response"
+        raise ValueError(msg)
+    return match.group(1).decode()
+
+
+def parse_meter_id(content: bytes) -> str:
+    """Return the id of the first meter offered by the meter form."""
+    if (match := _FIRST_METER_ID.search(content)) is None:
+        msg = "No meter found in meter form"
+        raise ValueError(msg)
+    return match.group(1).decode()
+
+
+def parse_poll(
+    meterform: bytes,
+    profile: bytes,
+    tz: tzinfo | None,
+    logger: logging.Logger,
+    wanted: frozenset[str] | None = None,
+    skipped: set[OBIS] | None = None,
+    exact: bool = False,
+) -> tuple[str, dict[OBIS, Reading], datetime | str]:
+    """Parse the pages of one poll into firmware version, readings and last update."""
+    firmware = BeautifulSoup(meterform, "html.parser", parse_only=_ONLY_FIRMWARE)
+    firmware_version = firmware.find(id="div_fwversion").get_text().strip()
+
+    readings, last_update = parse_readings(profile, tz, logger, wanted, skipped, exact)
+    return firmware_version, readings, last_update
+
+
+def parse_readings(
+    content: bytes,
+    tz: tzinfo | None,
+    logger: logging.Logger,
+    wanted: frozenset[str] | None = None,
+    skipped: set[OBIS] | None = None,
+    exact: bool = False,
+) -> tuple[dict[OBIS, Reading], datetime | str]:
+    """Parse the meter value table of the meter profile page.
+
+    Rows whose OBIS code is not in ``wanted`` are only added to ``skipped``,
+    their value and timestamp are not read. Energy counters are Decimals if
+    ``exact`` is set, see ``parse_value``.
+    """
+    soup = BeautifulSoup(content, "html.parser", parse_only=_ONLY_METER_VALUES)
+    rows = soup.find("table", id="metervalue").find_all("tr")
+
+    logger.info("Found %d rows", len(rows))
+
+    # Timestamps are only parsed when a wanted row uses them
+    raw_timestamp: str | None = None
+    parsed_raw_timestamp: str | None = None
+    timestamp: datetime | str = ""
+    debug = logger.isEnabledFor(logging.DEBUG)
+
+    readings: dict[OBIS, Reading] = {}
+
+    for row in rows:
+        obis_code = row.find(id="table_metervalues_col_obis")
+
+        if obis_code is not None:
+            if debug:
+                logger.debug("Parsing row: %s", row)
+
+            # The SMGW returns the meter values in two rows, one for the consumption and one for the feed-in
+            # We need to store the timestamp of the first row and use it for the second row
+            row_timestamp = row.find(id="table_metervalues_col_timestamp")
+            if row_timestamp is not None:
+                raw_timestamp = row_timestamp.string
+            elif debug:
+                logger.debug("Timestamp not found, using previous: %s", raw_timestamp)
+
+            obis_obj = OBIS.parse(obis_code.string)
+            if obis_obj is None:
+                continue
+
+            if wanted is not None and obis_obj.canonical not in wanted:
+                if skipped is not None:
+                    skipped.add(obis_obj)
+                continue
+
+            timestamp = _parse_timestamp(
+                timestamp, raw_timestamp, parsed_raw_timestamp, tz
+            )
+            parsed_raw_timestamp = raw_timestamp
+            readings[obis_obj] = Reading(
+                value=parse_value(
+                    row.find(id="table_metervalues_col_wert").string, obis_obj, exact
+                ),
+                timestamp=timestamp,
+                obis=obis_obj,
+            )
+
+    # The last update is the timestamp of the last row, even if it was skipped
+    timestamp = _parse_timestamp(timestamp, raw_timestamp, parsed_raw_timestamp, tz)
+    return readings, timestamp
+
+
+def _parse_timestamp(
+    current: datetime | str,
+    raw: str | None,
+    parsed_raw: str | None,
+    tz: tzinfo | None,
+) -> datetime | str:
+    """Return the timestamp for ``raw``, reusing ``current`` if it was parsed from it."""
+    if raw is None or raw == parsed_raw:
+        return current
+    return datetime.strptime(raw, "%Y-%m-%d %H:%M:%S").replace(tzinfo=tz)
@@ -1,17 +1,22 @@
 """PPC SMGW API."""
 
-import asyncio
-from datetime import datetime
+from collections.abc import Awaitable, Callable
+from typing import Any
 
-from bs4 import BeautifulSoup
 from homeassistant.util.dt import now
 import httpx
 from obis_parser import OBIS
 
-from custom_components.ppc_smgw.gateways.reading import Information, Reading
+from custom_components.ppc_smgw.gateways.debug_log import PayloadLogger
+from custom_components.ppc_smgw.gateways.offload import ParseExecutor, async_parse
+from custom_components.ppc_smgw.gateways.parse_cache import ParseCache, content_digest
+from custom_components.ppc_smgw.gateways.reading import Information
+from custom_components.ppc_smgw.gateways.response_buffer import ResponseBuffer, redact
 
 from ..const import DEFAULT_MODEL, DEFAULT_NAME, MANUFACTURER
-from .errors import SessionCookieStillPresentError
+from .parser import parse_meter_id, parse_poll, parse_token
+
+REQUEST_TIMEOUT = httpx.Timeout(10)
 
 
 class PPCSmgw:
@@ -22,6 +27,11 @@ class PPCSmgw:
         password: str,
         httpx_client: httpx.AsyncClient,
         logger,
+        responses: ResponseBuffer | None = None,
+        parse_cache: ParseCache | None = None,
+        parse_executor: ParseExecutor | None = None,
+        keep_session: Callable[[Callable[[], Awaitable[Any]]], bool] | None = None,
+        exact_counters: bool = False,
     ):
         self.host = host
         self.username = username
@@ -29,15 +39,54 @@ class PPCSmgw:
 
         self.httpx_client = httpx_client
         self.logger = logger
-
-        self._cookies = {}
+        self._payload_log = PayloadLogger(logger)
+        self.responses = responses if responses is not None else ResponseBuffer()
+        self.parse_cache = parse_cache if parse_cache is not None else ParseCache()
+        self.exact_counters = exact_counters
+        self.parse_executor = parse_executor
+        # Whether to stay logged in after an operation, because the next
+        # operation on the gateway is ours and can reuse the session. It is
+        # given the logout, in case that operation doesn't run after all.
+        self._keep_session = keep_session
+
+        # Session cookies live in this jar, the shared httpx client's jar is
+        # cleared of them after every request
+        self._cookies = httpx.Cookies()
         self._token = ""
+        self._session_open = False
 
         self.firmware_version = None
 
     def _post_data(self, action):
         return f"tkn={self._token}&action={action}"
 
+    async def _send(self, method: str, content: str | None = None) -> httpx.Response:
+        """Send a request within this client's own session.
+
+        The request is built without the shared client's cookie jar. The
+        client still stores the cookies of every response in its jar, they are
+        removed from it again, so other gateways (or other PPC entries) using
+        the same client never send this session's cookie.
+        """
+        request = httpx.Request(
+            method,
+            self.host,
+            headers=self.httpx_client.headers,
+            content=content,
+            extensions={"timeout": REQUEST_TIMEOUT.as_dict()},
+        )
+        self._cookies.set_cookie_header(request)
+        response = await self.httpx_client.send(
+            request, auth=self._auth, follow_redirects=False
+        )
+        # The digest challenge is part of the history
+        for sent in (*response.history, response):
+            for cookie in sent.cookies.jar:
+                self.httpx_client.cookies.delete(
+                    cookie.name, domain=cookie.domain, path=cookie.path
+                )
+        return response
+
     async def _login(self):
         self.logger.info("Attempting to login to PPC SMGW")
 
@@ -47,32 +96,18 @@ class PPCSmgw:
         self._auth = httpx.DigestAuth(username=self.username, password=self.password)
 
         # Clear session state upfront so no stale credentials survive any failure path
-        self._cookies = {}
+        self._cookies = httpx.Cookies()
         self._token = ""
 
-        # TODO: Find a way to remove the cookie here!
-        # See https://github.com/encode/httpx/pull/3065
-        if self.httpx_client.cookies.get(name="session") is not None:
-            self.logger.debug("Session cookie still present, trying to delete it")
-
-            self.httpx_client.cookies.delete(name="session")
-            self.logger.debug("Deleted session cookie")
-
-            if "session" in self.httpx_client.cookies:
-                self.logger.error("Session cookie still present after deletion")
-                raise SessionCookieStillPresentError
-
         try:
-            response = await self.httpx_client.get(
-                self.host,
-                timeout=10,
-                auth=self._auth,
-            )
+            response = await self._send("GET")
         except Exception as e:
             msg = f"Error connecting to {self.host}: {e}"
             self.logger.error(msg)
             raise ConnectionError(msg) from e
 
+        self.responses.record(response, "login")
+
         if "session" not in response.cookies:
             msg = (
                 f"Login to {self.host} failed: no session cookie in response (HTTP {response.status_code}). "
@@ -81,104 +116,96 @@ class PPCSmgw:
             )
             self.logger.error(msg)
             raise ConnectionError(msg)
-        self._cookies = {"Cookie": response.cookies["session"]}
+        self._cookies.extract_cookies(response)
 
-        soup = await asyncio.to_thread(BeautifulSoup, response.content, "html.parser")
-        tags = soup.find_all("input")
-        self._token = tags[0].get("value")
+        self._token = parse_token(response.content)
+        self._session_open = True
 
         self.logger.info("Got cookie response, assuming we are logged in")
 
         return response
 
-    def _set_firwmware_version(self, soup) -> None:
-        self.firmware_version = soup.find(id="div_fwversion").get_text().strip()
-
-    async def get_data(self) -> Information:
+    async def _ensure_session(self) -> None:
+        """Log in, unless the session of the previous operation is still open."""
+        if self._session_open:
+            self.logger.info("Reusing the open session")
+            return
         await self._login()
 
+    def _drop_session(self) -> None:
+        self._cookies = httpx.Cookies()
+        self._token = ""
+        self._session_open = False
+
+    async def _end_session(self) -> None:
+        if self._keep_session is not None and self._keep_session(self._logout):
+            self.logger.info("Keeping the session open for the next operation")
+            return
+        await self._logout()
+
+    async def get_data(self, wanted: frozenset[str] | None = None) -> Information:
+        await self._ensure_session()
+        try:
+            return await self._read_meter(wanted)
+        except BaseException:
+            # Never reuse a session that may be broken
+            self._drop_session()
+            raise
+
+    async def _read_meter(self, wanted: frozenset[str] | None) -> Information:
         self.logger.info("Requesting meter readings")
 
         try:
-            response = await self.httpx_client.post(
-                self.host,
-                data=self._post_data("meterform"),
-                cookies=self._cookies,
-                timeout=10,
-                auth=self._auth,
-            )
+            response = await self._send("POST", self._post_data("meterform"))
         except Exception as e:
-            self.logger.error(f"Error getting meter readings: {e}")
+            self.logger.error("Error getting meter readings: %s", e)
+            self._drop_session()
             return []
 
+        self.responses.record(response, "meterform")
         self.logger.info("Got meter readings, parsing...")
 
-        soup = await asyncio.to_thread(BeautifulSoup, response.content, "html.parser")
-
-        self._set_firwmware_version(soup)
-
-        sel = soup.find(id="meterform_select_meter")
-        meter_val = sel.findChild()
-        meter_id = meter_val.attrs.get("value")
+        # Only the meter id is needed before the next request, the firmware
+        # version is parsed from the same page together with the profile.
+        meterform = response.content
+        meter_id = parse_meter_id(meterform)
         post_data = self._post_data("showMeterProfile") + f"&mid={meter_id}"
 
         try:
-            response = await self.httpx_client.post(
-                self.host,
-                data=post_data,
-                cookies=self._cookies,
-                timeout=10,
-                auth=self._auth,
-            )
+            response = await self._send("POST", post_data)
         except Exception as e:
-            self.logger.error(f"Error getting meter profile: {e}")
+            self.logger.error("Error getting meter profile: %s", e)
+            self._drop_session()
             return []
 
-        soup = await asyncio.to_thread(BeautifulSoup, response.content, "html.parser")
-
-        table_data = soup.find("table", id="metervalue")
-        rows = table_data.find_all("tr")
-
-        self.logger.info(f"Found {len(rows)} rows")
-
-        timestamp = ""
-
-        readings: dict[OBIS, Reading] = {}
-
-        for row in rows:
-            obis_code = row.find(id="table_metervalues_col_obis")
-
-            if obis_code is not None:
-                self.logger.debug(f"Parsing row: {row}")
-
-                # The SMGW returns the meter values in two rows, one for the consumption and one for the feed-in
-                # We need to store the timestamp of the first row and use it for the second row
-                row_timestamp = row.find(id="table_metervalues_col_timestamp")
-                if row_timestamp is None:
-                    current_timestamp = timestamp
-
-                    self.logger.debug(
-                        f"Timestamp not found, using previous: {current_timestamp}"
-                    )
-                else:
-                    self.logger.debug(f"Found timestamp: {row_timestamp.string}")
-                    current_timestamp = datetime.strptime(
-                        row_timestamp.string, "%Y-%m-%d %H:%M:%S"
-                    ).replace(tzinfo=now().tzinfo)
-                    timestamp = current_timestamp
-
-                obis_obj = OBIS.parse(row.find(id="table_metervalues_col_obis").string)
-                if obis_obj is not None:
-                    readings[obis_obj] = Reading(
-                        value=row.find(id="table_metervalues_col_wert").string,
-                        timestamp=current_timestamp,
-                        obis=obis_obj,
-                    )
+        self.responses.record(response, "showMeterProfile")
+
+        # The pages differ by their session tokens only, unless new values
+        # were captured
+        digest = content_digest(redact(meterform), redact(response.content))
+        if (parsed := self.parse_cache.get("poll", digest, wanted)) is None:
+            skipped: set[OBIS] = set()
+            firmware_version, readings, timestamp = await async_parse(
+                parse_poll,
+                meterform,
+                response.content,
+                now().tzinfo,
+                self.logger,
+                wanted,
+                skipped,
+                self.exact_counters,
+                executor=self.parse_executor,
+            )
+            parsed = (firmware_version, readings, timestamp, frozenset(skipped))
+            self.parse_cache.put("poll", digest, wanted, parsed)
+        else:
+            self.logger.info("Meter values unchanged, reusing the parsed readings")
+        self.firmware_version, readings, timestamp, skipped = parsed
 
-        await self._logout()
+        await self._end_session()
 
-        self.logger.info(f"Found {len(readings)} readings")
-        self.logger.debug(f"Readings:\n{readings}")
+        self.logger.info("Found %d readings", len(readings))
+        self.logger.debug("Readings:\n%s", readings)
 
         information: Information = Information(
             name=DEFAULT_NAME,
@@ -187,6 +214,7 @@ class PPCSmgw:
             firmware_version=self.firmware_version,
             last_update=timestamp,
             readings=readings,
+            skipped=skipped,
         )
 
         return information
@@ -197,39 +225,33 @@ class PPCSmgw:
         self.logger.info("trying to log out")
 
         try:
-            response = await self.httpx_client.post(
-                self.host,
-                data=self._post_data("logout"),
-                cookies=self._cookies,
-                timeout=10,
-                auth=self._auth,
-            )
-            self.logger.debug(f"Got response: {response}\nContent: {response.content}")
+            response = await self._send("POST", self._post_data("logout"))
+            self.responses.record(response, "logout")
+            self._payload_log.log_response(response, "Logged out")
 
         except Exception as e:
-            self._cookies = {}
-            self._token = ""
+            self._drop_session()
 
-            self.logger.error(f"Error logging out: {e}")
+            self.logger.error("Error logging out: %s", e)
             return []
+        finally:
+            self._session_open = False
 
     async def selftest(self):
         """Call the self-test of the SMWG. This reboots the SMGW."""
         self.logger.info("Running self-test")
-        await self._login()
+        await self._ensure_session()
 
         self.logger.info("Requesting self-test")
 
-        self.logger.debug(f"Post data: {self._post_data('selftest')}")
-        response = await self.httpx_client.post(
-            self.host,
-            data=self._post_data("selftest"),
-            cookies=self._cookies,
-            timeout=10,
-            auth=self._auth,
-        )
+        # The gateway reboots, its session is gone either way
+        try:
+            response = await self._send("POST", self._post_data("selftest"))
+        finally:
+            self._drop_session()
 
-        self.logger.debug(f"Got response: {response}\nContent: {response.content}")
+        self.responses.record(response, "selftest")
+        self._payload_log.log_response(response, "Requested self-test")
 
     async def reboot(self):
         """Reboots the SMGW through a Self-Test."""
@@ -1,7 +1,8 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import UTC, datetime
+from decimal import Decimal, InvalidOperation
 import math
 import random
 
@@ -10,7 +11,7 @@ from obis_parser import OBIS
 
 @dataclass
 class Reading:
-    value: str | float
+    value: str | float | Decimal
     timestamp: datetime
     obis: OBIS
 
@@ -23,6 +24,65 @@ class Information:
     firmware_version: str
     last_update: datetime
     readings: dict[OBIS, Reading]
+    # Codes the gateway delivered but that were not wanted, see
+    # Gateway.wanted_obis. Their values were not converted.
+    skipped: frozenset[OBIS] = field(default_factory=frozenset)
+
+
+def parse_value(
+    raw: str | float | None, obis: OBIS, exact: bool = False, exponent: int = 0
+) -> str | float | Decimal | None:
+    """Convert a value delivered by a gateway, scaled by ``10**exponent``.
+
+    Values are converted once, while parsing: energy counters to a Decimal
+    with the delivered digits if ``exact`` is set, all others to a float.
+    Scaling is done in decimal, so a float is the one closest to the value.
+    Values that are no finite number are returned as they are.
+    """
+    try:
+        value = Decimal(str(raw).strip()).scaleb(exponent)
+    except InvalidOperation:
+        return raw
+    if not value.is_finite():
+        return raw
+    if exact and is_counter(obis):
+        return value
+    return float(value)
+
+
+def is_counter(obis: OBIS) -> bool:
+    """Return whether an OBIS code is a (total increasing) energy counter."""
+    info = obis.info
+    return info is not None and info.state_class == "total_increasing"
+
+
+def json_value(value: str | float | Decimal | None) -> str | float | None:
+    """Return a reading value for JSON, which has no decimal type."""
+    return float(value) if isinstance(value, Decimal) else value
+
+
+def parse_capture_time(value: str | None) -> datetime | None:
+    """Return an ISO 8601 capture time of a gateway, None if it is invalid.
+
+    Capture times without an offset are in UTC.
+    """
+    try:
+        captured = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+    return captured if captured.tzinfo is not None else captured.replace(tzinfo=UTC)
+
+
+def newest_timestamp(readings: dict[OBIS, Reading], default: datetime) -> datetime:
+    """Return the newest timestamp of ``readings``, ``default`` without any."""
+    return max(
+        (
+            reading.timestamp
+            for reading in readings.values()
+            if isinstance(reading.timestamp, datetime)
+        ),
+        default=default,
+    )
 
 
 # FakeInformation contains a sample response from the API for development purposes
@@ -34,12 +94,12 @@ FakeInformation: Information = Information(
     last_update=datetime(2024, 12, 20, 16, 0, 1, tzinfo=UTC),
     readings={
         OBIS(1, 0, 1, 8, 0): Reading(
-            value="724.9204",
+            value=724.9204,
             timestamp=datetime(2024, 12, 20, 16, 0, 1, tzinfo=UTC),
             obis=OBIS(1, 0, 1, 8, 0),
         ),
         OBIS(1, 0, 2, 8, 0): Reading(
-            value="3.0557",
+            value=3.0557,
             timestamp=datetime(2024, 12, 20, 16, 0, 1, tzinfo=UTC),
             obis=OBIS(1, 0, 2, 8, 0),
         ),
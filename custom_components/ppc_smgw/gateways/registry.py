@@ -0,0 +1,60 @@
+"""Lazy lookup of the gateway implementation for a vendor.
+
+Each vendor package pulls in its own parsing stack (``bs4``, ``py_ppc_smgw``,
+...), so a vendor module is only imported once an entry for that vendor is
+actually set up.
+"""
+
+from __future__ import annotations
+
+import importlib
+import importlib.util
+import sys
+from typing import TYPE_CHECKING
+
+from custom_components.ppc_smgw.gateways.vendors import Vendor
+
+if TYPE_CHECKING:
+    from custom_components.ppc_smgw.gateways.gateway import Gateway
+
+# Vendor -> (module relative to this package, gateway class name)
+_GATEWAY_CLASSES: dict[Vendor, tuple[str, str]] = {
+    Vendor.PPC: (".ppc.ppc_smgw", "PPC_SMGW"),
+    Vendor.Theben: (".theben.theben", "ThebenConexa"),
+    Vendor.EMH: (".emh.emh", "EMHGateway"),
+}
+
+_insecure_warnings_disabled = False
+
+
+def _module_name(vendor: Vendor) -> str:
+    return importlib.util.resolve_name(_GATEWAY_CLASSES[vendor][0], __package__)
+
+
+def is_gateway_loaded(vendor: Vendor) -> bool:
+    """Return True if the vendor module is already imported."""
+    return _module_name(vendor) in sys.modules
+
+
+def load_gateway_class(vendor: Vendor) -> type[Gateway]:
+    """Import the vendor module and return its gateway class.
+
+    This may import third-party packages and must not run on the event loop
+    unless ``is_gateway_loaded`` is True.
+    """
+    module = importlib.import_module(_module_name(vendor))
+    _disable_insecure_request_warnings()
+    return getattr(module, _GATEWAY_CLASSES[vendor][1])
+
+
+def _disable_insecure_request_warnings() -> None:
+    # Needed as the SMGWs use self-signed certificates. Done once, on the
+    # first vendor load, instead of at import time of every vendor module.
+    global _insecure_warnings_disabled  # noqa: PLW0603
+    if _insecure_warnings_disabled:
+        return
+
+    import urllib3  # noqa: PLC0415
+
+    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+    _insecure_warnings_disabled = True
@@ -0,0 +1,129 @@
+"""Bounded in-memory history of raw gateway responses for diagnostics.
+
+Bodies are redacted and zlib-compressed when recorded, so keeping the last
+few responses around costs a few KiB and no logging at all. They are only
+decompressed when a diagnostics download is requested.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass
+from datetime import UTC, datetime
+import re
+from typing import Any
+from urllib.parse import urlsplit
+import zlib
+
+import httpx
+
+DEFAULT_MAX_RESPONSES = 20
+# Upper bound for the compressed bodies kept in one buffer
+DEFAULT_MAX_BYTES = 256 * 1024
+
+REDACTED = b"**REDACTED**"
+
+# Session tokens, hidden form values and credential-like JSON fields
+_REDACTIONS: tuple[re.Pattern[bytes], ...] = (
+    re.compile(rb"(tkn=)[^&\s\"']*"),
+    re.compile(rb"(<input\b[^>]*\bvalue=[\"'])[^\"']*", re.IGNORECASE),
+    re.compile(rb"(session=)[^;\s\"']*"),
+    re.compile(
+        rb"(\"(?:password|passwd|token|session|secret)[^\"]*\"\s*:\s*\")[^\"]*",
+        re.IGNORECASE,
+    ),
+)
+
+
+def redact(body: bytes) -> bytes:
+    """Blank out session tokens and credentials in a raw response body."""
+    for pattern in _REDACTIONS:
+        body = pattern.sub(rb"\1" + REDACTED, body)
+    return body
+
+
+@dataclass(slots=True, frozen=True)
+class ResponseRecord:
+    """One recorded response, body stored redacted and compressed."""
+
+    label: str
+    method: str
+    path: str
+    status_code: int
+    elapsed_ms: float
+    received_at: datetime
+    size: int
+    body: bytes
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "label": self.label,
+            "method": self.method,
+            "path": self.path,
+            "status_code": self.status_code,
+            "elapsed_ms": round(self.elapsed_ms, 1),
+            "received_at": self.received_at.isoformat(),
+            "size": self.size,
+            "body": zlib.decompress(self.body).decode("utf-8", errors="replace"),
+        }
+
+
+class ResponseBuffer:
+    """Ring buffer of the last ``max_responses`` responses of one gateway.
+
+    The oldest records are also dropped once the compressed bodies exceed
+    ``max_bytes``.
+    """
+
+    def __init__(
+        self,
+        max_responses: int = DEFAULT_MAX_RESPONSES,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self._records: deque[ResponseRecord] = deque(maxlen=max_responses)
+        self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    @property
+    def compressed_bytes(self) -> int:
+        return self._bytes
+
+    def record(self, response: httpx.Response, label: str) -> None:
+        content = response.content
+        request = response.request
+        try:
+            elapsed_ms = response.elapsed.total_seconds() * 1000
+        except RuntimeError:
+            # Responses built in memory (e.g. by a mock transport) are never
+            # streamed and carry no timing
+            elapsed_ms = 0.0
+        record = ResponseRecord(
+            label=label,
+            method=request.method,
+            # Only the path is kept; the query may carry a session token
+            path=urlsplit(str(request.url)).path,
+            status_code=response.status_code,
+            elapsed_ms=elapsed_ms,
+            received_at=datetime.now(UTC),
+            size=len(content),
+            body=zlib.compress(redact(content)),
+        )
+
+        if len(self._records) == self._records.maxlen:
+            self._bytes -= len(self._records[0].body)
+        self._records.append(record)
+        self._bytes += len(record.body)
+
+        while self._bytes > self.max_bytes and len(self._records) > 1:
+            self._bytes -= len(self._records.popleft().body)
+
+    def clear(self) -> None:
+        self._records.clear()
+        self._bytes = 0
+
+    def as_diagnostics(self) -> list[dict[str, Any]]:
+        """Return the recorded responses, oldest first."""
+        return [record.as_dict() for record in self._records]
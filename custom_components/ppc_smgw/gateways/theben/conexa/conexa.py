@@ -1,15 +1,28 @@
+from collections.abc import AsyncIterator
 from datetime import UTC, datetime
 import logging
 
 import httpx
 from obis_parser import OBIS
 
-from custom_components.ppc_smgw.gateways.reading import Information, Reading
+from custom_components.ppc_smgw.gateways.debug_log import PayloadLogger
+from custom_components.ppc_smgw.gateways.parse_cache import ParseCache, content_digest
+from custom_components.ppc_smgw.gateways.reading import (
+    Information,
+    Reading,
+    newest_timestamp,
+    parse_capture_time,
+    parse_value,
+)
+from custom_components.ppc_smgw.gateways.response_buffer import ResponseBuffer
 
 from ..const import DEFAULT_MODEL, DEFAULT_NAME, MANUFACTURER
 
 _LOGGER = logging.getLogger(__name__)
 
+# Sent with every request instead of being set on the (shared) httpx client
+REQUEST_HEADERS = {"Content-Type": "application/json"}
+
 
 class ThebenMD5DigestAuth(httpx.DigestAuth):
     """DigestAuth wrapper forcing MD5 algorithm to bypass Theben Conexa firmware SHA-256 issue."""
@@ -33,6 +46,9 @@ class ThebenConexaClient:
         password: str,
         httpx_client: httpx.AsyncClient,
         logger,
+        responses: ResponseBuffer | None = None,
+        parse_cache: ParseCache | None = None,
+        exact_counters: bool = False,
     ):
         self.base_url = base_url
         self.username = username
@@ -40,48 +56,93 @@ class ThebenConexaClient:
 
         self.httpx_client = httpx_client
         self.logger = logger
-
-        self.httpx_client.headers.setdefault("Content-Type", "application/json")
-        self.httpx_client.follow_redirects = True
+        self._payload_log = PayloadLogger(logger)
+        self.responses = responses if responses is not None else ResponseBuffer()
+        self.parse_cache = parse_cache if parse_cache is not None else ParseCache()
+        self.exact_counters = exact_counters
+        # Usage points of the last readings, probed for new data
+        self._usage_point_ids: list[str] = []
 
     def _get_auth(self) -> httpx.DigestAuth:
         return ThebenMD5DigestAuth(self.username, self.password)
 
-    async def get_data(self) -> Information:
-        information = Information(
-            name=DEFAULT_NAME,
-            model=DEFAULT_MODEL,
-            manufacturer=MANUFACTURER,
-            firmware_version=await self._get_firmware_version(),
-            last_update=datetime.now(UTC),
-            readings=await self._get_readings(),
-        )
+    async def get_data(
+        self,
+        wanted: frozenset[str] | None = None,
+        firmware_version: str | None = None,
+    ) -> Information:
+        """Return the readings, and the firmware version unless it is given."""
+        if firmware_version is None:
+            firmware_version = await self.get_firmware_version()
 
-        self.logger.debug(f"Returning information: {information}")
+        skipped: set[OBIS] = set()
+        readings = await self._get_readings(wanted, skipped)
+        information = build_information(firmware_version, readings, skipped)
+
+        self.logger.debug("Returning information: %s", information)
 
         return information
 
+    async def get_capture_time(self) -> datetime | None:
+        """Return the capture time of the first channel of the first usage point.
+
+        All channels are captured together, so this needs a single readings
+        request instead of the user info and the readings of every usage
+        point. None while no usage point is known yet.
+        """
+        if not self._usage_point_ids:
+            return None
+
+        try:
+            response = await self._request_readings(self._usage_point_ids[0])
+            channel = response.json()["readings"]["channels"][0]
+            return parse_capture_time(channel["readings"][0]["capture-time"])
+        except Exception as e:
+            self.logger.debug("Failed to fetch the capture time: %s", e)
+            return None
+
+    async def _request_readings(self, usage_point_id: str) -> httpx.Response:
+        response = await self.httpx_client.post(
+            self.base_url,
+            auth=self._get_auth(),
+            headers=REQUEST_HEADERS,
+            follow_redirects=True,
+            timeout=10,
+            json={
+                "method": "readings",
+                "database": "origin",
+                "usage-point-id": usage_point_id,
+                "last-reading": "true",
+            },
+        )
+        self.responses.record(response, "readings")
+        self._payload_log.log_response(
+            response, "Got readings for usage point id '%s'", usage_point_id
+        )
+        return response
+
     # Retrieve list of usage point IDs
     async def _get_usage_point_ids(self) -> list[str]:
-        self.logger.debug(f"Getting user info from {self.base_url}")
+        self.logger.debug("Getting user info from %s", self.base_url)
 
         try:
             response = await self.httpx_client.post(
                 self.base_url,
                 auth=self._get_auth(),
+                headers=REQUEST_HEADERS,
+                follow_redirects=True,
                 timeout=10,
                 json={"method": "user-info"},
             )
-            self.logger.debug(
-                f"Got user info: \nStatus code: {response.status_code}\nRaw response: {response.text}"
-            )
+            self.responses.record(response, "user-info")
+            self._payload_log.log_response(response, "Got user info")
             usage_json = response.json()
         except Exception as e:
-            self.logger.error(f"Failed to fetch usage point ID: {e}")
+            self.logger.error("Failed to fetch usage point ID: %s", e)
             return ""
 
         usage_points_json = usage_json["user-info"]["usage-points"]
-        self.logger.debug(f"Received {len(usage_points_json)} usage points.")
+        self.logger.debug("Received %d usage points.", len(usage_points_json))
         usage_point_ids = []
         # If there are multiple, prefer the ones with
         # "taf-state": "running" and "taf-number": "7"
@@ -99,84 +160,124 @@ class ThebenConexaClient:
             return ""
 
         self.logger.debug(
-            f"Using {len(usage_point_ids)} usage point ids: {usage_point_ids}"
+            "Using %d usage point ids: %s", len(usage_point_ids), usage_point_ids
         )
         return usage_point_ids
 
-    async def _get_readings(self) -> dict[OBIS, Reading]:
-        self.logger.debug(f"Getting readings from {self.base_url}")
+    async def _get_readings(
+        self,
+        wanted: frozenset[str] | None = None,
+        skipped: set[OBIS] | None = None,
+    ) -> dict[OBIS, Reading]:
+        """Return the readings of all usage points.
+
+        Channels whose OBIS code is not in ``wanted`` are only added to
+        ``skipped``, without converting their value.
+        """
+        readings: dict[OBIS, Reading] = {}
+        async for usage_point_readings in self.stream_readings(wanted, skipped):
+            readings.update(usage_point_readings)
+        return readings
+
+    async def stream_readings(
+        self,
+        wanted: frozenset[str] | None = None,
+        skipped: set[OBIS] | None = None,
+    ) -> AsyncIterator[dict[OBIS, Reading]]:
+        """Yield the readings of each usage point as soon as they are parsed."""
+        self.logger.debug("Getting readings from %s", self.base_url)
 
         usage_point_ids = await self._get_usage_point_ids()
         if usage_point_ids is None or len(usage_point_ids) == 0:
             self.logger.error("No usage point ID found")
-            return {}
+            return
 
-        readings: dict[OBIS, Reading] = {}
+        self._usage_point_ids = usage_point_ids
 
         for id in usage_point_ids:
             try:
-                response = await self.httpx_client.post(
-                    self.base_url,
-                    auth=self._get_auth(),
-                    timeout=10,
-                    json={
-                        "method": "readings",
-                        "database": "origin",
-                        "usage-point-id": id,
-                        "last-reading": "true",
-                    },
-                )
-                self.logger.debug(
-                    f"Got readings for usage point id '{id}': \nStatus code: {response.status_code}\nRaw response: {response.text}"
-                )
-                res_json = response.json()
+                response = await self._request_readings(id)
             except Exception as e:
-                self.logger.error(f"Failed to fetch reading: {e}")
-
-            for channel in res_json["readings"]["channels"]:
-                ch_readings = channel["readings"]
-                if len(ch_readings) == 0:
-                    self.logger.error("No reading found.")
-                elif len(ch_readings) > 1:
-                    self.logger.error(
-                        "Too many readings found. Only support one at a time right now."
-                    )
-
-                obis_obj = OBIS.parse(channel["obis"])
-                if obis_obj is None:
-                    self.logger.error(f"No or unknown OBIS code: {channel.get('obis')}")
-                    continue
-
-                # So far, this logic only supports one reading per channel at once
-                reading = ch_readings[0]
-                readings[obis_obj] = Reading(
-                    value=(
-                        float(reading["value"]) / 10000
-                    ),  # Watts of value? deciWatts!
-                    timestamp=reading["capture-time"],
-                    obis=obis_obj,
+                self.logger.error("Failed to fetch reading: %s", e)
+                continue
+
+            digest = content_digest(response.content)
+            if (parsed := self.parse_cache.get(id, digest, wanted)) is None:
+                parsed = self._parse_readings(response.json(), wanted)
+                self.parse_cache.put(id, digest, wanted, parsed)
+            else:
+                self.logger.debug("Readings of usage point '%s' are unchanged", id)
+
+            usage_point_readings, usage_point_skipped = parsed
+            if skipped is not None:
+                skipped.update(usage_point_skipped)
+            yield usage_point_readings
+
+    def _parse_readings(
+        self, res_json: dict, wanted: frozenset[str] | None
+    ) -> tuple[dict[OBIS, Reading], frozenset[OBIS]]:
+        """Return the readings and the skipped codes of one usage point."""
+        readings: dict[OBIS, Reading] = {}
+        skipped: set[OBIS] = set()
+        # The channels share their capture time, each one is parsed once
+        capture_times: dict[str, datetime] = {}
+
+        for channel in res_json["readings"]["channels"]:
+            obis_obj = OBIS.parse(channel["obis"])
+            if obis_obj is None:
+                self.logger.error("No or unknown OBIS code: %s", channel.get("obis"))
+                continue
+
+            if wanted is not None and obis_obj.canonical not in wanted:
+                skipped.add(obis_obj)
+                continue
+
+            ch_readings = channel["readings"]
+            if len(ch_readings) == 0:
+                self.logger.error("No reading found.")
+            elif len(ch_readings) > 1:
+                self.logger.error(
+                    "Too many readings found. Only support one at a time right now."
                 )
-        return readings
 
-    async def _get_firmware_version(self) -> str:
-        self.logger.debug(f"Getting firmware version from {self.base_url}")
+            # So far, this logic only supports one reading per channel at once
+            reading = ch_readings[0]
+            raw_time = reading.get("capture-time")
+            if (timestamp := capture_times.get(raw_time)) is None:
+                timestamp = parse_capture_time(raw_time)
+                if timestamp is None:
+                    self.logger.warning("Invalid capture time: %s", raw_time)
+                    timestamp = datetime.now(UTC)
+                capture_times[raw_time] = timestamp
+
+            readings[obis_obj] = Reading(
+                # Watts of value? deciWatts!
+                value=parse_value(reading["value"], obis_obj, self.exact_counters, -4),
+                timestamp=timestamp,
+                obis=obis_obj,
+            )
+        return readings, frozenset(skipped)
+
+    async def get_firmware_version(self) -> str:
+        self.logger.debug("Getting firmware version from %s", self.base_url)
 
         try:
             response = await self.httpx_client.post(
                 self.base_url,
                 auth=self._get_auth(),
+                headers=REQUEST_HEADERS,
+                follow_redirects=True,
                 timeout=10,
                 # TODO: Requires setting the header "X-Content-Length" manually (equals body length)
                 json={"method": "smgw-info"},
             )
 
-            self.logger.debug(
-                f"Got firmware info response: \nStatus code: {response.status_code}\nRaw response: {response.text}"
-            )
+            self.responses.record(response, "smgw-info")
+            self._payload_log.log_response(response, "Got firmware info response")
 
             smgw_info = response.json()
         except Exception as e:
-            self.logger.error(f"Failed to fetch firmware version: {e}")
+            self.logger.error("Failed to fetch firmware version: %s", e)
             return "Unknown"
 
         try:
@@ -186,7 +287,22 @@ class ThebenConexaClient:
             return f"{fw_version}-{fw_hash:.8}"
         except KeyError as e:
             self.logger.error(
-                f"Failed to get firmware info: {e}.\nReponse from SMGW: {response.json()}"
+                "Failed to get firmware info: %s.\nReponse from SMGW: %s", e, smgw_info
             )
 
         return "Unknown"
+
+
+def build_information(
+    firmware_version: str, readings: dict[OBIS, Reading], skipped: set[OBIS]
+) -> Information:
+    """Return the Information of a poll, last updated at the newest capture."""
+    return Information(
+        name=DEFAULT_NAME,
+        model=DEFAULT_MODEL,
+        manufacturer=MANUFACTURER,
+        firmware_version=firmware_version,
+        last_update=newest_timestamp(readings, datetime.now(UTC)),
+        readings=readings,
+        skipped=frozenset(skipped),
+    )
@@ -1,18 +1,24 @@
 import asyncio
+from collections.abc import AsyncIterator
+from datetime import datetime
 import logging
 
 import httpx
-import urllib3
+from obis_parser import OBIS
 
 from custom_components.ppc_smgw.gateways.gateway import Gateway
-from custom_components.ppc_smgw.gateways.reading import FakeInformation, Information
+from custom_components.ppc_smgw.gateways.offload import ParseExecutor
+from custom_components.ppc_smgw.gateways.operations import OperationQueue
+from custom_components.ppc_smgw.gateways.reading import (
+    FakeInformation,
+    Information,
+    Reading,
+)
 from custom_components.ppc_smgw.gateways.theben.conexa.conexa import (
     ThebenConexaClient,
+    build_information,
 )
 
-# Needed as the SMGW uses a self-signed certificate
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-
 
 class ThebenConexa(Gateway):
     def __init__(
@@ -23,8 +29,21 @@ class ThebenConexa(Gateway):
         websession: httpx.AsyncClient,
         logger: logging.Logger,
         debug: bool = False,
+        parse_executor: ParseExecutor | None = None,
+        operations: OperationQueue | None = None,
+        exact_counters: bool = False,
     ) -> None:
-        super().__init__(host, username, password, websession, logger, debug)
+        super().__init__(
+            host,
+            username,
+            password,
+            websession,
+            logger,
+            debug,
+            parse_executor,
+            operations,
+            exact_counters,
+        )
 
         self.client = ThebenConexaClient(
             base_url=host,
@@ -32,9 +51,18 @@ class ThebenConexa(Gateway):
             password=password,
             httpx_client=websession,
             logger=logger,
+            responses=self.responses,
+            parse_cache=self.parse_cache,
+            exact_counters=exact_counters,
         )
 
     async def get_data(self) -> Information:
+        async for _readings in self.stream_readings():
+            pass
+        return self.data
+
+    async def stream_readings(self) -> AsyncIterator[dict[OBIS, Reading]]:
+        """Yield the readings of every usage point as soon as they are parsed."""
         self.logger.info("Getting data")
 
         if self.debug:
@@ -44,7 +72,24 @@ class ThebenConexa(Gateway):
             # We should emulate this here to avoid timing issues
             await asyncio.sleep(15)
             self.data = FakeInformation
-        else:
-            self.data = await self.client.get_data()
+            yield self.data.readings
+            return
 
-        return self.data
+        if (firmware_version := self.cached_firmware_version()) is None:
+            firmware_version = await self.client.get_firmware_version()
+
+        readings: dict[OBIS, Reading] = {}
+        skipped: set[OBIS] = set()
+        async for usage_point_readings in self.client.stream_readings(
+            self.wanted_obis, skipped
+        ):
+            readings.update(usage_point_readings)
+            yield usage_point_readings
+
+        self.data = build_information(firmware_version, readings, skipped)
+        self.metadata_fetched(self.data)
+
+    async def probe(self) -> datetime | None:
+        if self.debug:
+            return None
+        return await self.client.get_capture_time()
@@ -0,0 +1,123 @@
+"""Shared, reference counted HTTP clients keyed by gateway host.
+
+All config entries (and config flows) talking to the same gateway share one
+``httpx.AsyncClient``. Its keep-alive connections are reused across polls and
+entries, so the slow gateway CPUs don't have to do a TLS handshake each time.
+They also share the ``OperationQueue`` serializing all operations on the host.
+A client is closed once the last user releases it, and all clients are closed
+when Home Assistant stops.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from urllib.parse import urlsplit
+
+from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers.httpx_client import SERVER_SOFTWARE, USER_AGENT
+from homeassistant.helpers.singleton import singleton
+from homeassistant.util.hass_dict import HassKey
+from homeassistant.util.ssl import get_default_no_verify_context
+import httpx
+
+from .const import DOMAIN
+from .gateways.operations import OperationQueue
+from .gateways.vendors import Vendor
+
+DATA_HTTP_POOL: HassKey[HttpClientPool] = HassKey(f"{DOMAIN}_http_pool")
+
+# The gateways are small embedded devices. The PPC only accepts a single
+# session at a time, the JSON APIs cope with two parallel requests. Idle
+# connections are kept across a default poll interval of five minutes.
+VENDOR_LIMITS: dict[Vendor, httpx.Limits] = {
+    Vendor.PPC: httpx.Limits(
+        max_connections=1, max_keepalive_connections=1, keepalive_expiry=330
+    ),
+    Vendor.Theben: httpx.Limits(
+        max_connections=2, max_keepalive_connections=2, keepalive_expiry=330
+    ),
+    Vendor.EMH: httpx.Limits(
+        max_connections=2, max_keepalive_connections=2, keepalive_expiry=330
+    ),
+}
+
+
+def pool_key(host: str) -> str:
+    """Return the key clients are shared by: scheme, host and port of the URL.
+
+    Hosts without a scheme use HTTPS, like the gateway clients do.
+    """
+    if not host.startswith(("http://", "https://")):
+        host = f"https://{host}"
+    parts = urlsplit(host)
+    return f"{parts.scheme}://{parts.netloc}".lower()
+
+
+@dataclass(slots=True)
+class _PooledClient:
+    client: httpx.AsyncClient
+    refs: int = 0
+    operations: OperationQueue = field(default_factory=OperationQueue)
+
+
+class HttpClientPool:
+    """Hand out one HTTP client per gateway host and close unused ones."""
+
+    def __init__(self) -> None:
+        self._clients: dict[str, _PooledClient] = {}
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    def acquire(self, host: str, vendor: Vendor) -> httpx.AsyncClient:
+        """Return the client for ``host``, creating it on first use.
+
+        Every call must be paired with ``async_release``. The limits of the
+        vendor that created the client apply to all its users.
+        """
+        key = pool_key(host)
+        if (pooled := self._clients.get(key)) is None:
+            pooled = self._clients[key] = _PooledClient(
+                httpx.AsyncClient(
+                    verify=get_default_no_verify_context(),
+                    headers={USER_AGENT: SERVER_SOFTWARE},
+                    limits=VENDOR_LIMITS[vendor],
+                )
+            )
+        pooled.refs += 1
+        return pooled.client
+
+    def operations(self, host: str) -> OperationQueue:
+        """Return the operation queue of ``host``, which must be acquired."""
+        return self._clients[pool_key(host)].operations
+
+    async def async_release(self, host: str) -> None:
+        """Drop one reference to the client of ``host``, closing it if unused."""
+        key = pool_key(host)
+        if (pooled := self._clients.get(key)) is None:
+            return
+
+        pooled.refs -= 1
+        if pooled.refs <= 0:
+            del self._clients[key]
+            await pooled.client.aclose()
+
+    async def async_close(self) -> None:
+        """Close all clients regardless of their references."""
+        clients, self._clients = self._clients, {}
+        for pooled in clients.values():
+            await pooled.client.aclose()
+
+
+@callback
+@singleton(DATA_HTTP_POOL)
+def async_get_http_pool(hass: HomeAssistant) -> HttpClientPool:
+    """Return the integration-wide HTTP client pool."""
+    pool = HttpClientPool()
+
+    async def _close_pool(_event: Event) -> None:
+        await pool.async_close()
+
+    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_CLOSE, _close_pool)
+    return pool
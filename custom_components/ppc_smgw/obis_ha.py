@@ -27,6 +27,8 @@ from homeassistant.const import (
 from homeassistant.helpers.entity import EntityCategory
 from obis_parser import OBIS
 
+from .const import DiscoveryPolicy
+
 _DEVICE_CLASS_MAP = {
     "current": SensorDeviceClass.CURRENT,
     "energy": SensorDeviceClass.ENERGY,
@@ -72,8 +74,14 @@ class OBISSensorSpec:
     name_fallback: str | None = None
 
 
-def build_obis_sensor_description(key: str) -> OBISSensorSpec:
-    """Build a sensor spec for a canonical OBIS key."""
+def build_obis_sensor_description(
+    key: str, policy: DiscoveryPolicy = DiscoveryPolicy.ALL
+) -> OBISSensorSpec:
+    """Build a sensor spec for a canonical OBIS key.
+
+    ``policy`` decides whether a known code is enabled by default, unknown
+    codes are always disabled.
+    """
     parsed = OBIS.parse(key)
     if parsed is None:
         return OBISSensorSpec(
@@ -107,7 +115,7 @@ def build_obis_sensor_description(key: str) -> OBISSensorSpec:
         description=SensorEntityDescription(
             key=key,
             suggested_display_precision=info.suggested_display_precision,
-            entity_registry_enabled_default=True,
+            entity_registry_enabled_default=enabled_by_policy(parsed, policy),
             native_unit_of_measurement=_UNIT_MAP.get(info.unit, info.unit),
             icon=info.icon,
             device_class=_DEVICE_CLASS_MAP.get(info.device_class),
@@ -116,3 +124,54 @@ def build_obis_sensor_description(key: str) -> OBISSensorSpec:
         translation_key=descriptor.translation_key,
         translation_placeholders=descriptor.placeholders,
     )
+
+
+# Measurement groups folded into one entity in compact mode, by OBIS value
+# group C. Energy counters are never grouped.
+MEASUREMENT_GROUPS: dict[str, range] = {
+    "reactive": range(3, 11),
+    "phase_l1": range(21, 41),
+    "phase_l2": range(41, 61),
+    "phase_l3": range(61, 81),
+}
+
+
+def measurement_group(obis: OBIS) -> str | None:
+    """Return the compact-mode group of an OBIS code, if it belongs to one."""
+    info = obis.info
+    if info is None or info.state_class != "measurement":
+        return None
+
+    for group, value_groups in MEASUREMENT_GROUPS.items():
+        if obis.c in value_groups:
+            return group
+
+    return None
+
+
+def group_attribute_name(obis: OBIS) -> str:
+    """Return the state attribute a grouped OBIS value is exposed as."""
+    descriptor = obis.describe()
+    if descriptor.placeholders:
+        # Channel/tariff variants would collide on the translation key
+        return obis.canonical
+    return descriptor.translation_key
+
+
+def enabled_by_policy(obis: OBIS, policy: DiscoveryPolicy) -> bool:
+    """Return whether a discovery policy enables the sensor of an OBIS code."""
+    if policy is DiscoveryPolicy.ALL:
+        return True
+
+    info = obis.info
+    if info is None:
+        return False
+    if info.device_class == "energy":
+        return True
+
+    # Total active power, not the per-phase values
+    return (
+        policy is DiscoveryPolicy.ENERGY_POWER
+        and info.device_class == "power"
+        and measurement_group(obis) is None
+    )
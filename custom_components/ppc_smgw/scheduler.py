@@ -0,0 +1,128 @@
+"""Integration-wide scheduling of gateway polls.
+
+Every config entry keeps its own coordinator and update interval, but all of
+them poll at a phase of their interval handed out here, so that polls of many
+gateways are spread over the interval instead of bunching up after a restart
+or reload. A shared limit caps how many polls are in flight at once; the time
+a poll waits for it is its queue lag. Parsing is capped separately by the
+``ParseExecutor`` workers.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from datetime import timedelta
+import itertools
+import time
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.singleton import singleton
+from homeassistant.util.hass_dict import HassKey
+
+from .const import (
+    CONF_MAX_CONCURRENT_POLLS,
+    DATA_YAML_CONFIG,
+    DEFAULT_MAX_CONCURRENT_POLLS,
+    DOMAIN,
+)
+
+DATA_POLL_SCHEDULER: HassKey[PollScheduler] = HassKey(f"{DOMAIN}_poll_scheduler")
+
+
+def spread(slot: int) -> float:
+    """Return the fraction of an interval slot ``slot`` polls at.
+
+    This is the van der Corput sequence 0, 1/2, 1/4, 3/4, 1/8, ...: the first
+    n slots are spread about evenly for any n, and a slot never moves when
+    others are taken or freed.
+    """
+    fraction = 0.0
+    denominator = 1
+    while slot:
+        denominator *= 2
+        slot, bit = divmod(slot, 2)
+        fraction += bit / denominator
+    return fraction
+
+
+class PollScheduler:
+    """Hand out poll phases and limit the number of concurrent polls."""
+
+    def __init__(self, loop_time: float, max_concurrent: int) -> None:
+        # Phases are relative to this loop time
+        self._anchor = loop_time
+        self.max_concurrent = max_concurrent
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._slots: dict[str, int] = {}
+        self.waiting = 0
+        self.in_flight = 0
+        self.peak_queue_lag = 0.0
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def delay(self, entry_id: str, loop_time: float, interval: timedelta) -> float:
+        """Return the seconds from ``loop_time`` to the next poll of an entry.
+
+        The first call takes the lowest free slot for the entry. At least a
+        quarter of an interval lies between a poll and the next one, so a
+        refresh requested shortly before the entry's phase doesn't poll twice.
+        """
+        if (slot := self._slots.get(entry_id)) is None:
+            taken = set(self._slots.values())
+            slot = next(slot for slot in itertools.count() if slot not in taken)
+            self._slots[entry_id] = slot
+
+        seconds = interval.total_seconds()
+        phase = self._anchor + spread(slot) * seconds
+        delay = (phase - loop_time) % seconds
+        if delay < seconds / 4:
+            delay += seconds
+        return delay
+
+    def release(self, entry_id: str) -> None:
+        """Free the slot of an unloaded entry."""
+        self._slots.pop(entry_id, None)
+
+    @asynccontextmanager
+    async def poll(self) -> AsyncIterator[float]:
+        """Wait until a poll may run, yielding the queue lag in seconds."""
+        start = time.monotonic()
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+
+        queue_lag = time.monotonic() - start
+        self.peak_queue_lag = max(self.peak_queue_lag, queue_lag)
+        self.in_flight += 1
+        try:
+            yield queue_lag
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    def as_diagnostics(self) -> dict[str, Any]:
+        return {
+            "entries": len(self),
+            "max_concurrent": self.max_concurrent,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "peak_queue_lag": self.peak_queue_lag,
+        }
+
+
+@callback
+@singleton(DATA_POLL_SCHEDULER)
+def async_get_poll_scheduler(hass: HomeAssistant) -> PollScheduler:
+    """Return the integration-wide poll scheduler."""
+    return PollScheduler(
+        hass.loop.time(),
+        hass.data.get(DATA_YAML_CONFIG, {}).get(
+            CONF_MAX_CONCURRENT_POLLS, DEFAULT_MAX_CONCURRENT_POLLS
+        ),
+    )
@@ -1,25 +1,40 @@
 from __future__ import annotations
 
+from dataclasses import replace
 from datetime import datetime
+from decimal import Decimal
 import logging
+import time
+from typing import Any
 
 from homeassistant.components.sensor import SensorEntity, SensorEntityDescription
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers import entity_registry as er
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.util import slugify
 from obis_parser import OBIS
 
 from custom_components.ppc_smgw.gateways.reading import Information
 
 from .const import (
+    CONF_COMPACT_ENTITIES,
+    CONF_DISCOVERY_POLICY,
+    DATA_YAML_CONFIG,
+    DEFAULT_COMPACT_ENTITIES,
+    DEFAULT_DISCOVERY_POLICY,
     SENSOR_TYPES,
+    DiscoveryPolicy,
     FirmwareVersionSensorDescription,
     LastUpdatedSensorDescription,
 )
 from .coordinator import ConfigEntry, SMGwDataUpdateCoordinator
-from .entity import SMGWEntity
-from .obis_ha import OBISSensorSpec, build_obis_sensor_description
+from .deadband import CONF_DEADBAND, Deadband, resolve_deadband
+from .entity import SMGWEntity, entity_id_template
+from .obis_ha import (
+    OBISSensorSpec,
+    build_obis_sensor_description,
+    group_attribute_name,
+    measurement_group,
+)
 
 _LOGGER = logging.getLogger(__name__)
 PARALLEL_UPDATES = 0
@@ -67,10 +82,22 @@ async def async_setup_entry(
         async_add_entities(entities)
         return
 
+    # Group entities of compact mode, None when every code gets its own entity
+    groups: dict[str, OBISGroupSensor] | None = None
+    if entry.data.get(CONF_COMPACT_ENTITIES, DEFAULT_COMPACT_ENTITIES):
+        groups = {}
+    policy = DiscoveryPolicy(
+        entry.data.get(CONF_DISCOVERY_POLICY, DEFAULT_DISCOVERY_POLICY)
+    )
+
     known_obis_codes: set[str] = set()
-    entities = _build_dynamic_obis_sensors(coordinator, known_obis_codes)
+    entities = _build_dynamic_obis_sensors(
+        coordinator, known_obis_codes, groups, policy
+    )
     if known_obis_codes:
         _remove_stale_static_obis_entities(hass, entry, known_obis_codes)
+        if groups:
+            _remove_grouped_obis_entities(hass, entry, groups)
     else:
         _LOGGER.debug("Skipping stale OBIS cleanup because no readings were delivered")
     _LOGGER.debug("Creating %d initial dynamic OBIS sensor(s)", len(entities))
@@ -91,7 +118,14 @@ async def async_setup_entry(
     async_add_entities(entities)
 
     def _add_new_obis_sensors() -> None:
-        if new_entities := _build_dynamic_obis_sensors(coordinator, known_obis_codes):
+        known_count = len(known_obis_codes)
+        new_entities = _build_dynamic_obis_sensors(
+            coordinator, known_obis_codes, groups, policy
+        )
+        if groups and len(known_obis_codes) > known_count:
+            # Codes discovered later may join a group, too
+            _remove_grouped_obis_entities(hass, entry, groups)
+        if new_entities:
             _LOGGER.debug(
                 "Adding %d newly discovered dynamic OBIS sensor(s)", len(new_entities)
             )
@@ -101,14 +135,19 @@ async def async_setup_entry(
 
 
 def _build_dynamic_obis_sensors(
-    coordinator: SMGwDataUpdateCoordinator, known_obis_codes: set[str]
+    coordinator: SMGwDataUpdateCoordinator,
+    known_obis_codes: set[str],
+    groups: dict[str, OBISGroupSensor] | None = None,
+    policy: DiscoveryPolicy = DEFAULT_DISCOVERY_POLICY,
 ) -> list[OBISSensor]:
     data = coordinator.data
     if not isinstance(data, Information):
         return []
 
     entities: list[OBISSensor] = []
-    for obis_obj in data.readings:
+    grouped: dict[str, list[OBIS]] = {}
+    # Skipped codes belong to sensors that are disabled or not added yet
+    for obis_obj in (*data.readings, *data.skipped):
         key = obis_obj.canonical
         if key in known_obis_codes:
             continue
@@ -124,14 +163,33 @@ def _build_dynamic_obis_sensors(
             )
             continue
 
+        if groups is not None and (group := measurement_group(obis_obj)):
+            grouped.setdefault(group, []).append(obis_obj)
+            continue
+
         _LOGGER.debug("Discovered dynamic OBIS sensor for %s", key)
         entities.append(
             OBISSensor(
                 coordinator=coordinator,
-                spec=build_obis_sensor_description(key),
+                spec=build_obis_sensor_description(key, policy),
             )
         )
 
+    for group, members in grouped.items():
+        # Lowest value group first, so e.g. active power becomes the state of
+        # a phase group and voltage and current its attributes
+        members.sort(key=lambda obis_obj: obis_obj.c)
+        if group_sensor := groups.get(group):
+            _LOGGER.debug("Adding %s to group %s", members, group)
+            group_sensor.add_members(members)
+            continue
+
+        _LOGGER.debug("Discovered OBIS group %s with %s", group, members)
+        groups[group] = OBISGroupSensor(
+            coordinator=coordinator, group=group, members=members, policy=policy
+        )
+        entities.append(groups[group])
+
     return entities
 
 
@@ -143,7 +201,7 @@ def _remove_stale_static_obis_entities(
         if description.key in delivered_obis_codes:
             continue
 
-        unique_id = f"sensor.{slugify(f'{entry.entry_id}_{description.key}')}"
+        unique_id = f"sensor.{entity_id_template(entry.entry_id, description.key)}"
         entity_id = registry.async_get_entity_id("sensor", entry.domain, unique_id)
         if entity_id is None:
             continue
@@ -156,7 +214,48 @@ def _remove_stale_static_obis_entities(
         registry.async_remove(entity_id)
 
 
-class OBISSensor(SMGWEntity, SensorEntity):
+def _remove_grouped_obis_entities(
+    hass: HomeAssistant, entry: ConfigEntry, groups: dict[str, OBISGroupSensor]
+) -> None:
+    """Remove single-code entities replaced by a group entity in compact mode."""
+    registry = er.async_get(hass)
+    for group_sensor in groups.values():
+        for obis_obj in group_sensor.members:
+            unique_id = (
+                f"sensor.{entity_id_template(entry.entry_id, obis_obj.canonical)}"
+            )
+            entity_id = registry.async_get_entity_id("sensor", entry.domain, unique_id)
+            if entity_id is None:
+                continue
+
+            _LOGGER.debug(
+                "Removing entity %s now grouped into %s",
+                entity_id,
+                group_sensor.entity_description.key,
+            )
+            registry.async_remove(entity_id)
+
+
+def _value_changed(deadband: Deadband | None, last: Any, new: Any) -> bool:
+    if last == new:
+        return False
+    if deadband is None:
+        return True
+
+    try:
+        return deadband.exceeded(float(last), float(new))
+    except (TypeError, ValueError):
+        return True
+
+
+class SMGWSensor(SMGWEntity, SensorEntity):
+    """Sensor that only writes its state when the value or availability changed."""
+
+    def _state_fingerprint(self) -> tuple[Any, ...]:
+        return (self.available, self.native_value)
+
+
+class OBISSensor(SMGWSensor):
     def __init__(
         self,
         coordinator: SMGwDataUpdateCoordinator,
@@ -166,6 +265,7 @@ class OBISSensor(SMGWEntity, SensorEntity):
         super().__init__(coordinator, spec.description)
         self.entity_description = spec.description
         self._obis_key: OBIS | None = OBIS.parse(spec.description.key)
+        self._deadband: Deadband | None = None
 
         self._attr_unique_id = f"sensor.{self.get_entity_id_template()}"
         self.entity_id = self._attr_unique_id
@@ -190,7 +290,59 @@ class OBISSensor(SMGWEntity, SensorEntity):
             self._attr_name = spec.description.name
 
     @property
-    def native_value(self) -> str | float | None:
+    def obis_codes(self) -> frozenset[str] | None:
+        """Return the canonical OBIS codes this sensor reads, None if unknown."""
+        if self._obis_key is None:
+            return None
+        return frozenset((self._obis_key.canonical,))
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self.coordinator.async_want_obis(self.unique_id, self.obis_codes)
+        )
+        # Resolved here, the entity id is only final once registered
+        self._deadband = resolve_deadband(
+            self.hass.data.get(DATA_YAML_CONFIG, {}).get(CONF_DEADBAND, {}),
+            self.entity_id,
+            self.entity_description.key,
+            self.entity_description.device_class,
+            self.entity_description.state_class,
+        )
+
+    def _value_deadbands(self) -> tuple[Deadband | None, ...]:
+        """Return the deadbands of the fingerprint's values after availability."""
+        return (self._deadband,)
+
+    def _should_write(self, fingerprint: tuple[Any, ...]) -> bool:
+        if not super()._should_write(fingerprint):
+            return False
+        written = self._written_fingerprint
+        if (
+            written is None
+            or len(written) != len(fingerprint)
+            or written[0] != fingerprint[0]
+        ):
+            return True
+
+        deadbands = self._value_deadbands()
+        silences = [
+            deadband.max_silence.total_seconds()
+            for deadband in deadbands
+            if deadband is not None
+        ]
+        if silences and time.monotonic() - self._written_at >= min(silences):
+            return True
+
+        return any(
+            _value_changed(deadband, last, new)
+            for deadband, last, new in zip(
+                deadbands, written[1:], fingerprint[1:], strict=True
+            )
+        )
+
+    @property
+    def native_value(self) -> str | float | Decimal | None:
         """Return the native value of the sensor."""
         data = self.coordinator.data
 
@@ -210,7 +362,111 @@ class OBISSensor(SMGWEntity, SensorEntity):
         return None
 
 
-class LastUpdatedSensor(SMGWEntity, SensorEntity):
+class OBISGroupSensor(OBISSensor):
+    """Compact mode sensor for a measurement group, e.g. everything on phase L1.
+
+    The state is the lowest OBIS code of the group, the other values of the
+    group are exposed as state attributes.
+    """
+
+    def __init__(
+        self,
+        coordinator: SMGwDataUpdateCoordinator,
+        group: str,
+        members: list[OBIS],
+        policy: DiscoveryPolicy = DEFAULT_DISCOVERY_POLICY,
+    ) -> None:
+        """Initialize the sensor class."""
+        spec = build_obis_sensor_description(members[0].canonical, policy)
+        super().__init__(
+            coordinator,
+            OBISSensorSpec(
+                description=replace(spec.description, key=group),
+                translation_key=group,
+            ),
+        )
+        self._obis_key = members[0]
+        self._attributes: dict[OBIS, str] = {}
+        # Resolved once added, like the deadband of the state
+        self._attribute_deadbands: dict[OBIS, Deadband | None] = {}
+        self.add_members(members[1:])
+
+    @property
+    def members(self) -> list[OBIS]:
+        """Return all OBIS codes represented by this sensor."""
+        return [self._obis_key, *self._attributes]
+
+    @property
+    def obis_codes(self) -> frozenset[str]:
+        return frozenset(obis_obj.canonical for obis_obj in self.members)
+
+    def add_members(self, members: list[OBIS]) -> None:
+        """Expose further OBIS codes of the group as attributes."""
+        for obis_obj in members:
+            self._attributes[obis_obj] = group_attribute_name(obis_obj)
+
+        if self.hass is not None:
+            self.coordinator.async_want_obis(self.unique_id, self.obis_codes)
+            self._resolve_attribute_deadbands()
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        self._resolve_attribute_deadbands()
+
+    def _resolve_attribute_deadbands(self) -> None:
+        """Resolve the deadbands of the attributes by OBIS code and device class."""
+        overrides = self.hass.data.get(DATA_YAML_CONFIG, {}).get(CONF_DEADBAND, {})
+        for obis_obj in self._attributes:
+            if obis_obj in self._attribute_deadbands:
+                continue
+
+            key = obis_obj.canonical
+            description = build_obis_sensor_description(key).description
+            self._attribute_deadbands[obis_obj] = resolve_deadband(
+                overrides,
+                None,
+                key,
+                description.device_class,
+                description.state_class,
+            )
+
+    def _state_fingerprint(self) -> tuple[Any, ...]:
+        return (
+            *super()._state_fingerprint(),
+            *self.extra_state_attributes.values(),
+        )
+
+    def _value_deadbands(self) -> tuple[Deadband | None, ...]:
+        return (
+            self._deadband,
+            *(self._attribute_deadbands.get(obis_obj) for obis_obj in self._attributes),
+        )
+
+    @property
+    def native_value(self) -> str | float | None:
+        """Return the value of the group's primary OBIS code."""
+        data = self.coordinator.data
+        if not isinstance(data, Information):
+            return None
+
+        if reading := data.readings.get(self._obis_key):
+            return reading.value
+        return None
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return the other values of the group."""
+        data = self.coordinator.data
+        if not isinstance(data, Information):
+            return {}
+
+        return {
+            name: reading.value if (reading := data.readings.get(obis_obj)) else None
+            for obis_obj, name in self._attributes.items()
+        }
+
+
+class LastUpdatedSensor(SMGWSensor):
     def __init__(
         self,
         coordinator: SMGwDataUpdateCoordinator,
@@ -235,7 +491,7 @@ class LastUpdatedSensor(SMGWEntity, SensorEntity):
         return data.last_update
 
 
-class FirmwareSensor(SMGWEntity, SensorEntity):
+class FirmwareSensor(SMGWSensor):
     """Sensor for the gateway firmware version."""
 
     def __init__(
@@ -0,0 +1,137 @@
+"""Websocket commands reading the gateway snapshots of the coordinators.
+
+``ppc_smgw/snapshot`` returns the latest ``Information`` of all or selected
+entries in one message. ``ppc_smgw/subscribe`` pushes a compact delta per poll
+holding only the OBIS values that changed::
+
+    {"entry_id": "...", "last_update": "...", "changed": {"1-0:1.8.0": 724.9}, "removed": []}
+
+Subscriptions outlive reloads of an entry, the reloaded coordinator starts over
+with a delta of all its values.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components import websocket_api
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+import voluptuous as vol
+
+from .const import DOMAIN, SIGNAL_READINGS_CHANGED
+from .coordinator import ConfigEntry, isoformat
+from .gateways.reading import Information, json_value
+
+CONF_ENTRY_IDS = "entry_ids"
+
+
+@callback
+def async_register_websocket_commands(hass: HomeAssistant) -> None:
+    websocket_api.async_register_command(hass, websocket_snapshot)
+    websocket_api.async_register_command(hass, websocket_subscribe)
+
+
+@callback
+def _loaded_entries(
+    hass: HomeAssistant, entry_ids: list[str] | None
+) -> list[ConfigEntry] | None:
+    """Return the loaded entries, None if one of ``entry_ids`` is not loaded."""
+    entries = {
+        entry.entry_id: entry
+        for entry in hass.config_entries.async_entries(DOMAIN)
+        if entry.state is ConfigEntryState.LOADED
+    }
+    if entry_ids is None:
+        return list(entries.values())
+    if any(entry_id not in entries for entry_id in entry_ids):
+        return None
+    return [entries[entry_id] for entry_id in entry_ids]
+
+
+def _snapshot(entry: ConfigEntry) -> dict[str, Any]:
+    coordinator = entry.runtime_data.coordinator
+    data = coordinator.data
+    if not isinstance(data, Information):
+        information = None
+    else:
+        information = {
+            "name": data.name,
+            "model": data.model,
+            "manufacturer": data.manufacturer,
+            "firmware_version": data.firmware_version,
+            "last_update": isoformat(data.last_update),
+            "readings": {
+                obis.canonical: {
+                    "value": json_value(reading.value),
+                    "timestamp": isoformat(reading.timestamp),
+                }
+                for obis, reading in data.readings.items()
+            },
+        }
+
+    return {
+        "title": entry.title,
+        "last_update_success": coordinator.last_update_success,
+        "data": information,
+    }
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): f"{DOMAIN}/snapshot",
+        vol.Optional(CONF_ENTRY_IDS): [str],
+    }
+)
+@callback
+def websocket_snapshot(
+    hass: HomeAssistant,
+    connection: websocket_api.ActiveConnection,
+    msg: dict[str, Any],
+) -> None:
+    """Return the latest snapshot of the selected entries by entry id."""
+    if (entries := _loaded_entries(hass, msg.get(CONF_ENTRY_IDS))) is None:
+        connection.send_error(
+            msg["id"], websocket_api.ERR_NOT_FOUND, "Config entry not loaded"
+        )
+        return
+
+    connection.send_result(
+        msg["id"], {entry.entry_id: _snapshot(entry) for entry in entries}
+    )
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): f"{DOMAIN}/subscribe",
+        vol.Optional(CONF_ENTRY_IDS): [str],
+    }
+)
+@callback
+def websocket_subscribe(
+    hass: HomeAssistant,
+    connection: websocket_api.ActiveConnection,
+    msg: dict[str, Any],
+) -> None:
+    """Push the readings delta of every poll of the selected entries."""
+    entry_ids = msg.get(CONF_ENTRY_IDS)
+    if entry_ids is not None and _loaded_entries(hass, entry_ids) is None:
+        connection.send_error(
+            msg["id"], websocket_api.ERR_NOT_FOUND, "Config entry not loaded"
+        )
+        return
+
+    selected = None if entry_ids is None else frozenset(entry_ids)
+
+    @callback
+    def _forward(entry_id: str, delta: dict[str, Any]) -> None:
+        if selected is None or entry_id in selected:
+            connection.send_message(
+                websocket_api.event_message(msg["id"], {"entry_id": entry_id, **delta})
+            )
+
+    connection.subscriptions[msg["id"]] = async_dispatcher_connect(
+        hass, SIGNAL_READINGS_CHANGED, _forward
+    )
+    connection.send_result(msg["id"])
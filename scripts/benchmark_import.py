@@ -0,0 +1,92 @@
+"""
+Import-time benchmark for the integration - requires Home Assistant installed.
+
+Compares loading the integration package on its own (what Home Assistant does
+at startup) against loading it together with vendor gateway modules. The
+"eager" scenario imports every vendor, which is what __init__.py did before
+the vendor registry was introduced.
+
+Every scenario runs in a fresh interpreter so module caches don't carry over.
+
+Usage:
+    python scripts/benchmark_import.py [--runs 5]
+"""
+
+import argparse
+import json
+from pathlib import Path
+import statistics
+import subprocess
+import sys
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+HEAVY_MODULES = ("bs4", "py_ppc_smgw", "urllib3", "obis_parser")
+
+VENDOR_MODULES = {
+    "PPC": "custom_components.ppc_smgw.gateways.ppc.ppc_smgw",
+    "Theben": "custom_components.ppc_smgw.gateways.theben.theben",
+    "EMH": "custom_components.ppc_smgw.gateways.emh.emh",
+}
+
+SCENARIOS = {
+    "lazy (integration only)": [],
+    "lazy + EMH": ["EMH"],
+    "lazy + Theben": ["Theben"],
+    "lazy + PPC": ["PPC"],
+    "eager (all vendors)": ["PPC", "Theben", "EMH"],
+}
+
+# Home Assistant itself is imported before measuring, it is always loaded when
+# the integration is.
+_PROBE = """
+import importlib, json, sys, time, tracemalloc
+import homeassistant.core, homeassistant.helpers.update_coordinator
+modules = {modules!r}
+heavy = {heavy!r}
+tracemalloc.start()
+start = time.perf_counter()
+importlib.import_module("custom_components.ppc_smgw")
+for name in modules:
+    importlib.import_module(name)
+elapsed = time.perf_counter() - start
+_, peak = tracemalloc.get_traced_memory()
+print(json.dumps({{
+    "seconds": elapsed,
+    "peak_kib": peak / 1024,
+    "heavy": [m for m in heavy if m in sys.modules],
+}}))
+"""
+
+
+def run_scenario(vendors: list[str]) -> dict:
+    code = _PROBE.format(
+        modules=[VENDOR_MODULES[v] for v in vendors],
+        heavy=list(HEAVY_MODULES),
+    )
+    result = subprocess.run(  # noqa: S603
+        [sys.executable, "-c", code],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'scenario':<26} {'time ms':>9} {'peak KiB':>10}  heavy modules")
+    for name, vendors in SCENARIOS.items():
+        samples = [run_scenario(vendors) for _ in range(args.runs)]
+        seconds = statistics.median(s["seconds"] for s in samples)
+        peak = statistics.median(s["peak_kib"] for s in samples)
+        heavy = ", ".join(samples[-1]["heavy"]) or "-"
+        print(f"{name:<26} {seconds * 1000:>9.1f} {peak:>10.0f}  {heavy}")
+
+
+if __name__ == "__main__":
+    main()
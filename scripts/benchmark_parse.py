@@ -0,0 +1,77 @@
+"""
+Find the payload size below which parsing inline beats an executor hop.
+
+Measures the round trip of ``asyncio.to_thread`` for a no-op and the time
+html.parser needs for PPC-like meter value pages of growing size. The
+crossover is what ``gateways.offload.INLINE_PARSE_THRESHOLD`` is based on.
+
+Usage:
+    python scripts/benchmark_parse.py [--runs 200]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from bs4 import BeautifulSoup
+
+_ROW = (
+    "<tr><td id='table_metervalues_col_timestamp'>2024-12-20 16:00:01</td>"
+    "<td id='table_metervalues_col_wert'>724.9204</td>"
+    "<td id='table_metervalues_col_obis'>01.00.01.08.00.FF</td></tr>"
+)
+
+
+def _page(rows: int) -> bytes:
+    body = "".join(_ROW for _ in range(rows))
+    return f"<html><body><table id='metervalue'>{body}</table></body></html>".encode()
+
+
+def _parse(content: bytes) -> int:
+    soup = BeautifulSoup(content, "html.parser")
+    return len(soup.find_all("tr"))
+
+
+async def _hop_seconds(runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        await asyncio.to_thread(int)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def _parse_seconds(content: bytes, runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        _parse(content)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=200)
+    args = parser.parse_args()
+
+    hop = asyncio.run(_hop_seconds(args.runs))
+    print(f"executor hop: {hop * 1e6:8.1f} us")
+
+    crossover = None
+    for rows in (0, 1, 2, 4, 8, 16, 32, 64, 128):
+        content = _page(rows)
+        parse = _parse_seconds(content, args.runs)
+        marker = ""
+        if crossover is None and parse > hop:
+            crossover = len(content)
+            marker = "  <- parsing now slower than a hop"
+        print(f"{len(content):7d} bytes: {parse * 1e6:8.1f} us{marker}")
+
+    if crossover is not None:
+        print(f"crossover at about {crossover} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Measure how long building the sensor entities of one entry takes.
+
+Builds the dynamic OBIS sensors of entries delivering 50 and more codes, the
+way ``sensor._build_dynamic_obis_sensors`` does on platform setup, and
+compares deriving ids with ``slugify`` to ``entity.entity_id_template``.
+
+Usage:
+    python scripts/benchmark_setup.py [--runs 50]
+"""
+
+import argparse
+from datetime import UTC, datetime
+import statistics
+import time
+from types import SimpleNamespace
+
+from homeassistant.util import slugify
+from obis_parser import OBIS
+
+from custom_components.ppc_smgw.entity import entity_id_template
+from custom_components.ppc_smgw.gateways.reading import Information, Reading
+from custom_components.ppc_smgw.sensor import _build_dynamic_obis_sensors
+
+_ENTRY_ID = "01JBX9Q8Z7ABCDEF0123456789"
+
+
+def _codes(count: int) -> list[OBIS]:
+    """Return ``count`` electricity codes, cycling through tariffs if needed."""
+    codes = []
+    e = 0
+    while len(codes) < count:
+        for c in range(1, 81):
+            for d in (7, 8):
+                codes.append(OBIS(1, 0, c, d, e))
+        e += 1
+    return codes[:count]
+
+
+def _coordinator(count: int) -> SimpleNamespace:
+    now = datetime.now(UTC)
+    data = Information(
+        name="Benchmark",
+        model="Benchmark",
+        manufacturer="Benchmark",
+        firmware_version="1.0.0",
+        last_update=now,
+        readings={
+            obis: Reading(value=1.0, timestamp=now, obis=obis) for obis in _codes(count)
+        },
+    )
+    return SimpleNamespace(
+        data=data,
+        device_info=None,
+        config_entry=SimpleNamespace(domain="ppc_smgw", entry_id=_ENTRY_ID),
+    )
+
+
+def _setup_seconds(count: int, runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        coordinator = _coordinator(count)
+        start = time.perf_counter()
+        _build_dynamic_obis_sensors(coordinator, set())
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def _ids_seconds(derive, keys: list[str], runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        for key in keys:
+            derive(key)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    for count in (50, 100, 200):
+        setup = _setup_seconds(count, args.runs)
+        keys = [obis.canonical for obis in _codes(count)]
+        slug = _ids_seconds(lambda key: slugify(f"{_ENTRY_ID}_{key}"), keys, args.runs)
+        template = _ids_seconds(
+            lambda key: entity_id_template(_ENTRY_ID, key), keys, args.runs
+        )
+        print(
+            f"{count:4d} entities: setup {setup * 1e3:7.2f} ms "
+            f"({setup / count * 1e6:6.1f} us/entity), "
+            f"ids {slug * 1e3:6.2f} ms with slugify, "
+            f"{template * 1e3:6.2f} ms with entity_id_template"
+        )
+
+
+if __name__ == "__main__":
+    main()
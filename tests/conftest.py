@@ -19,7 +19,9 @@ from custom_components.ppc_smgw.const import (
     DOMAIN,
 )
 from custom_components.ppc_smgw.gateways.emh import const as emh_const
+from custom_components.ppc_smgw.gateways.operations import OperationQueue
 from custom_components.ppc_smgw.gateways.ppc import const as ppc_const
+from custom_components.ppc_smgw.gateways.reading import Information
 from custom_components.ppc_smgw.gateways.theben import const as theben_const
 from custom_components.ppc_smgw.gateways.vendors import Vendor
 
@@ -34,7 +36,17 @@ def mock_gateway():
     gateway = MagicMock()
     gateway.check_connection = AsyncMock(return_value=True)
     gateway.get_data = AsyncMock(return_value=None)
+    gateway.probe = AsyncMock(return_value=None)
+
+    async def stream_readings():
+        # Like Gateway.stream_readings, one chunk from get_data
+        gateway.data = await gateway.get_data()
+        if isinstance(gateway.data, Information):
+            yield gateway.data.readings
+
+    gateway.stream_readings = stream_readings
     gateway.reboot = AsyncMock()
+    gateway.operations = OperationQueue()
     return gateway
 
 
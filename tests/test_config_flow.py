@@ -12,13 +12,19 @@ from homeassistant.const import (
 )
 from homeassistant.core import HomeAssistant
 from homeassistant.data_entry_flow import FlowResultType
+from homeassistant.helpers import entity_registry as er
 import pytest
 
 from custom_components.ppc_smgw.config_flow import (
     PPC_SMGLocalConfigFlow,
     PPCSMGWLocalOptionsFlowHandler,
 )
-from custom_components.ppc_smgw.const import CONF_METER_TYPE
+from custom_components.ppc_smgw.const import (
+    CONF_COMPACT_ENTITIES,
+    CONF_DISCOVERY_POLICY,
+    CONF_METER_TYPE,
+    DOMAIN,
+)
 from custom_components.ppc_smgw.gateways.emh.const import CONF_METER_ID
 from custom_components.ppc_smgw.gateways.ppc import const as ppc_const
 from custom_components.ppc_smgw.gateways.vendors import Vendor
@@ -467,3 +473,119 @@ class TestOptionsFlow:
 
         assert ppc_const.CONF_USE_LIBRARY in keys
         assert CONF_DEBUG in keys
+
+    async def test_options_schema_offers_compact_entities(
+        self, hass: HomeAssistant, theben_config_data
+    ):
+        entry = create_mock_config_entry(data=theben_config_data)
+        options_flow = PPCSMGWLocalOptionsFlowHandler(entry)
+        options_flow.hass = hass
+
+        schema = options_flow._build_options_schema()
+        marker = next(
+            k for k in schema.schema if getattr(k, "schema", k) == CONF_COMPACT_ENTITIES
+        )
+
+        assert marker.default() is False
+
+    async def test_disabling_compact_entities_removes_group_entities(
+        self, hass: HomeAssistant, ppc_config_data
+    ):
+        entry = create_mock_config_entry(
+            data={**ppc_config_data, CONF_COMPACT_ENTITIES: True}
+        )
+        hass.config_entries._entries[entry.entry_id] = entry
+        registry = er.async_get(hass)
+        group = registry.async_get_or_create(
+            "sensor", DOMAIN, f"sensor.{entry.entry_id}_phase_l1"
+        )
+        options_flow = PPCSMGWLocalOptionsFlowHandler(entry)
+        options_flow.hass = hass
+
+        result = await options_flow.async_step_user(
+            user_input={
+                k: ppc_config_data[k] for k in ["name", "host", "username", "password"]
+            }
+            | {CONF_SCAN_INTERVAL: 5, CONF_COMPACT_ENTITIES: False}
+        )
+
+        assert result["type"] == FlowResultType.CREATE_ENTRY
+        assert entry.data[CONF_COMPACT_ENTITIES] is False
+        assert registry.async_get(group.entity_id) is None
+
+    async def test_changed_discovery_policy_updates_registered_sensors(
+        self, hass: HomeAssistant, ppc_config_data
+    ):
+        entry = create_mock_config_entry(data=ppc_config_data)
+        hass.config_entries._entries[entry.entry_id] = entry
+        registry = er.async_get(hass)
+
+        def register(code: str, disabled_by=None) -> str:
+            return registry.async_get_or_create(
+                "sensor",
+                DOMAIN,
+                f"sensor.{entry.entry_id}_{code}",
+                config_entry=entry,
+                disabled_by=disabled_by,
+            ).entity_id
+
+        energy = register("1_0_1_8_0", er.RegistryEntryDisabler.INTEGRATION)
+        voltage = register("1_0_32_7_0")
+        user_disabled = register("1_0_2_8_0", er.RegistryEntryDisabler.USER)
+        options_flow = PPCSMGWLocalOptionsFlowHandler(entry)
+        options_flow.hass = hass
+
+        await options_flow.async_step_user(
+            user_input={
+                k: ppc_config_data[k] for k in ["name", "host", "username", "password"]
+            }
+            | {CONF_SCAN_INTERVAL: 5, CONF_DISCOVERY_POLICY: "energy"}
+        )
+
+        assert entry.data[CONF_DISCOVERY_POLICY] == "energy"
+        assert registry.async_get(energy).disabled_by is None
+        assert (
+            registry.async_get(voltage).disabled_by
+            is er.RegistryEntryDisabler.INTEGRATION
+        )
+        assert (
+            registry.async_get(user_disabled).disabled_by
+            is er.RegistryEntryDisabler.USER
+        )
+
+    async def test_changed_discovery_policy_keeps_user_enabled_sensors(
+        self, hass: HomeAssistant, ppc_config_data
+    ):
+        entry = create_mock_config_entry(
+            data=ppc_config_data | {CONF_DISCOVERY_POLICY: "energy_power"}
+        )
+        hass.config_entries._entries[entry.entry_id] = entry
+        registry = er.async_get(hass)
+        # Disabled by the previous policy, enabled by the user
+        voltage = registry.async_get_or_create(
+            "sensor",
+            DOMAIN,
+            f"sensor.{entry.entry_id}_1_0_32_7_0",
+            config_entry=entry,
+        ).entity_id
+        power = registry.async_get_or_create(
+            "sensor",
+            DOMAIN,
+            f"sensor.{entry.entry_id}_1_0_16_7_0",
+            config_entry=entry,
+        ).entity_id
+        options_flow = PPCSMGWLocalOptionsFlowHandler(entry)
+        options_flow.hass = hass
+
+        await options_flow.async_step_user(
+            user_input={
+                k: ppc_config_data[k] for k in ["name", "host", "username", "password"]
+            }
+            | {CONF_SCAN_INTERVAL: 5, CONF_DISCOVERY_POLICY: "energy"}
+        )
+
+        assert registry.async_get(voltage).disabled_by is None
+        assert (
+            registry.async_get(power).disabled_by
+            is er.RegistryEntryDisabler.INTEGRATION
+        )
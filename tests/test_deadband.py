@@ -0,0 +1,102 @@
+"""Tests for deadband resolution and configuration."""
+
+from datetime import timedelta
+
+from homeassistant.components.sensor import SensorDeviceClass, SensorStateClass
+import pytest
+import voluptuous as vol
+
+from custom_components.ppc_smgw.deadband import (
+    DEADBAND_SCHEMA,
+    DEFAULT_DEADBANDS,
+    Deadband,
+    resolve_deadband,
+)
+
+POWER = "1-0:16.7.0"
+
+
+class TestDeadband:
+    @pytest.mark.parametrize(
+        ("deadband", "last", "new", "exceeded"),
+        [
+            (Deadband(absolute=10), 500, 510, False),
+            (Deadband(absolute=10), 500, 489, True),
+            (Deadband(relative=0.01), 500, 504, False),
+            (Deadband(relative=0.01), 500, 506, True),
+            # The larger of both thresholds applies
+            (Deadband(absolute=10, relative=0.01), 2000, 2015, False),
+            (Deadband(), 500, 500.1, True),
+        ],
+    )
+    def test_exceeded(self, deadband, last, new, exceeded):
+        assert deadband.exceeded(last, new) is exceeded
+
+
+class TestResolveDeadband:
+    def test_default_for_device_class(self):
+        deadband = resolve_deadband(
+            {},
+            "sensor.power",
+            POWER,
+            SensorDeviceClass.POWER,
+            SensorStateClass.MEASUREMENT,
+        )
+        assert deadband == DEFAULT_DEADBANDS[SensorDeviceClass.POWER]
+
+    def test_entity_id_wins_over_obis_and_device_class(self):
+        overrides = {
+            "sensor.power": Deadband(absolute=1),
+            POWER: Deadband(absolute=2),
+            "power": Deadband(absolute=3),
+        }
+        resolve = lambda entity_id, obis: resolve_deadband(  # noqa: E731
+            overrides,
+            entity_id,
+            obis,
+            SensorDeviceClass.POWER,
+            SensorStateClass.MEASUREMENT,
+        )
+
+        assert resolve("sensor.power", POWER).absolute == 1
+        assert resolve("sensor.other", POWER).absolute == 2
+        assert resolve("sensor.other", "1-0:36.7.0").absolute == 3
+
+    @pytest.mark.parametrize(
+        "state_class",
+        [SensorStateClass.TOTAL_INCREASING, SensorStateClass.TOTAL, None],
+    )
+    def test_counters_are_never_filtered(self, state_class):
+        overrides = {"sensor.import": Deadband(absolute=1)}
+        assert (
+            resolve_deadband(
+                overrides,
+                "sensor.import",
+                "1-0:1.8.0",
+                SensorDeviceClass.ENERGY,
+                state_class,
+            )
+            is None
+        )
+
+    def test_unknown_device_class_is_not_filtered(self):
+        assert (
+            resolve_deadband(
+                {}, "sensor.x", "1-0:0.0.0", None, SensorStateClass.MEASUREMENT
+            )
+            is None
+        )
+
+
+class TestDeadbandSchema:
+    def test_converts_to_deadband(self):
+        config = DEADBAND_SCHEMA(
+            {"power": {"absolute": 20}, "sensor.v": {"max_silence": "00:30:00"}}
+        )
+
+        assert config["power"] == Deadband(absolute=20)
+        assert config["sensor.v"].max_silence == timedelta(minutes=30)
+
+    def test_rejects_relative_above_one(self):
+        with pytest.raises(vol.Invalid):
+            DEADBAND_SCHEMA({"power": {"relative": 2}})
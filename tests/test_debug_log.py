@@ -0,0 +1,81 @@
+"""Tests for the lazy debug logging helpers."""
+
+import logging
+from unittest.mock import MagicMock, PropertyMock
+
+import httpx
+
+from custom_components.ppc_smgw.gateways.debug_log import (
+    LazyStr,
+    PayloadLogger,
+    truncate,
+)
+
+
+def _response(text: str) -> tuple[MagicMock, PropertyMock]:
+    response = MagicMock(spec=httpx.Response)
+    response.status_code = 200
+    text_prop = PropertyMock(return_value=text)
+    type(response).text = text_prop
+    return response, text_prop
+
+
+class TestLazyStr:
+    def test_does_not_evaluate_until_formatted(self):
+        func = MagicMock(return_value="value")
+        lazy = LazyStr(func, 1, 2)
+
+        func.assert_not_called()
+        assert str(lazy) == "value"
+        func.assert_called_once_with(1, 2)
+
+    def test_not_evaluated_when_debug_disabled(self):
+        logger = logging.getLogger("test.debug_log.lazy")
+        logger.setLevel(logging.INFO)
+        func = MagicMock(return_value="value")
+
+        logger.debug("payload: %s", LazyStr(func))
+
+        func.assert_not_called()
+
+
+class TestPayloadLogger:
+    def test_body_untouched_when_debug_disabled(self):
+        logger = logging.getLogger("test.debug_log.disabled")
+        logger.setLevel(logging.INFO)
+        response, text_prop = _response("<html/>")
+
+        PayloadLogger(logger).log_response(response, "Got %s", "page")
+
+        text_prop.assert_not_called()
+
+    def test_samples_payloads(self, caplog):
+        logger = logging.getLogger("test.debug_log.sampled")
+        logger.setLevel(logging.DEBUG)
+        payload_log = PayloadLogger(logger, sample_every=3)
+        response, text_prop = _response("body")
+
+        with caplog.at_level(logging.DEBUG, logger=logger.name):
+            for _ in range(4):
+                payload_log.log_response(response, "Got page")
+
+        # First and fourth payloads are logged in full
+        assert text_prop.call_count == 2
+        assert sum("Raw response: body" in m for m in caplog.messages) == 2
+        assert sum("not sampled" in m for m in caplog.messages) == 2
+
+    def test_truncates_payloads(self, caplog):
+        logger = logging.getLogger("test.debug_log.truncated")
+        logger.setLevel(logging.DEBUG)
+        response, _ = _response("x" * 100)
+
+        with caplog.at_level(logging.DEBUG, logger=logger.name):
+            PayloadLogger(logger, limit=10).log_response(response, "Got page")
+
+        assert caplog.messages == [
+            "Got page: HTTP 200\nRaw response: xxxxxxxxxx... [90 more characters]"
+        ]
+
+
+def test_truncate_keeps_short_text():
+    assert truncate("short", limit=10) == "short"
@@ -0,0 +1,117 @@
+"""Tests for the raw-response ring buffer and the diagnostics platform."""
+
+from datetime import UTC, datetime, timedelta
+from unittest.mock import MagicMock
+
+from homeassistant.core import HomeAssistant
+import httpx
+from obis_parser import OBIS
+import pytest
+
+from custom_components.ppc_smgw.coordinator import Data
+from custom_components.ppc_smgw.diagnostics import async_get_config_entry_diagnostics
+from custom_components.ppc_smgw.gateways.offload import ParseExecutor
+from custom_components.ppc_smgw.gateways.parse_cache import ParseCache
+from custom_components.ppc_smgw.gateways.reading import Information, Reading
+from custom_components.ppc_smgw.gateways.response_buffer import (
+    ResponseBuffer,
+    redact,
+)
+from tests.conftest import create_mock_config_entry
+
+
+def _response(body: bytes, url: str = "https://192.168.1.200/cgi-bin/x.cgi"):
+    response = httpx.Response(
+        200, content=body, request=httpx.Request("POST", f"{url}?tkn=abc")
+    )
+    response.elapsed = timedelta(milliseconds=12)
+    return response
+
+
+class TestRedact:
+    @pytest.mark.parametrize(
+        ("body", "secret"),
+        [
+            (b"tkn=0123456789&action=meterform", b"0123456789"),
+            (b'<input type="hidden" name="tkn" value="deadbeef">', b"deadbeef"),
+            (b"Set-Cookie: session=cafe; path=/", b"cafe"),
+            (b'{"password": "hunter2"}', b"hunter2"),
+        ],
+    )
+    def test_secrets_are_removed(self, body, secret):
+        redacted = redact(body)
+        assert secret not in redacted
+        assert b"**REDACTED**" in redacted
+
+
+class TestResponseBuffer:
+    def test_keeps_last_n_responses(self):
+        buffer = ResponseBuffer(max_responses=2)
+        for i in range(3):
+            buffer.record(_response(f"body {i}".encode()), f"r{i}")
+
+        records = buffer.as_diagnostics()
+        assert [r["label"] for r in records] == ["r1", "r2"]
+        assert records[-1]["body"] == "body 2"
+        assert records[-1]["elapsed_ms"] == 12.0
+        # The query string (and its session token) is not kept
+        assert records[-1]["path"] == "/cgi-bin/x.cgi"
+
+    def test_byte_cap_drops_oldest(self):
+        buffer = ResponseBuffer(max_responses=10, max_bytes=1)
+        buffer.record(_response(b"first"), "first")
+        buffer.record(_response(b"second"), "second")
+
+        assert [r["label"] for r in buffer.as_diagnostics()] == ["second"]
+
+    def test_compressed_bytes_follow_evictions(self):
+        buffer = ResponseBuffer(max_responses=1)
+        buffer.record(_response(b"a" * 1000), "a")
+        buffer.record(_response(b"b"), "b")
+
+        assert len(buffer) == 1
+        assert buffer.compressed_bytes == len(buffer._records[0].body)
+
+
+@pytest.mark.asyncio
+async def test_config_entry_diagnostics(hass: HomeAssistant, ppc_config_data):
+    entry = create_mock_config_entry(data=ppc_config_data)
+    client = MagicMock()
+    client.responses = ResponseBuffer()
+    client.responses.record(_response(b"<html>tkn=secret</html>"), "meterform")
+    client.parse_executor = ParseExecutor(max_workers=1)
+    client.parse_cache = ParseCache()
+    coordinator = MagicMock()
+    coordinator.last_exception = None
+    coordinator.stale_readings.return_value = {OBIS(1, 0, 2, 8, 0): 300.04}
+    coordinator.data = Information(
+        name="N",
+        model="M",
+        manufacturer="Mfr",
+        firmware_version="1-2",
+        last_update=datetime(2024, 1, 1, tzinfo=UTC),
+        readings={
+            OBIS(1, 0, 1, 8, 0): Reading(
+                value=1.5,
+                timestamp=datetime(2024, 1, 1, tzinfo=UTC),
+                obis=OBIS(1, 0, 1, 8, 0),
+            )
+        },
+        skipped=frozenset({OBIS(1, 0, 32, 7, 0)}),
+    )
+    entry.runtime_data = Data(
+        client=client, coordinator=coordinator, integration=MagicMock()
+    )
+
+    result = await async_get_config_entry_diagnostics(hass, entry)
+
+    assert result["entry"]["data"]["password"] == "**REDACTED**"
+    assert result["entry"]["data"]["username"] == "**REDACTED**"
+    assert result["data"]["readings"][OBIS(1, 0, 1, 8, 0).canonical]["value"] == 1.5
+    assert result["data"]["skipped"] == [OBIS(1, 0, 32, 7, 0).canonical]
+    assert result["stale_readings"] == {OBIS(1, 0, 2, 8, 0).canonical: 300.0}
+    assert result["responses"][0]["label"] == "meterform"
+    assert "secret" not in result["responses"][0]["body"]
+    assert result["parse_executor"]["max_workers"] == 1
+    assert result["parse_cache"] == {"entries": 0, "hits": 0, "misses": 0}
+    assert result["poll_scheduler"]["max_concurrent"] == 4
@@ -1,13 +1,19 @@
 """Tests for the EMH CASA client."""
 
+from datetime import datetime, timedelta
+from decimal import Decimal
+import json
 import logging
 from unittest.mock import AsyncMock, MagicMock
 
+from homeassistant.components.sensor import SensorEntityDescription
 import httpx
 from obis_parser import OBIS
 import pytest
 
+from custom_components.ppc_smgw.gateways.emh.emh import EMHGateway
 from custom_components.ppc_smgw.gateways.emh.emhcasa.emh_client import EMHCasaClient
+from custom_components.ppc_smgw.sensor import OBISSensor, OBISSensorSpec
 
 # ---------------------------------------------------------------------------
 # Anonymised fixture data matching real device response shapes
@@ -65,14 +71,17 @@ def _make_response(json_data, status_code=200):
     response = MagicMock(spec=httpx.Response)
     response.status_code = status_code
     response.text = str(json_data)
+    response.content = json.dumps(json_data).encode()
+    response.request = httpx.Request("GET", "https://192.168.0.1/json/metering/origin/")
+    response.elapsed = timedelta(milliseconds=5)
     response.json.return_value = json_data
     return response
 
 
 def _make_client(base_url="https://192.168.0.1", username="user", password="pass"):
     httpx_client = MagicMock(spec=httpx.AsyncClient)
-    httpx_client.headers = {}
-    httpx_client.follow_redirects = True
+    httpx_client.headers = httpx.Headers()
+    httpx_client.follow_redirects = False
     logger = logging.getLogger("test")
     return EMHCasaClient(
         base_url=base_url,
@@ -125,6 +134,18 @@ class TestDiscoverAllMeterIds:
         meter_ids = await c.discover_all_meter_ids()
         assert meter_ids == [_METER_ID, "1test000000002"]
 
+    async def test_shared_client_is_not_mutated(self):
+        c = _make_client()
+        c.httpx_client.get = AsyncMock(return_value=_make_response([_METER_ID]))
+
+        await c.discover_all_meter_ids()
+
+        assert "content-type" not in c.httpx_client.headers
+        assert c.httpx_client.follow_redirects is False
+        kwargs = c.httpx_client.get.call_args.kwargs
+        assert kwargs["headers"] == {"Content-Type": "application/json"}
+        assert kwargs["follow_redirects"] is True
+
     async def test_returns_empty_on_connection_error(self):
         c = _make_client()
         c.httpx_client.get = AsyncMock(side_effect=Exception("connection refused"))
@@ -166,6 +187,29 @@ class TestGetReadings:
         readings = await c._get_readings()
         assert readings[OBIS(1, 0, 1, 8, 0, 255)].value == pytest.approx(1234.5678)
 
+    async def test_values_scaled_without_float_error(self):
+        c = _make_client()
+        c.meter_id = _METER_ID
+        origin = {
+            **_ORIGIN_EXTENDED,
+            "values": [{**_ORIGIN_EXTENDED["values"][0], "value": "30557"}],
+        }
+        c.httpx_client.get = AsyncMock(return_value=_make_response(origin))
+        readings = await c._get_readings()
+        # 30557 * 0.1 / 1000 in floats is 3.0557000000000003
+        assert readings[OBIS(1, 0, 1, 8, 0, 255)].value == 3.0557
+
+    async def test_exact_counters_are_decimals(self):
+        c = _make_client()
+        c.meter_id = _METER_ID
+        c.exact_counters = True
+        c.httpx_client.get = AsyncMock(return_value=_make_response(_ORIGIN_EXTENDED))
+        readings = await c._get_readings()
+        assert readings[OBIS(1, 0, 1, 8, 0, 255)].value == Decimal("1234.5678")
+        assert readings[OBIS(1, 0, 2, 8, 0, 255)].value == Decimal("987.6543")
+        # Only the energy counters
+        assert isinstance(readings[OBIS(1, 0, 16, 7, 0, 255)].value, float)
+
     async def test_skips_invalid_logical_name(self):
         c = _make_client()
         c.meter_id = _METER_ID
@@ -175,6 +219,47 @@ class TestGetReadings:
         assert all(isinstance(k, OBIS) for k in readings)
         assert len(readings) == 3
 
+    async def test_unwanted_values_are_only_reported(self):
+        c = _make_client()
+        c.meter_id = _METER_ID
+        c.httpx_client.get = AsyncMock(return_value=_make_response(_ORIGIN_EXTENDED))
+        skipped: set[OBIS] = set()
+
+        readings = await c._get_readings(frozenset({"1-0:1.8.0"}), skipped)
+
+        assert list(readings) == [OBIS(1, 0, 1, 8, 0, 255)]
+        assert skipped == {OBIS(1, 0, 2, 8, 0, 255), OBIS(1, 0, 16, 7, 0, 255)}
+
+    async def test_readings_use_capture_time(self):
+        c = _make_client()
+        c.httpx_client.get = AsyncMock(
+            side_effect=[
+                _make_response([_METER_ID]),
+                _make_response(_ORIGIN_EXTENDED),
+            ]
+        )
+
+        info = await c.get_data()
+
+        captured = datetime.fromisoformat("2026-01-01T00:00:00+01:00")
+        assert info.last_update == captured
+        assert {reading.timestamp for reading in info.readings.values()} == {captured}
+
+    async def test_unchanged_response_is_parsed_once(self):
+        c = _make_client()
+        c.meter_id = _METER_ID
+        c.httpx_client.get = AsyncMock(return_value=_make_response(_ORIGIN_EXTENDED))
+
+        first = await c._get_readings()
+        second = await c._get_readings()
+
+        assert second is first
+        assert c.parse_cache.as_diagnostics() == {
+            "entries": 1,
+            "hits": 1,
+            "misses": 1,
+        }
+
     async def test_returns_empty_on_http_error(self):
         c = _make_client()
         c.meter_id = _METER_ID
@@ -193,3 +278,91 @@ class TestGetReadings:
         info = await c.get_data()
         assert info.name == "EMH SMGW"
         assert len(info.readings) == 3
+        assert info.skipped == frozenset()
+
+
+class TestGetCaptureTime:
+    async def test_reads_plain_meter_endpoint(self):
+        c = _make_client()
+        c.meter_id = _METER_ID
+        c.httpx_client.get = AsyncMock(return_value=_make_response(_ORIGIN_EXTENDED))
+
+        captured = await c.get_capture_time()
+
+        assert captured == datetime.fromisoformat("2026-01-01T00:00:00+01:00")
+        assert c.httpx_client.get.call_args.args == (
+            f"https://192.168.0.1/json/metering/origin/{_METER_ID}",
+        )
+
+    async def test_unknown_without_meter_id(self):
+        c = _make_client()
+        c.httpx_client.get = AsyncMock()
+
+        assert await c.get_capture_time() is None
+        c.httpx_client.get.assert_not_awaited()
+
+    async def test_returns_none_on_error(self):
+        c = _make_client()
+        c.meter_id = _METER_ID
+        c.httpx_client.get = AsyncMock(side_effect=Exception("timeout"))
+
+        assert await c.get_capture_time() is None
+
+
+# ---------------------------------------------------------------------------
+# Connection pre-warming
+# ---------------------------------------------------------------------------
+
+
+def _make_gateway(debug=False):
+    websession = MagicMock(spec=httpx.AsyncClient)
+    websession.head = AsyncMock()
+    return EMHGateway(
+        host="192.168.0.1",
+        username="user",
+        password="pass",
+        websession=websession,
+        logger=logging.getLogger("test"),
+        debug=debug,
+    )
+
+
+class TestPrewarm:
+    async def test_requests_normalised_base_url(self):
+        gateway = _make_gateway()
+        await gateway.prewarm()
+        gateway.websession.head.assert_awaited_once()
+        assert gateway.websession.head.call_args.args == ("https://192.168.0.1",)
+
+    async def test_errors_are_swallowed(self):
+        gateway = _make_gateway()
+        gateway.websession.head.side_effect = httpx.ConnectError("unreachable")
+        await gateway.prewarm()
+
+    async def test_skipped_with_fake_data(self):
+        gateway = _make_gateway(debug=True)
+        await gateway.prewarm()
+        gateway.websession.head.assert_not_awaited()
+
+
+class TestWantedCodes:
+    async def test_sensor_of_canonical_code_gets_value(self):
+        """Sensors want codes without F group, the gateway sends F=255."""
+        sensor = OBISSensor(
+            coordinator=MagicMock(),
+            spec=OBISSensorSpec(description=SensorEntityDescription(key="1-0:1.8.0")),
+        )
+        gateway = _make_gateway()
+        gateway.client = _make_client()
+        gateway.client.httpx_client.get = AsyncMock(
+            side_effect=[
+                _make_response([_METER_ID]),
+                _make_response(_ORIGIN_EXTENDED),
+            ]
+        )
+        gateway.wanted_obis = sensor.obis_codes
+
+        sensor.coordinator.data = await gateway.get_data()
+
+        assert OBIS(1, 0, 2, 8, 0, 255) in gateway.data.skipped
+        assert sensor.native_value == pytest.approx(1234.5678)
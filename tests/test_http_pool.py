@@ -0,0 +1,159 @@
+"""Tests for the host-keyed HTTP client pool."""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import ConfigEntryNotReady
+import pytest
+
+from custom_components.ppc_smgw import async_setup_entry, async_unload_entry
+from custom_components.ppc_smgw.gateways.vendors import Vendor
+from custom_components.ppc_smgw.http_pool import (
+    HttpClientPool,
+    async_get_http_pool,
+    pool_key,
+)
+from tests.conftest import create_mock_config_entry
+
+HOST = "https://192.168.1.200/cgi-bin/hanservice.cgi"
+
+
+class TestPoolKey:
+    def test_path_is_ignored(self):
+        assert pool_key(HOST) == pool_key("https://192.168.1.200/other")
+
+    def test_port_and_scheme_are_kept(self):
+        assert pool_key("https://192.168.1.200:8443/") != pool_key(HOST)
+        assert pool_key("http://192.168.1.200/") != pool_key(HOST)
+
+    def test_key_of_bare_hosts(self):
+        assert pool_key("192.168.1.10") != pool_key("10.0.0.2")
+        assert pool_key("192.168.1.200") == pool_key(HOST)
+
+
+@pytest.mark.asyncio
+class TestHttpClientPool:
+    async def test_same_host_shares_client(self):
+        pool = HttpClientPool()
+
+        first = pool.acquire(HOST, Vendor.PPC)
+        second = pool.acquire("https://192.168.1.200/", Vendor.PPC)
+        other = pool.acquire("https://192.168.1.201/", Vendor.PPC)
+
+        assert first is second
+        assert other is not first
+        assert len(pool) == 2
+        await pool.async_close()
+
+    async def test_same_host_shares_operation_queue(self):
+        pool = HttpClientPool()
+        pool.acquire(HOST, Vendor.PPC)
+        pool.acquire("https://192.168.1.201/", Vendor.PPC)
+
+        assert pool.operations(HOST) is pool.operations("https://192.168.1.200/")
+        assert pool.operations(HOST) is not pool.operations("https://192.168.1.201/")
+        await pool.async_close()
+
+    async def test_client_closed_with_last_reference(self):
+        pool = HttpClientPool()
+        client = pool.acquire(HOST, Vendor.Theben)
+        pool.acquire(HOST, Vendor.Theben)
+
+        await pool.async_release(HOST)
+        assert not client.is_closed
+
+        await pool.async_release(HOST)
+        assert client.is_closed
+        assert len(pool) == 0
+
+    async def test_release_of_unknown_host_is_ignored(self):
+        await HttpClientPool().async_release(HOST)
+
+    async def test_pool_closed_with_home_assistant(self, hass: HomeAssistant):
+        pool = async_get_http_pool(hass)
+        client = pool.acquire(HOST, Vendor.EMH)
+
+        assert async_get_http_pool(hass) is pool
+
+        hass.bus.async_fire(EVENT_HOMEASSISTANT_CLOSE)
+        await hass.async_block_till_done()
+
+        assert client.is_closed
+
+
+@pytest.mark.asyncio
+class TestEntryLifecycle:
+    async def test_unload_releases_client(
+        self, hass: HomeAssistant, ppc_config_data, mock_gateway
+    ):
+        entry = create_mock_config_entry(data=ppc_config_data)
+        gateway_cls = MagicMock(return_value=mock_gateway)
+        mock_coordinator = MagicMock()
+        mock_coordinator.async_config_entry_first_refresh = AsyncMock()
+
+        with (
+            patch(
+                "custom_components.ppc_smgw.async_get_gateway_class",
+                AsyncMock(return_value=gateway_cls),
+            ),
+            patch("custom_components.ppc_smgw.async_get_loaded_integration"),
+            patch.object(hass.config_entries, "async_forward_entry_setups"),
+            patch(
+                "custom_components.ppc_smgw.SMGwDataUpdateCoordinator",
+                return_value=mock_coordinator,
+            ),
+        ):
+            await async_setup_entry(hass, entry)
+
+        client = gateway_cls.call_args.kwargs["websession"]
+        assert len(async_get_http_pool(hass)) == 1
+
+        with patch.object(
+            hass.config_entries, "async_unload_platforms", return_value=True
+        ):
+            assert await async_unload_entry(hass, entry)
+
+        assert client.is_closed
+        assert len(async_get_http_pool(hass)) == 0
+
+    async def test_failed_setup_releases_client(
+        self, hass: HomeAssistant, ppc_config_data, mock_gateway
+    ):
+        entry = create_mock_config_entry(data=ppc_config_data)
+        mock_coordinator = MagicMock()
+        mock_coordinator.async_config_entry_first_refresh = AsyncMock(
+            side_effect=Exception("Connection timeout")
+        )
+
+        with (
+            patch(
+                "custom_components.ppc_smgw.async_get_gateway_class",
+                AsyncMock(return_value=MagicMock(return_value=mock_gateway)),
+            ),
+            patch("custom_components.ppc_smgw.async_get_loaded_integration"),
+            patch(
+                "custom_components.ppc_smgw.SMGwDataUpdateCoordinator",
+                return_value=mock_coordinator,
+            ),
+            pytest.raises(ConfigEntryNotReady),
+        ):
+            await async_setup_entry(hass, entry)
+
+        assert len(async_get_http_pool(hass)) == 0
+
+    async def test_failed_client_creation_releases_client(
+        self, hass: HomeAssistant, ppc_config_data
+    ):
+        entry = create_mock_config_entry(data=ppc_config_data)
+
+        with (
+            patch(
+                "custom_components.ppc_smgw.async_get_gateway_class",
+                AsyncMock(return_value=MagicMock(side_effect=ValueError("bad host"))),
+            ),
+            pytest.raises(ValueError, match="bad host"),
+        ):
+            await async_setup_entry(hass, entry)
+
+        assert len(async_get_http_pool(hass)) == 0
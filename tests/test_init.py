@@ -1,33 +1,57 @@
 """Tests for PPC SMGW integration initialization - simplified version."""
 
+from dataclasses import replace
 from datetime import UTC, datetime, timedelta
+import logging
 from unittest.mock import AsyncMock, MagicMock, patch
 
 from homeassistant.const import (
+    CONF_DEBUG,
     CONF_HOST,
     CONF_PASSWORD,
     CONF_SCAN_INTERVAL,
     CONF_USERNAME,
+    EVENT_HOMEASSISTANT_STOP,
 )
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.util import dt as dt_util
+from obis_parser import OBIS
 import pytest
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+)
 
 from custom_components.ppc_smgw import (
+    LIVE_OPTIONS,
+    async_get_gateway_class,
     async_migrate_entry,
+    async_setup,
     async_setup_entry,
     async_unload_entry,
+    async_update_options,
 )
 from custom_components.ppc_smgw.const import (
+    CONF_EXACT_COUNTERS,
     CONF_METER_TYPE,
+    CONF_PARSE_WORKERS,
+    CONF_PREWARM_SECONDS,
+    DATA_PARSE_EXECUTOR,
+    DATA_YAML_CONFIG,
     DOMAIN,
+    SIGNAL_READINGS_CHANGED,
 )
 from custom_components.ppc_smgw.coordinator import (
     Data,
     SMGwDataUpdateCoordinator,
 )
+from custom_components.ppc_smgw.gateways.emh.emh import EMHGateway
 from custom_components.ppc_smgw.gateways.ppc import const as ppc_const
 from custom_components.ppc_smgw.gateways.reading import Information, Reading
+from custom_components.ppc_smgw.gateways.registry import load_gateway_class
 from custom_components.ppc_smgw.gateways.vendors import Vendor
 from tests.conftest import create_mock_config_entry
 
@@ -49,10 +73,10 @@ class TestInit:
         mock_coordinator.async_config_entry_first_refresh = AsyncMock()
 
         with (
-            patch("custom_components.ppc_smgw.PPC_SMGW", return_value=mock_gateway),
-            patch("custom_components.ppc_smgw.ThebenConexa", return_value=mock_gateway),
-            patch("custom_components.ppc_smgw.EMHGateway", return_value=mock_gateway),
-            patch("custom_components.ppc_smgw.create_async_httpx_client"),
+            patch(
+                "custom_components.ppc_smgw.async_get_gateway_class",
+                AsyncMock(return_value=MagicMock(return_value=mock_gateway)),
+            ),
             patch(
                 "custom_components.ppc_smgw.async_get_loaded_integration",
                 return_value=mock_integration,
@@ -94,8 +118,10 @@ class TestInit:
         )
 
         with (
-            patch("custom_components.ppc_smgw.PPC_SMGW", return_value=mock_gateway),
-            patch("custom_components.ppc_smgw.create_async_httpx_client"),
+            patch(
+                "custom_components.ppc_smgw.async_get_gateway_class",
+                AsyncMock(return_value=MagicMock(return_value=mock_gateway)),
+            ),
             patch(
                 "custom_components.ppc_smgw.async_get_loaded_integration",
                 return_value=mock_integration,
@@ -126,8 +152,10 @@ class TestInit:
         ppc_cls = MagicMock(return_value=mock_gateway)
 
         with (
-            patch("custom_components.ppc_smgw.PPC_SMGW", ppc_cls),
-            patch("custom_components.ppc_smgw.create_async_httpx_client"),
+            patch(
+                "custom_components.ppc_smgw.async_get_gateway_class",
+                AsyncMock(return_value=ppc_cls),
+            ),
             patch(
                 "custom_components.ppc_smgw.async_get_loaded_integration",
                 return_value=mock_integration,
@@ -155,8 +183,10 @@ class TestInit:
         ppc_cls = MagicMock(return_value=mock_gateway)
 
         with (
-            patch("custom_components.ppc_smgw.PPC_SMGW", ppc_cls),
-            patch("custom_components.ppc_smgw.create_async_httpx_client"),
+            patch(
+                "custom_components.ppc_smgw.async_get_gateway_class",
+                AsyncMock(return_value=ppc_cls),
+            ),
             patch(
                 "custom_components.ppc_smgw.async_get_loaded_integration",
                 return_value=mock_integration,
@@ -185,8 +215,10 @@ class TestInit:
         ppc_cls = MagicMock(return_value=mock_gateway)
 
         with (
-            patch("custom_components.ppc_smgw.PPC_SMGW", ppc_cls),
-            patch("custom_components.ppc_smgw.create_async_httpx_client"),
+            patch(
+                "custom_components.ppc_smgw.async_get_gateway_class",
+                AsyncMock(return_value=ppc_cls),
+            ),
             patch(
                 "custom_components.ppc_smgw.async_get_loaded_integration",
                 return_value=mock_integration,
@@ -223,8 +255,10 @@ class TestInit:
         coordinator_cls = MagicMock(return_value=mock_coordinator)
 
         with (
-            patch("custom_components.ppc_smgw.PPC_SMGW", return_value=mock_gateway),
-            patch("custom_components.ppc_smgw.create_async_httpx_client"),
+            patch(
+                "custom_components.ppc_smgw.async_get_gateway_class",
+                AsyncMock(return_value=MagicMock(return_value=mock_gateway)),
+            ),
             patch(
                 "custom_components.ppc_smgw.async_get_loaded_integration",
                 return_value=mock_integration,
@@ -268,8 +302,10 @@ class TestInit:
         coordinator_cls = MagicMock(return_value=mock_coordinator)
 
         with (
-            patch("custom_components.ppc_smgw.PPC_SMGW", return_value=mock_gateway),
-            patch("custom_components.ppc_smgw.create_async_httpx_client"),
+            patch(
+                "custom_components.ppc_smgw.async_get_gateway_class",
+                AsyncMock(return_value=MagicMock(return_value=mock_gateway)),
+            ),
             patch(
                 "custom_components.ppc_smgw.async_get_loaded_integration",
                 return_value=mock_integration,
@@ -288,10 +324,729 @@ class TestInit:
         )
 
 
+@pytest.mark.asyncio
+class TestUpdateOptions:
+    """Test applying changed options to a loaded entry."""
+
+    @staticmethod
+    def _loaded_entry(hass: HomeAssistant, data: dict, mock_gateway):
+        entry = create_mock_config_entry(data=data)
+        entry.add_to_hass(hass)
+        entry.runtime_data = Data(
+            client=mock_gateway, coordinator=MagicMock(), integration=MagicMock()
+        )
+        reload_data = {k: v for k, v in data.items() if k not in LIVE_OPTIONS}
+        return entry, reload_data
+
+    async def test_live_options_applied_without_reload(
+        self, hass: HomeAssistant, ppc_config_data, mock_gateway
+    ):
+        """Scan interval and debug mode change on the running entry."""
+        entry, reload_data = self._loaded_entry(hass, ppc_config_data, mock_gateway)
+        hass.config_entries.async_update_entry(
+            entry,
+            data={**ppc_config_data, CONF_SCAN_INTERVAL: 15, CONF_DEBUG: True},
+        )
+
+        with patch.object(hass.config_entries, "async_reload") as reload:
+            await async_update_options(reload_data, hass, entry)
+
+        reload.assert_not_called()
+        assert mock_gateway.debug is True
+        entry.runtime_data.coordinator.async_set_update_interval.assert_called_once_with(
+            timedelta(minutes=15)
+        )
+
+    async def test_host_change_reloads_entry(
+        self, hass: HomeAssistant, ppc_config_data, mock_gateway
+    ):
+        """A new host needs a new client, so the entry is reloaded."""
+        entry, reload_data = self._loaded_entry(hass, ppc_config_data, mock_gateway)
+        hass.config_entries.async_update_entry(
+            entry,
+            data={**ppc_config_data, CONF_HOST: "https://192.168.1.201"},
+        )
+
+        with patch.object(hass.config_entries, "async_reload") as reload:
+            await async_update_options(reload_data, hass, entry)
+
+        reload.assert_called_once_with(entry.entry_id)
+        entry.runtime_data.coordinator.async_set_update_interval.assert_not_called()
+
+
+@pytest.mark.asyncio
+class TestGatewayRegistry:
+    """Test the lazy vendor registry."""
+
+    @pytest.mark.parametrize(
+        ("vendor", "class_name"),
+        [
+            (Vendor.PPC, "PPC_SMGW"),
+            (Vendor.Theben, "ThebenConexa"),
+            (Vendor.EMH, "EMHGateway"),
+        ],
+    )
+    async def test_load_gateway_class_resolves_vendor(self, vendor, class_name):
+        """Every vendor maps to its gateway implementation."""
+        assert load_gateway_class(vendor).__name__ == class_name
+
+    async def test_unloaded_vendor_is_imported_in_executor(self, hass: HomeAssistant):
+        """A vendor module that is not imported yet must not load on the event loop."""
+        gateway_cls = MagicMock()
+
+        with (
+            patch(
+                "custom_components.ppc_smgw.is_gateway_loaded",
+                return_value=False,
+            ),
+            patch.object(
+                hass,
+                "async_add_import_executor_job",
+                AsyncMock(return_value=gateway_cls),
+            ) as import_job,
+        ):
+            result = await async_get_gateway_class(hass, Vendor.EMH)
+
+        assert result is gateway_cls
+        import_job.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+class TestParseExecutorSetup:
+    """Test the integration-wide parse executor."""
+
+    async def test_setup_creates_configured_executor(self, hass: HomeAssistant):
+        assert await async_setup(hass, {DOMAIN: {CONF_PARSE_WORKERS: 3}})
+
+        executor = hass.data[DATA_PARSE_EXECUTOR]
+        assert executor.max_workers == 3
+
+        with patch.object(executor, "shutdown") as shutdown:
+            hass.bus.async_fire(EVENT_HOMEASSISTANT_STOP)
+            await hass.async_block_till_done()
+
+        shutdown.assert_called_once()
+
+    async def test_entries_share_the_executor(
+        self, hass: HomeAssistant, ppc_config_data, mock_gateway
+    ):
+        assert await async_setup(hass, {})
+        entry = create_mock_config_entry(data=ppc_config_data)
+        gateway_cls = MagicMock(return_value=mock_gateway)
+        mock_coordinator = MagicMock()
+        mock_coordinator.async_config_entry_first_refresh = AsyncMock()
+
+        with (
+            patch(
+                "custom_components.ppc_smgw.async_get_gateway_class",
+                AsyncMock(return_value=gateway_cls),
+            ),
+            patch("custom_components.ppc_smgw.async_get_loaded_integration"),
+            patch.object(hass.config_entries, "async_forward_entry_setups"),
+            patch(
+                "custom_components.ppc_smgw.SMGwDataUpdateCoordinator",
+                return_value=mock_coordinator,
+            ),
+        ):
+            await async_setup_entry(hass, entry)
+
+        assert (
+            gateway_cls.call_args.kwargs["parse_executor"]
+            is hass.data[DATA_PARSE_EXECUTOR]
+        )
+
+    async def test_exact_counters_passed_to_gateway(
+        self, hass: HomeAssistant, ppc_config_data, mock_gateway
+    ):
+        assert await async_setup(hass, {DOMAIN: {CONF_EXACT_COUNTERS: True}})
+        entry = create_mock_config_entry(data=ppc_config_data)
+        gateway_cls = MagicMock(return_value=mock_gateway)
+        mock_coordinator = MagicMock()
+        mock_coordinator.async_config_entry_first_refresh = AsyncMock()
+
+        with (
+            patch(
+                "custom_components.ppc_smgw.async_get_gateway_class",
+                AsyncMock(return_value=gateway_cls),
+            ),
+            patch("custom_components.ppc_smgw.async_get_loaded_integration"),
+            patch.object(hass.config_entries, "async_forward_entry_setups"),
+            patch(
+                "custom_components.ppc_smgw.SMGwDataUpdateCoordinator",
+                return_value=mock_coordinator,
+            ),
+        ):
+            await async_setup_entry(hass, entry)
+
+        assert gateway_cls.call_args.kwargs["exact_counters"] is True
+
+
 @pytest.mark.asyncio
 class TestCoordinator:
     """Test the data update coordinator."""
 
+    async def test_listeners_skipped_for_unchanged_snapshot(
+        self, hass: HomeAssistant, ppc_config_data, mock_gateway
+    ):
+        """An identical snapshot does not notify the entities again."""
+        mock_gateway.get_data.return_value = Information(
+            name="Test Gateway",
+            model="Test Model",
+            manufacturer="Test Manufacturer",
+            firmware_version="1.0.0",
+            last_update=datetime(2024, 1, 1, 12, 0, 0, tzinfo=UTC),
+            readings={},
+        )
+        coordinator = SMGwDataUpdateCoordinator(
+            hass=hass, update_interval=timedelta(minutes=5)
+        )
+        entry = create_mock_config_entry(data=ppc_config_data)
+        entry.runtime_data = Data(
+            client=mock_gateway,
+            coordinator=coordinator,
+            integration=MagicMock(),
+        )
+        coordinator.config_entry = entry
+        listener = MagicMock()
+
+        await coordinator.async_refresh()
+        coordinator.async_add_listener(listener)
+        await coordinator.async_refresh()
+
+        listener.assert_not_called()
+        await coordinator.async_shutdown()
+
+    async def test_connection_prewarmed_before_poll(
+        self, hass: HomeAssistant, ppc_config_data, mock_gateway
+    ):
+        """The gateway connection is opened a few seconds before the next poll."""
+        mock_gateway.prewarm = AsyncMock()
+        coordinator = SMGwDataUpdateCoordinator(
+            hass=hass, update_interval=timedelta(minutes=5)
+        )
+        entry = create_mock_config_entry(data=ppc_config_data)
+        entry.runtime_data = Data(
+            client=mock_gateway,
+            coordinator=coordinator,
+            integration=MagicMock(),
+        )
+        coordinator.config_entry = entry
+        assert coordinator.prewarm_lead == timedelta(seconds=5)
+
+        coordinator._schedule_refresh()
+        async_fire_time_changed(
+            hass, dt_util.utcnow() + timedelta(minutes=5) - timedelta(seconds=4)
+        )
+        await hass.async_block_till_done()
+
+        mock_gateway.prewarm.assert_awaited_once()
+        mock_gateway.get_data.assert_not_awaited()
+        await coordinator.async_shutdown()
+
+    async def test_polls_spread_across_interval(
+        self, hass: HomeAssistant, ppc_config_data, mock_gateway
+    ):
+        """A second entry polls half an interval after the first one."""
+        mock_gateway.prewarm = AsyncMock()
+        other_gateway = MagicMock(prewarm=AsyncMock())
+        coordinators = []
+        for entry_id, gateway in (("first", other_gateway), ("second", mock_gateway)):
+            coordinator = SMGwDataUpdateCoordinator(
+                hass=hass, update_interval=timedelta(minutes=5)
+            )
+            entry = create_mock_config_entry(data=ppc_config_data, entry_id=entry_id)
+            entry.runtime_data = Data(
+                client=gateway, coordinator=coordinator, integration=MagicMock()
+            )
+            coordinator.config_entry = entry
+            coordinator._schedule_refresh()
+            coordinators.append(coordinator)
+
+        async_fire_time_changed(
+            hass, dt_util.utcnow() + timedelta(minutes=2.5) - timedelta(seconds=4)
+        )
+        await hass.async_block_till_done()
+
+        mock_gateway.prewarm.assert_awaited_once()
+        other_gateway.prewarm.assert_not_awaited()
+        for coordinator in coordinators:
+            await coordinator.async_shutdown()
+
+    async def test_metadata_requested_on_its_own_schedule(
+        self, hass: HomeAssistant, ppc_config_data, mock_gateway
+    ):
+        """Device metadata is fetched with the first poll and then on demand."""
+        coordinator = SMGwDataUpdateCoordinator(
+            hass=hass, update_interval=timedelta(minutes=5)
+        )
+        entry = create_mock_config_entry(data=ppc_config_data)
+        entry.runtime_data = Data(
+            client=mock_gateway, coordinator=coordinator, integration=MagicMock()
+        )
+        coordinator.config_entry = entry
+        requested = []
+
+        async def get_data():
+            requested.append(mock_gateway.metadata_requested)
+            return Information(
+                name="Test Gateway",
+                model="Test Model",
+                manufacturer="Test Manufacturer",
+                firmware_version="Unknown",
+                last_update=datetime(2024, 1, 1, 12, 0, tzinfo=UTC),
+                readings={},
+            )
+
+        mock_gateway.get_data.side_effect = get_data
+
+        await coordinator.async_refresh()
+        # Also with a firmware version the gateway doesn't know
+        await coordinator.async_refresh()
+        coordinator.async_request_metadata()
+        await coordinator.async_refresh()
+
+        assert requested == [True, False, True]
+        assert mock_gateway.metadata_requested is False
+
+    async def test_device_registry_updated_only_on_metadata_change(
+        self, hass: HomeAssistant, ppc_config_data, mock_gateway
+    ):
+        """Polls with the same metadata don't touch the device registry."""
+        information = Information(
+            name="Test Gateway",
+            model="Test Model",
+            manufacturer="Test Manufacturer",
+            firmware_version="1.0.0",
+            last_update=datetime(2024, 1, 1, 12, 0, 0, tzinfo=UTC),
+            readings={},
+        )
+        coordinator = SMGwDataUpdateCoordinator(
+            hass=hass, update_interval=timedelta(minutes=5)
+        )
+        entry = create_mock_config_entry(data=ppc_config_data)
+        entry.add_to_hass(hass)
+        entry.runtime_data = Data(
+            client=mock_gateway, coordinator=coordinator, integration=MagicMock()
+        )
+        coordinator.config_entry = entry
+        registry = dr.async_get(hass)
+        device = registry.async_get_or_create(
+            config_entry_id=entry.entry_id,
+            identifiers={(DOMAIN, entry.entry_id)},
+            sw_version="1.0.0",
+        )
+
+        with patch.object(
+            registry, "async_update_device", wraps=registry.async_update_device
+        ) as update_device:
+            for firmware_version in ("1.0.0", "1.0.0", "Unknown", "1.1.0"):
+                mock_gateway.get_data.return_value = replace(
+                    information, firmware_version=firmware_version
+                )
+                await coordinator.async_refresh()
+
+        update_device.assert_called_once()
+        assert registry.async_get(device.id).sw_version == "1.1.0"
+
+    async def test_update_interval_change_reschedules_poll(
+        self, hass: HomeAssistant, ppc_config_data, mock_gateway
+    ):
+        """A new interval takes effect now, not after the next poll."""
+        coordinator = SMGwDataUpdateCoordinator(
+            hass=hass, update_interval=timedelta(minutes=5)
+        )
+        entry = create_mock_config_entry(data=ppc_config_data)
+        entry.runtime_data = Data(
+            client=mock_gateway, coordinator=coordinator, integration=MagicMock()
+        )
+        coordinator.config_entry = entry
+        unsub = coordinator.async_add_listener(lambda: None)
+
+        with patch.object(coordinator, "_schedule_refresh") as schedule_refresh:
+            coordinator.async_set_update_interval(timedelta(minutes=5))
+            schedule_refresh.assert_not_called()
+
+            coordinator.async_set_update_interval(timedelta(minutes=15))
+            schedule_refresh.assert_called_once()
+
+        assert coordinator.update_interval == timedelta(minutes=15)
+        unsub()
+
+    async def test_fetch_skipped_while_probe_shows_no_new_data(
+        self, hass: HomeAssistant, ppc_config_data, mock_gateway
+    ):
+        """Only a new capture time on the gateway triggers a full fetch."""
+        first = datetime(2024, 1, 1, 12, 0, tzinfo=UTC)
+        second = datetime(2024, 1, 1, 12, 15, tzinfo=UTC)
+        information = Information(
+            name="Test Gateway",
+            model="Test Model",
+            manufacturer="Test Manufacturer",
+            firmware_version="1.0.0",
+            last_update=first,
+            readings={},
+        )
+        coordinator = SMGwDataUpdateCoordinator(
+            hass=hass, update_interval=timedelta(minutes=5)
+        )
+        entry = create_mock_config_entry(data=ppc_config_data)
+        entry.runtime_data = Data(
+            client=mock_gateway, coordinator=coordinator, integration=MagicMock()
+        )
+        coordinator.config_entry = entry
+        mock_gateway.get_data.return_value = information
+
+        for captured in (first, first, first, second):
+            mock_gateway.probe.return_value = captured
+            await coordinator.async_refresh()
+
+        assert mock_gateway.get_data.await_count == 2
+        assert coordinator.data is information
+
+    async def test_fetch_after_wanted_codes_changed(
+        self, hass: HomeAssistant, ppc_config_data, mock_gateway
+    ):
+        """A sensor added since the last fetch gets its value without a new capture."""
+        captured = datetime(2024, 1, 1, 12, 0, tzinfo=UTC)
+        mock_gateway.wanted_obis = frozenset({"1-0:1.8.0"})
+        mock_gateway.probe.return_value = captured
+        mock_gateway.get_data.return_value = Information(
+            name="Test Gateway",
+            model="Test Model",
+            manufacturer="Test Manufacturer",
+            firmware_version="1.0.0",
+            last_update=captured,
+            readings={},
+        )
+        coordinator = SMGwDataUpdateCoordinator(
+            hass=hass, update_interval=timedelta(minutes=5)
+        )
+        entry = create_mock_config_entry(data=ppc_config_data)
+        entry.runtime_data = Data(
+            client=mock_gateway, coordinator=coordinator, integration=MagicMock()
+        )
+        coordinator.config_entry = entry
+
+        await coordinator.async_refresh()
+        await coordinator.async_refresh()
+        assert mock_gateway.get_data.await_count == 1
+
+        coordinator.async_want_obis("export", frozenset({"1-0:2.8.0"}))
+        await coordinator.async_refresh()
+        await coordinator.async_refresh()
+
+        assert mock_gateway.get_data.await_count == 2
+
+    async def test_emh_fetch_skipped_while_probe_shows_no_new_data(
+        self, hass: HomeAssistant, emh_config_data
+    ):
+        """EMH gateways report no firmware version, the probe still skips fetches."""
+        captured = datetime(2024, 1, 1, 12, 0, tzinfo=UTC)
+        gateway = EMHGateway(
+            host="192.168.1.10",
+            username="user",
+            password="pass",
+            websession=MagicMock(),
+            logger=logging.getLogger("test"),
+        )
+        gateway.client.get_capture_time = AsyncMock(return_value=captured)
+        gateway.client.get_data = AsyncMock(
+            return_value=Information(
+                name="EMH",
+                model="CASA",
+                manufacturer="EMH",
+                firmware_version="Unknown",
+                last_update=captured,
+                readings={},
+            )
+        )
+        coordinator = SMGwDataUpdateCoordinator(
+            hass=hass, update_interval=timedelta(minutes=5)
+        )
+        entry = create_mock_config_entry(data=emh_config_data)
+        entry.runtime_data = Data(
+            client=gateway, coordinator=coordinator, integration=MagicMock()
+        )
+        coordinator.config_entry = entry
+
+        for _ in range(3):
+            await coordinator.async_refresh()
+
+        assert gateway.client.get_capture_time.await_count == 3
+        gateway.client.get_data.assert_awaited_once()
+        assert gateway.metadata_requested is False
+
+    async def test_energy_counters_published_before_poll_ends(
+        self, hass: HomeAssistant, ppc_config_data, mock_gateway
+    ):
+        """Changed counters go out with their chunk, the final delta skips them."""
+        import_total = OBIS(1, 0, 1, 8, 0)
+        export_total = OBIS(1, 0, 2, 8, 0)
+        voltage = OBIS(1, 0, 32, 7, 0)
+        timestamp = datetime(2024, 1, 1, 12, 0, tzinfo=UTC)
+        readings = {
+            code: Reading(value=value, timestamp=timestamp, obis=code)
+            for code, value in (
+                (import_total, 724.9204),
+                (voltage, 230.5),
+                (export_total, 3.0557),
+            )
+        }
+        information = Information(
+            name="Test Gateway",
+            model="Test Model",
+            manufacturer="Test Manufacturer",
+            firmware_version="1.0.0",
+            last_update=timestamp,
+            readings=readings,
+        )
+        deltas = []
+
+        async def stream_readings():
+            yield {import_total: readings[import_total], voltage: readings[voltage]}
+            # Published before the gateway delivers the rest
+            assert [delta["changed"] for delta in deltas] == [{"1-0:1.8.0": 724.9204}]
+            yield {export_total: readings[export_total]}
+            mock_gateway.data = information
+
+        mock_gateway.stream_readings = stream_readings
+        coordinator = SMGwDataUpdateCoordinator(
+            hass=hass, update_interval=timedelta(minutes=5)
+        )
+        entry = create_mock_config_entry(data=ppc_config_data)
+        entry.runtime_data = Data(
+            client=mock_gateway, coordinator=coordinator, integration=MagicMock()
+        )
+        coordinator.config_entry = entry
+
+        @callback
+        def _record(entry_id, delta):
+            deltas.append(delta)
+
+        async_dispatcher_connect(hass, SIGNAL_READINGS_CHANGED, _record)
+
+        await coordinator.async_refresh()
+
+        assert [delta["changed"] for delta in deltas] == [
+            {"1-0:1.8.0": 724.9204},
+            {"1-0:2.8.0": 3.0557},
+            {"1-0:32.7.0": 230.5},
+        ]
+        assert coordinator.data is information
+
+    async def test_early_counters_of_failed_poll_set_back(
+        self, hass: HomeAssistant, ppc_config_data, mock_gateway
+    ):
+        """A poll failing after its early publish sends the last data again."""
+        import_total = OBIS(1, 0, 1, 8, 0)
+        timestamp = datetime(2024, 1, 1, 12, 0, tzinfo=UTC)
+        mock_gateway.get_data.return_value = Information(
+            name="Test Gateway",
+            model="Test Model",
+            manufacturer="Test Manufacturer",
+            firmware_version="1.0.0",
+            last_update=timestamp,
+            readings={
+                import_total: Reading(
+                    value=700.0, timestamp=timestamp, obis=import_total
+                )
+            },
+        )
+        coordinator = SMGwDataUpdateCoordinator(
+            hass=hass, update_interval=timedelta(minutes=5)
+        )
+        entry = create_mock_config_entry(data=ppc_config_data)
+        entry.runtime_data = Data(
+            client=mock_gateway, coordinator=coordinator, integration=MagicMock()
+        )
+        coordinator.config_entry = entry
+        deltas = []
+
+        @callback
+        def _record(entry_id, delta):
+            deltas.append(delta)
+
+        async_dispatcher_connect(hass, SIGNAL_READINGS_CHANGED, _record)
+        await coordinator.async_refresh()
+
+        async def failing_stream_readings():
+            yield {
+                import_total: Reading(
+                    value=724.9204, timestamp=timestamp, obis=import_total
+                )
+            }
+            raise RuntimeError("Connection lost")
+
+        mock_gateway.stream_readings = failing_stream_readings
+        await coordinator.async_refresh()
+
+        assert not coordinator.last_update_success
+        assert [delta["changed"] for delta in deltas] == [
+            {"1-0:1.8.0": 700.0},
+            {"1-0:1.8.0": 724.9204},
+            {"1-0:1.8.0": 700.0},
+        ]
+
+    async def test_missing_readings_kept_until_max_stale(
+        self, hass: HomeAssistant, ppc_config_data, mock_gateway
+    ):
+        """Readings missing from a partial poll keep their last value for a while."""
+        import_total = OBIS(1, 0, 1, 8, 0)
+        export_total = OBIS(1, 0, 2, 8, 0)
+        voltage = OBIS(1, 0, 32, 7, 0)
+        timestamp = datetime(2024, 1, 1, 12, 0, tzinfo=UTC)
+
+        def information(*codes, skipped=frozenset()):
+            return Information(
+                name="Test Gateway",
+                model="Test Model",
+                manufacturer="Test Manufacturer",
+                firmware_version="1.0.0",
+                last_update=timestamp,
+                readings={
+                    code: Reading(value=1.0, timestamp=timestamp, obis=code)
+                    for code in codes
+                },
+                skipped=skipped,
+            )
+
+        coordinator = SMGwDataUpdateCoordinator(
+            hass=hass, update_interval=timedelta(minutes=5)
+        )
+        entry = create_mock_config_entry(data=ppc_config_data)
+        entry.runtime_data = Data(
+            client=mock_gateway, coordinator=coordinator, integration=MagicMock()
+        )
+        coordinator.config_entry = entry
+
+        mock_gateway.get_data.return_value = information(
+            import_total, export_total, voltage
+        )
+        await coordinator.async_refresh()
+        # The voltage is no longer wanted, the export total is missing
+        mock_gateway.get_data.return_value = information(
+            import_total, skipped=frozenset({voltage})
+        )
+        await coordinator.async_refresh()
+
+        assert set(coordinator.data.readings) == {import_total, export_total}
+        assert set(coordinator.stale_readings()) == {export_total}
+
+        coordinator._stale_since[export_total] -= coordinator.max_stale.total_seconds()
+        await coordinator.async_refresh()
+
+        assert set(coordinator.data.readings) == {import_total}
+        assert coordinator.stale_readings() == {}
+
+    async def test_prewarm_disabled_with_zero_lead(
+        self, hass: HomeAssistant, ppc_config_data, mock_gateway
+    ):
+        """prewarm_seconds: 0 turns pre-warming off."""
+        hass.data[DATA_YAML_CONFIG] = {CONF_PREWARM_SECONDS: 0}
+        coordinator = SMGwDataUpdateCoordinator(
+            hass=hass, update_interval=timedelta(minutes=5)
+        )
+        coordinator.config_entry = create_mock_config_entry(data=ppc_config_data)
+
+        coordinator._schedule_refresh()
+
+        assert coordinator._unsub_prewarm is None
+        await coordinator.async_shutdown()
+
+    async def test_prewarm_cancelled_on_shutdown(
+        self, hass: HomeAssistant, ppc_config_data, mock_gateway
+    ):
+        """A pending pre-warm never fires against the client of an unloaded entry."""
+        mock_gateway.prewarm = AsyncMock()
+        coordinator = SMGwDataUpdateCoordinator(
+            hass=hass, update_interval=timedelta(minutes=5)
+        )
+        entry = create_mock_config_entry(data=ppc_config_data)
+        entry.runtime_data = Data(
+            client=mock_gateway, coordinator=coordinator, integration=MagicMock()
+        )
+        coordinator.config_entry = entry
+
+        coordinator._schedule_refresh()
+        assert coordinator._unsub_prewarm is not None
+        await coordinator.async_shutdown()
+        async_fire_time_changed(hass, dt_util.utcnow() + timedelta(minutes=10))
+        await hass.async_block_till_done()
+
+        assert coordinator._unsub_prewarm is None
+        mock_gateway.prewarm.assert_not_awaited()
+        mock_gateway.get_data.assert_not_awaited()
+
+    async def test_refresh_requested_during_cooldown_still_runs(
+        self, hass: HomeAssistant, ppc_config_data, mock_gateway
+    ):
+        """A scheduled poll doesn't drop a refresh queued by the debouncer."""
+        coordinator = SMGwDataUpdateCoordinator(
+            hass=hass, update_interval=timedelta(minutes=5)
+        )
+        entry = create_mock_config_entry(data=ppc_config_data)
+        entry.runtime_data = Data(
+            client=mock_gateway, coordinator=coordinator, integration=MagicMock()
+        )
+        coordinator.config_entry = entry
+        coordinator.async_add_listener(MagicMock())
+
+        await coordinator.async_request_refresh()
+        # Queued until the cooldown ends
+        await coordinator.async_request_refresh()
+        await coordinator.async_refresh()
+        assert mock_gateway.get_data.await_count == 2
+
+        async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=15))
+        await hass.async_block_till_done()
+
+        assert mock_gateway.get_data.await_count == 3
+        await coordinator.async_shutdown()
+
+    async def test_no_prewarm_with_polling_disabled(
+        self, hass: HomeAssistant, ppc_config_data
+    ):
+        """Entries with polling disabled are neither polled nor pre-warmed."""
+        coordinator = SMGwDataUpdateCoordinator(
+            hass=hass, update_interval=timedelta(minutes=5)
+        )
+        coordinator.config_entry = MockConfigEntry(
+            domain=DOMAIN, data=ppc_config_data, pref_disable_polling=True
+        )
+
+        coordinator._schedule_refresh()
+
+        assert coordinator._unsub_refresh is None
+        assert coordinator._unsub_prewarm is None
+        await coordinator.async_shutdown()
+
+    async def test_wanted_obis_follow_added_sensors(
+        self, hass: HomeAssistant, ppc_config_data, mock_gateway
+    ):
+        """Sensors request their codes while added, None requests all readings."""
+        mock_gateway.wanted_obis = None
+        coordinator = SMGwDataUpdateCoordinator(
+            hass=hass, update_interval=timedelta(minutes=5)
+        )
+        entry = create_mock_config_entry(data=ppc_config_data)
+        entry.runtime_data = Data(
+            client=mock_gateway,
+            coordinator=coordinator,
+            integration=MagicMock(),
+        )
+        coordinator.config_entry = entry
+        import_, export = "1-0:1.8.0", "1-0:2.8.0"
+
+        release_import = coordinator.async_want_obis("import", frozenset({import_}))
+        coordinator.async_want_obis("export", frozenset({export}))
+        assert mock_gateway.wanted_obis == {import_, export}
+
+        release_import()
+        assert mock_gateway.wanted_obis == {export}
+
+        coordinator.async_want_obis("unknown", None)
+        assert mock_gateway.wanted_obis is None
+
     async def test_coordinator_fetches_data(
         self, hass: HomeAssistant, ppc_config_data, mock_gateway
     ):
@@ -305,10 +1060,10 @@ class TestCoordinator:
             firmware_version="1.0.0",
             last_update=datetime(2024, 1, 1, 12, 0, 0, tzinfo=UTC),
             readings={
-                "1-0:1.8.0": Reading(
+                OBIS(1, 0, 1, 8, 0): Reading(
                     value="1234.56",
                     timestamp=datetime(2024, 1, 1, 12, 0, 0, tzinfo=UTC),
-                    obis="1-0:1.8.0",
+                    obis=OBIS(1, 0, 1, 8, 0),
                 ),
             },
         )
@@ -0,0 +1,89 @@
+"""Tests for off-loop parsing and the shared parse executor."""
+
+import asyncio
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from custom_components.ppc_smgw.gateways.offload import ParseExecutor, async_parse
+
+
+@pytest.fixture
+def executor():
+    executor = ParseExecutor(max_workers=1)
+    yield executor
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+class TestAsyncParse:
+    async def test_small_payload_is_parsed_inline(self):
+        func = MagicMock(return_value="parsed")
+
+        with patch.object(asyncio, "to_thread") as to_thread:
+            assert await async_parse(func, b"tiny", inline_threshold=10) == "parsed"
+
+        to_thread.assert_not_called()
+        func.assert_called_once_with(b"tiny")
+
+    async def test_large_payloads_are_offloaded_in_one_hop(self):
+        func = MagicMock(return_value="parsed")
+
+        with patch.object(asyncio, "to_thread", wraps=asyncio.to_thread) as to_thread:
+            result = await async_parse(
+                func, b"x" * 6, b"y" * 6, "not counted", inline_threshold=10
+            )
+
+        assert result == "parsed"
+        to_thread.assert_called_once()
+        func.assert_called_once_with(b"x" * 6, b"y" * 6, "not counted")
+
+    async def test_uses_given_executor(self, executor):
+        with patch.object(asyncio, "to_thread") as to_thread:
+            name = await async_parse(
+                lambda _: threading.current_thread().name,
+                b"x" * 10,
+                executor=executor,
+                inline_threshold=1,
+            )
+
+        to_thread.assert_not_called()
+        assert name.startswith("ppc_smgw_parse")
+        assert executor.completed == 1
+
+
+@pytest.mark.asyncio
+class TestParseExecutor:
+    async def test_tracks_queue_depth(self, executor):
+        release = threading.Event()
+
+        jobs = [asyncio.ensure_future(executor.run(release.wait)) for _ in range(3)]
+        await asyncio.sleep(0.05)
+
+        # One worker: one job running, the rest waiting
+        assert executor.running == 1
+        assert executor.queued == 2
+
+        release.set()
+        await asyncio.gather(*jobs)
+
+        stats = executor.as_diagnostics()
+        assert stats["queued"] == 0
+        assert stats["running"] == 0
+        assert stats["completed"] == 3
+        assert stats["peak_queued"] >= 2
+
+    async def test_cancelled_jobs_leave_the_queue(self, executor):
+        release = threading.Event()
+        running = asyncio.ensure_future(executor.run(release.wait))
+        waiting = asyncio.ensure_future(executor.run(release.wait))
+        await asyncio.sleep(0.05)
+
+        waiting.cancel()
+        await asyncio.sleep(0.01)
+        release.set()
+        await running
+
+        assert executor.queued == 0
+        assert executor.completed == 1
@@ -0,0 +1,171 @@
+"""Tests for the per-host gateway operation queue."""
+
+import asyncio
+
+import pytest
+
+from custom_components.ppc_smgw.gateways.operations import OperationQueue, Priority
+
+
+async def _blocker(queue: OperationQueue) -> tuple[asyncio.Task, asyncio.Event]:
+    """Start an operation that holds the queue until the event is set."""
+    release = asyncio.Event()
+    task = asyncio.create_task(queue.run(Priority.POLL, release.wait))
+    await asyncio.sleep(0)
+    return task, release
+
+
+@pytest.mark.asyncio
+class TestOperationQueue:
+    async def test_operations_run_one_at_a_time(self):
+        queue = OperationQueue()
+        running = 0
+        peak = 0
+
+        async def _operation() -> None:
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0)
+            running -= 1
+
+        await asyncio.gather(*(queue.run(Priority.POLL, _operation) for _ in range(3)))
+
+        assert peak == 1
+
+    async def test_waiting_operations_run_by_priority(self):
+        queue = OperationQueue()
+        order: list[str] = []
+
+        async def _operation(name: str) -> str:
+            order.append(name)
+            return name
+
+        blocker, release = await _blocker(queue)
+        waiting = [
+            asyncio.create_task(queue.run(priority, _operation, priority.name))
+            for priority in (
+                Priority.DIAGNOSTICS,
+                Priority.POLL,
+                Priority.BACKFILL,
+                Priority.REBOOT,
+            )
+        ]
+        await asyncio.sleep(0)
+        assert queue.pending == 4
+
+        release.set()
+        results = await asyncio.gather(blocker, *waiting)
+
+        assert order == ["REBOOT", "POLL", "BACKFILL", "DIAGNOSTICS"]
+        assert results[1:] == ["DIAGNOSTICS", "POLL", "BACKFILL", "REBOOT"]
+        assert queue.pending == 0
+
+    async def test_cancelled_waiter_is_skipped(self):
+        queue = OperationQueue()
+        ran: list[str] = []
+
+        async def _operation(name: str) -> None:
+            ran.append(name)
+
+        blocker, release = await _blocker(queue)
+        cancelled = asyncio.create_task(queue.run(Priority.REBOOT, _operation, "a"))
+        other = asyncio.create_task(queue.run(Priority.POLL, _operation, "b"))
+        await asyncio.sleep(0)
+
+        cancelled.cancel()
+        release.set()
+        await asyncio.gather(blocker, other)
+
+        assert ran == ["b"]
+        assert cancelled.cancelled()
+        # The queue is free again
+        await asyncio.wait_for(queue.run(Priority.POLL, _operation, "c"), 1)
+
+    async def test_failing_operation_frees_queue(self):
+        queue = OperationQueue()
+
+        async def _fail() -> None:
+            raise RuntimeError("boom")
+
+        with pytest.raises(RuntimeError):
+            await queue.run(Priority.POLL, _fail)
+
+        await asyncio.wait_for(queue.run(Priority.POLL, asyncio.sleep, 0), 1)
+
+    async def test_next_owner(self):
+        queue = OperationQueue()
+        owner = object()
+        assert queue.next_owner() is None
+
+        blocker, release = await _blocker(queue)
+        diagnostics = asyncio.create_task(
+            queue.run(Priority.DIAGNOSTICS, asyncio.sleep, 0)
+        )
+        poll = asyncio.create_task(
+            queue.run(Priority.POLL, asyncio.sleep, 0, owner=owner)
+        )
+        await asyncio.sleep(0)
+
+        assert queue.next_owner() is owner
+
+        release.set()
+        await asyncio.gather(blocker, diagnostics, poll)
+
+
+@pytest.mark.asyncio
+class TestHeldSession:
+    async def _hold_with_next(
+        self,
+        queue: OperationQueue,
+        holder: object,
+        next_owner: object,
+        cancel_next: bool = False,
+    ) -> list[str]:
+        """Hold a session of ``holder`` while ``next_owner`` waits for its turn."""
+        log: list[str] = []
+
+        async def _close() -> None:
+            log.append("close")
+
+        async def _hold() -> None:
+            queue.hold(holder, _close)
+
+        async def _operation() -> None:
+            log.append("next")
+
+        blocker, release = await _blocker(queue)
+        holding = asyncio.create_task(queue.run(Priority.POLL, _hold, owner=holder))
+        await asyncio.sleep(0)
+        waiting = asyncio.create_task(
+            queue.run(Priority.POLL, _operation, owner=next_owner)
+        )
+        await asyncio.sleep(0)
+        if cancel_next:
+            waiting.cancel()
+        release.set()
+        await asyncio.gather(blocker, holding, waiting, return_exceptions=True)
+        # A session nobody picked up is closed on a turn of its own
+        await asyncio.wait_for(queue.run(Priority.POLL, asyncio.sleep, 0), 1)
+        return log
+
+    async def test_owner_reuses_held_session(self):
+        owner = object()
+
+        log = await self._hold_with_next(OperationQueue(), owner, owner)
+
+        assert log == ["next"]
+
+    async def test_held_session_closed_before_other_owner(self):
+        log = await self._hold_with_next(OperationQueue(), object(), object())
+
+        assert log == ["close", "next"]
+
+    async def test_held_session_closed_when_next_operation_is_cancelled(self):
+        owner = object()
+
+        log = await self._hold_with_next(
+            OperationQueue(), owner, owner, cancel_next=True
+        )
+
+        assert log == ["close"]
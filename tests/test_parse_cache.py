@@ -0,0 +1,38 @@
+"""Tests for reusing the parse results of unchanged responses."""
+
+from custom_components.ppc_smgw.gateways.parse_cache import ParseCache, content_digest
+
+
+class TestContentDigest:
+    def test_same_content_same_digest(self):
+        assert content_digest(b"a", b"b") == content_digest(b"a", b"b")
+
+    def test_content_boundaries_matter(self):
+        assert content_digest(b"ab", b"c") != content_digest(b"a", b"bc")
+
+
+class TestParseCache:
+    def test_hit_for_same_content_and_wanted_codes(self):
+        cache = ParseCache()
+        wanted = frozenset({"1-0:1.8.0"})
+        cache.put("poll", content_digest(b"page"), wanted, "parsed")
+
+        assert cache.get("poll", content_digest(b"page"), wanted) == "parsed"
+        assert (cache.hits, cache.misses) == (1, 0)
+
+    def test_miss_for_changed_content_or_wanted_codes(self):
+        cache = ParseCache()
+        cache.put("poll", content_digest(b"page"), None, "parsed")
+
+        assert cache.get("poll", content_digest(b"new page"), None) is None
+        assert cache.get("poll", content_digest(b"page"), frozenset()) is None
+        assert cache.get("other", content_digest(b"page"), None) is None
+        assert cache.as_diagnostics() == {"entries": 1, "hits": 0, "misses": 3}
+
+    def test_put_replaces_result_of_key(self):
+        cache = ParseCache()
+        cache.put("poll", content_digest(b"old"), None, "old")
+        cache.put("poll", content_digest(b"new"), None, "new")
+
+        assert len(cache) == 1
+        assert cache.get("poll", content_digest(b"old"), None) is None
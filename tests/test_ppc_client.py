@@ -0,0 +1,204 @@
+"""Tests for session handling of the built-in PPC client."""
+
+import logging
+from unittest.mock import patch
+
+import httpx
+from obis_parser import OBIS
+import pytest
+
+from custom_components.ppc_smgw.gateways.offload import async_parse
+from custom_components.ppc_smgw.gateways.ppc.ppcsmgw.ppc_smgw import PPCSmgw
+
+HOST = "https://192.168.1.200/cgi-bin/hanservice.cgi"
+
+
+class FakeGateway:
+    """Hands out a new session per login and records the cookies it receives."""
+
+    def __init__(self) -> None:
+        self.sessions = 0
+        self.received: list[tuple[str, str | None]] = []
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        self.received.append((request.method, request.headers.get("cookie")))
+        if request.method == "GET":
+            self.sessions += 1
+            return httpx.Response(
+                200,
+                headers={"set-cookie": f"session=s{self.sessions}; path=/"},
+                html=f"<input type='hidden' name='tkn' value='t{self.sessions}'>",
+            )
+        return httpx.Response(200, html="<html></html>")
+
+
+class MeterGateway(FakeGateway):
+    """Serves meter pages that carry the session token, like the gateway does."""
+
+    METERFORM = (
+        "<input type='hidden' name='tkn' value='t{session}'>"
+        "<div id='div_fwversion'>1.2.3-4</div>"
+        "<select id='meterform_select_meter'><option value='m1'>M</option></select>"
+    )
+    PROFILE = (
+        "<input type='hidden' name='tkn' value='t{session}'>"
+        "<table id='metervalue'><tr>"
+        "<td id='table_metervalues_col_timestamp'>2024-12-20 16:00:01</td>"
+        "<td id='table_metervalues_col_wert'>{value}</td>"
+        "<td id='table_metervalues_col_obis'>1-0:1.8.0</td>"
+        "</tr></table>"
+    )
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.value = "724.9204"
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        if b"action=meterform" in request.content:
+            return httpx.Response(
+                200, html=self.METERFORM.format(session=self.sessions)
+            )
+        if b"action=showMeterProfile" in request.content:
+            return httpx.Response(
+                200, html=self.PROFILE.format(session=self.sessions, value=self.value)
+            )
+        return super().handler(request)
+
+
+def _make_client(
+    httpx_client: httpx.AsyncClient, keep_session: bool | None = None
+) -> PPCSmgw:
+    return PPCSmgw(
+        host=HOST,
+        username="user",
+        password="pass",
+        httpx_client=httpx_client,
+        logger=logging.getLogger("test.ppc_client"),
+        keep_session=None if keep_session is None else lambda close: keep_session,
+    )
+
+
+@pytest.mark.asyncio
+class TestSessionIsolation:
+    async def test_clients_sharing_httpx_client_keep_own_sessions(self):
+        gateway = FakeGateway()
+        async with httpx.AsyncClient(
+            transport=httpx.MockTransport(gateway.handler)
+        ) as shared:
+            first = _make_client(shared)
+            second = _make_client(shared)
+
+            await first._login()
+            await second._login()
+            await first._logout()
+            await second._logout()
+
+        assert (first._token, second._token) == ("t1", "t2")
+        assert gateway.received == [
+            ("GET", None),
+            ("GET", None),
+            ("POST", "session=s1"),
+            ("POST", "session=s2"),
+        ]
+
+    async def test_login_ignores_cookies_of_shared_client(self):
+        gateway = FakeGateway()
+        async with httpx.AsyncClient(
+            transport=httpx.MockTransport(gateway.handler)
+        ) as shared:
+            shared.cookies.set("session", "stale")
+            client = _make_client(shared)
+
+            await client._login()
+
+        assert gateway.received == [("GET", None)]
+
+    async def test_session_cookie_stays_out_of_shared_client(self):
+        gateway = FakeGateway()
+        async with httpx.AsyncClient(
+            transport=httpx.MockTransport(gateway.handler)
+        ) as shared:
+            client = _make_client(shared)
+
+            await client._login()
+
+            assert dict(shared.cookies) == {}
+            assert dict(client._cookies) == {"session": "s1"}
+
+
+@pytest.mark.asyncio
+class TestSessionReuse:
+    async def test_next_operation_reuses_open_session(self):
+        gateway = FakeGateway()
+        async with httpx.AsyncClient(
+            transport=httpx.MockTransport(gateway.handler)
+        ) as shared:
+            client = _make_client(shared, keep_session=True)
+
+            await client._ensure_session()
+            await client._end_session()
+            await client._ensure_session()
+
+        # Logged in once, not logged out in between
+        assert gateway.received == [("GET", None)]
+
+    async def test_session_closed_without_queued_operation(self):
+        gateway = FakeGateway()
+        async with httpx.AsyncClient(
+            transport=httpx.MockTransport(gateway.handler)
+        ) as shared:
+            client = _make_client(shared, keep_session=False)
+
+            await client._ensure_session()
+            await client._end_session()
+            await client._ensure_session()
+
+        assert gateway.received == [
+            ("GET", None),
+            ("POST", "session=s1"),
+            ("GET", None),
+        ]
+
+    async def test_failed_operation_drops_session(self):
+        gateway = FakeGateway()
+        async with httpx.AsyncClient(
+            transport=httpx.MockTransport(gateway.handler)
+        ) as shared:
+            client = _make_client(shared, keep_session=True)
+
+            # The empty meter form has no meter to read
+            with pytest.raises(ValueError, match="No meter found"):
+                await client.get_data()
+            await client._ensure_session()
+
+        assert gateway.received == [
+            ("GET", None),
+            ("POST", "session=s1"),
+            ("GET", None),
+        ]
+
+
+@pytest.mark.asyncio
+class TestParseCache:
+    async def test_pages_differing_by_token_are_parsed_once(self):
+        gateway = MeterGateway()
+        async with httpx.AsyncClient(
+            transport=httpx.MockTransport(gateway.handler)
+        ) as shared:
+            client = _make_client(shared, keep_session=False)
+
+            with patch(
+                "custom_components.ppc_smgw.gateways.ppc.ppcsmgw.ppc_smgw.async_parse",
+                wraps=async_parse,
+            ) as parse:
+                first = await client.get_data()
+                second = await client.get_data()
+                gateway.value = "725.0000"
+                third = await client.get_data()
+
+        # Every poll had its own session token
+        assert gateway.sessions == 3
+        assert parse.call_count == 2
+        assert second.readings == first.readings
+        assert second.firmware_version == "1.2.3-4"
+        assert third.readings[OBIS(1, 0, 1, 8, 0)].value == 725.0
@@ -0,0 +1,105 @@
+"""Tests for the built-in PPC client's HTML parsing."""
+
+from datetime import UTC, datetime
+from decimal import Decimal
+import logging
+
+from obis_parser import OBIS
+import pytest
+
+from custom_components.ppc_smgw.gateways.ppc.ppcsmgw.parser import (
+    parse_meter_id,
+    parse_poll,
+    parse_token,
+)
+
+LOGIN_PAGE = (
+    b"<html><form><input type='hidden' name='tkn' value='abc123'>"
+    b"<input name='action' value='login'></form></html>"
+)
+
+METERFORM_PAGE = (
+    b"<html><div id='div_fwversion'>\n  1.2.3-4  \n</div><form>"
+    b"<select id='meterform_select_meter'>"
+    b"<option value='meter-1'>Meter 1</option>"
+    b"<option value='meter-2'>Meter 2</option>"
+    b"</select></form></html>"
+)
+
+PROFILE_PAGE = b"""<html><table id='metervalue'>
+<tr><th>Timestamp</th><th>Value</th><th>OBIS</th></tr>
+<tr>
+  <td id='table_metervalues_col_timestamp'>2024-12-20 16:00:01</td>
+  <td id='table_metervalues_col_wert'>724.9204</td>
+  <td id='table_metervalues_col_obis'>1-0:1.8.0</td>
+</tr>
+<tr>
+  <td id='table_metervalues_col_wert'>3.0557</td>
+  <td id='table_metervalues_col_obis'>1-0:2.8.0</td>
+</tr>
+</table></html>"""
+
+LOGGER = logging.getLogger("test.ppc_parser")
+
+
+class TestParser:
+    def test_parse_token(self):
+        assert parse_token(LOGIN_PAGE) == "abc123"
+
+    def test_parse_token_unquoted_value(self):
+        assert parse_token(b"<input type=hidden name=tkn value=abc123>") == "abc123"
+
+    def test_parse_token_missing(self):
+        with pytest.raises(ValueError, match="session token"):
+            parse_token(b"<html>Unauthorized</html>")
+
+    def test_parse_meter_id_takes_first_meter(self):
+        assert parse_meter_id(METERFORM_PAGE) == "meter-1"
+
+    def test_parse_poll(self):
+        firmware, readings, last_update = parse_poll(
+            METERFORM_PAGE, PROFILE_PAGE, UTC, LOGGER
+        )
+
+        expected_timestamp = datetime(2024, 12, 20, 16, 0, 1, tzinfo=UTC)
+        assert firmware == "1.2.3-4"
+        assert last_update == expected_timestamp
+        assert readings[OBIS(1, 0, 1, 8, 0)].value == 724.9204
+        # The feed-in row has no timestamp and reuses the one of the row above
+        assert readings[OBIS(1, 0, 2, 8, 0)].value == 3.0557
+        assert readings[OBIS(1, 0, 2, 8, 0)].timestamp == expected_timestamp
+
+    def test_parse_poll_skips_unwanted_rows(self):
+        skipped: set[OBIS] = set()
+
+        _, readings, last_update = parse_poll(
+            METERFORM_PAGE,
+            PROFILE_PAGE,
+            UTC,
+            LOGGER,
+            frozenset({"1-0:2.8.0"}),
+            skipped,
+        )
+
+        expected_timestamp = datetime(2024, 12, 20, 16, 0, 1, tzinfo=UTC)
+        assert list(readings) == [OBIS(1, 0, 2, 8, 0)]
+        assert skipped == {OBIS(1, 0, 1, 8, 0)}
+        # The timestamp of a skipped row is still used by the rows below it
+        assert readings[OBIS(1, 0, 2, 8, 0)].timestamp == expected_timestamp
+        assert last_update == expected_timestamp
+
+    def test_parse_poll_exact_counters(self):
+        _, readings, _ = parse_poll(
+            METERFORM_PAGE, PROFILE_PAGE, UTC, LOGGER, exact=True
+        )
+
+        assert readings[OBIS(1, 0, 1, 8, 0)].value == Decimal("724.9204")
+        assert readings[OBIS(1, 0, 2, 8, 0)].value == Decimal("3.0557")
+
+    def test_parse_poll_keeps_values_that_are_no_numbers(self):
+        profile = PROFILE_PAGE.replace(b">724.9204<", b">n/a<")
+
+        _, readings, _ = parse_poll(METERFORM_PAGE, profile, UTC, LOGGER)
+
+        assert readings[OBIS(1, 0, 1, 8, 0)].value == "n/a"
+        assert readings[OBIS(1, 0, 2, 8, 0)].value == 3.0557
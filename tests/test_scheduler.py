@@ -0,0 +1,93 @@
+"""Tests for the integration-wide poll scheduler."""
+
+import asyncio
+from datetime import timedelta
+
+from homeassistant.core import HomeAssistant
+import pytest
+
+from custom_components.ppc_smgw.const import (
+    CONF_MAX_CONCURRENT_POLLS,
+    DATA_YAML_CONFIG,
+)
+from custom_components.ppc_smgw.scheduler import (
+    PollScheduler,
+    async_get_poll_scheduler,
+    spread,
+)
+
+INTERVAL = timedelta(minutes=5)
+
+
+class TestSpread:
+    def test_first_slots_halve_the_gaps(self):
+        assert [spread(slot) for slot in range(8)] == [
+            0,
+            0.5,
+            0.25,
+            0.75,
+            0.125,
+            0.625,
+            0.375,
+            0.875,
+        ]
+
+    @pytest.mark.parametrize("slot", [0, 1, 5, 1000])
+    def test_within_interval(self, slot):
+        assert 0 <= spread(slot) < 1
+
+
+class TestPhases:
+    def test_entries_poll_at_their_phase(self):
+        scheduler = PollScheduler(loop_time=1000, max_concurrent=4)
+
+        # At least a quarter of an interval passes until the next poll
+        assert scheduler.delay("a", 1000, INTERVAL) == 300
+        assert scheduler.delay("b", 1000, INTERVAL) == 150
+        assert scheduler.delay("c", 1000, INTERVAL) == 75
+        # The phase stays the same however long a poll took
+        assert scheduler.delay("b", 1160, INTERVAL) == 290
+
+    def test_released_slot_is_reused(self):
+        scheduler = PollScheduler(loop_time=0, max_concurrent=4)
+        scheduler.delay("a", 0, INTERVAL)
+        scheduler.delay("b", 0, INTERVAL)
+
+        scheduler.release("a")
+        assert len(scheduler) == 1
+        assert scheduler.delay("c", 0, INTERVAL) == 300
+
+
+class TestConcurrency:
+    async def test_polls_beyond_the_limit_wait(self):
+        scheduler = PollScheduler(loop_time=0, max_concurrent=1)
+        release = asyncio.Event()
+        lags = []
+
+        async def _poll() -> None:
+            async with scheduler.poll() as queue_lag:
+                lags.append(queue_lag)
+                await release.wait()
+
+        first = asyncio.create_task(_poll())
+        second = asyncio.create_task(_poll())
+        await asyncio.sleep(0)
+
+        assert scheduler.in_flight == 1
+        assert scheduler.waiting == 1
+
+        release.set()
+        await asyncio.gather(first, second)
+
+        assert scheduler.in_flight == 0
+        assert scheduler.waiting == 0
+        assert len(lags) == 2
+        assert scheduler.peak_queue_lag == max(lags)
+
+    async def test_limit_from_yaml(self, hass: HomeAssistant):
+        hass.data[DATA_YAML_CONFIG] = {CONF_MAX_CONCURRENT_POLLS: 2}
+
+        scheduler = async_get_poll_scheduler(hass)
+
+        assert scheduler.max_concurrent == 2
+        assert scheduler is async_get_poll_scheduler(hass)
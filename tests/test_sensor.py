@@ -3,27 +3,44 @@ from datetime import UTC, datetime
 import json
 from pathlib import Path
 import re
-from unittest.mock import MagicMock
+import time
+from unittest.mock import MagicMock, patch
 
-from homeassistant.components.sensor import SensorEntityDescription
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntityDescription,
+    SensorStateClass,
+)
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity import EntityCategory
+from homeassistant.util import slugify
 from obis_parser import OBIS, OBIS_CATALOG
 import pytest
 
 from custom_components.ppc_smgw import sensor as sensor_module
 from custom_components.ppc_smgw.const import (
+    CONF_COMPACT_ENTITIES,
+    CONF_DISCOVERY_POLICY,
     SENSOR_TYPES,
+    DiscoveryPolicy,
     FirmwareVersionSensorDescription,
     LastUpdatedSensorDescription,
 )
 from custom_components.ppc_smgw.coordinator import Data
+from custom_components.ppc_smgw.deadband import Deadband
+from custom_components.ppc_smgw.entity import entity_id_template
 from custom_components.ppc_smgw.gateways.reading import Information, Reading
-from custom_components.ppc_smgw.obis_ha import OBISSensorSpec
+from custom_components.ppc_smgw.obis_ha import (
+    OBISSensorSpec,
+    enabled_by_policy,
+    measurement_group,
+)
 from custom_components.ppc_smgw.sensor import (
     FirmwareSensor,
     LastUpdatedSensor,
+    OBISGroupSensor,
     OBISSensor,
+    _build_dynamic_obis_sensors,
     async_setup_entry,
 )
 from tests.conftest import create_mock_config_entry
@@ -493,6 +510,31 @@ class TestSensorPlatformSetup:
             "1-0:2.8.0": "active_energy_export",
         }
 
+    async def test_skipped_codes_are_discovered(
+        self, hass: HomeAssistant, ppc_config_data
+    ):
+        """Codes delivered without a value still get a (disabled) sensor."""
+        mock_coordinator = MagicMock()
+        mock_coordinator.data = replace(
+            _information({"1-0:1.8.0": _reading("1234.5", "1-0:1.8.0")}),
+            skipped=frozenset({OBIS(1, 0, 32, 7, 0)}),
+        )
+        mock_coordinator.async_add_listener = MagicMock(return_value=MagicMock())
+        mock_add_entities = MagicMock()
+        client = MagicMock()
+        client.dynamic_obis_discovery_enabled = True
+
+        entry = _entry_with_runtime_data(ppc_config_data, mock_coordinator, client)
+
+        await async_setup_entry(hass, entry, mock_add_entities)
+
+        keys = [
+            entity.entity_description.key
+            for entity in mock_add_entities.call_args[0][0]
+            if isinstance(entity, OBISSensor)
+        ]
+        assert keys == ["1-0:1.8.0", "1-0:32.7.0"]
+
     async def test_unknown_obis_codes_are_disabled_diagnostics(
         self, hass: HomeAssistant, ppc_config_data
     ):
@@ -608,6 +650,62 @@ class TestOBISSensor:
         assert sensor.native_value is None
 
 
+class TestEntityConstruction:
+    """Device info and ids are derived once per entry, not per entity."""
+
+    def test_entities_share_device_info(self, mock_coordinator, valid_information):
+        mock_coordinator.data = valid_information
+        mock_coordinator.device_info = None
+        mock_coordinator.config_entry.domain = "ppc_smgw"
+        mock_coordinator.config_entry.entry_id = "test_entry_id"
+
+        sensors = _build_dynamic_obis_sensors(mock_coordinator, set())
+        sensors.append(
+            FirmwareSensor(
+                coordinator=mock_coordinator,
+                entity_description=FirmwareVersionSensorDescription,
+            )
+        )
+
+        assert len(sensors) > 1
+        device_info = sensors[0].device_info
+        assert all(sensor.device_info is device_info for sensor in sensors)
+        assert device_info["identifiers"] == {("ppc_smgw", "test_entry_id")}
+        assert device_info["name"] == "Test Gateway"
+        assert device_info["manufacturer"] == "Test Manufacturer"
+        assert device_info["model"] == "Test Model"
+        assert device_info["sw_version"] == "1.0.0"
+
+    def test_device_info_without_data(self, mock_coordinator):
+        mock_coordinator.device_info = None
+
+        sensor = FirmwareSensor(
+            coordinator=mock_coordinator,
+            entity_description=FirmwareVersionSensorDescription,
+        )
+
+        assert sensor.device_info["name"] == "SMGW"
+        assert sensor.device_info["sw_version"] == "Unknown"
+
+    @pytest.mark.parametrize(
+        "key",
+        [
+            "1-0:1.8.0",
+            "1-0:1.8.0*255",
+            "1-1:21.7.0",
+            "last_update",
+            "phase_l1",
+            "Firmware Version",
+            "Zählerstand",
+            "it's",
+        ],
+    )
+    def test_entity_id_template_matches_slugify(self, key):
+        entry_id = "01JBX9Q8Z7ABCDEF0123456789"
+
+        assert entity_id_template(entry_id, key) == slugify(f"{entry_id}_{key}")
+
+
 class TestLastUpdatedSensor:
     """Test the LastUpdatedSensor class."""
 
@@ -634,6 +732,365 @@ class TestLastUpdatedSensor:
         assert sensor.native_value == valid_information.last_update
 
 
+class TestChangeOnlyWrites:
+    """Entities only write state when a coordinator update changed it."""
+
+    def _sensor(self, mock_coordinator):
+        sensor = OBISSensor(
+            coordinator=mock_coordinator,
+            spec=OBISSensorSpec(
+                description=SensorEntityDescription(key="1-0:1.8.0", name="Import")
+            ),
+        )
+        # What async_added_to_hass records for the initial state
+        sensor._written_fingerprint = sensor._state_fingerprint()
+        return sensor
+
+    def test_unchanged_value_is_not_written(self, mock_coordinator, valid_information):
+        mock_coordinator.data = valid_information
+        sensor = self._sensor(mock_coordinator)
+
+        with patch.object(sensor, "async_write_ha_state") as write:
+            sensor._handle_coordinator_update()
+
+        write.assert_not_called()
+
+    def test_changed_value_is_written_once(self, mock_coordinator, valid_information):
+        mock_coordinator.data = valid_information
+        sensor = self._sensor(mock_coordinator)
+        reading = valid_information.readings[OBIS(1, 0, 1, 8, 0)]
+        mock_coordinator.data = replace(
+            valid_information,
+            readings={OBIS(1, 0, 1, 8, 0): replace(reading, value="1240.0")},
+        )
+
+        with patch.object(sensor, "async_write_ha_state") as write:
+            sensor._handle_coordinator_update()
+            sensor._handle_coordinator_update()
+
+        write.assert_called_once()
+
+    def test_availability_change_is_written(self, mock_coordinator, valid_information):
+        mock_coordinator.data = valid_information
+        mock_coordinator.last_update_success = True
+        sensor = self._sensor(mock_coordinator)
+        mock_coordinator.last_update_success = False
+
+        with patch.object(sensor, "async_write_ha_state") as write:
+            sensor._handle_coordinator_update()
+
+        write.assert_called_once()
+
+
+class TestDeadband:
+    """Measurement sensors drop jitter below their deadband."""
+
+    _POWER = OBIS(1, 0, 16, 7, 0)
+
+    def _sensor(self, mock_coordinator, value):
+        mock_coordinator.data = _information(
+            {self._POWER: _reading(value, self._POWER)}
+        )
+        sensor = OBISSensor(
+            coordinator=mock_coordinator,
+            spec=OBISSensorSpec(
+                description=SensorEntityDescription(
+                    key="1-0:16.7.0",
+                    name="Power",
+                    device_class=SensorDeviceClass.POWER,
+                    state_class=SensorStateClass.MEASUREMENT,
+                )
+            ),
+        )
+        sensor._deadband = Deadband(absolute=10)
+        sensor._written_fingerprint = sensor._state_fingerprint()
+        sensor._written_at = 1000.0
+        return sensor
+
+    def _update(self, sensor, mock_coordinator, value, now=1001.0):
+        mock_coordinator.data = _information(
+            {self._POWER: _reading(value, self._POWER)}
+        )
+        with (
+            patch.object(sensor, "async_write_ha_state") as write,
+            patch("custom_components.ppc_smgw.sensor.time.monotonic", return_value=now),
+        ):
+            sensor._handle_coordinator_update()
+        return write
+
+    def test_jitter_is_not_written(self, mock_coordinator):
+        sensor = self._sensor(mock_coordinator, "500")
+
+        self._update(sensor, mock_coordinator, "505").assert_not_called()
+        # Compared against the last written value, not the last polled one
+        self._update(sensor, mock_coordinator, "509").assert_not_called()
+
+    def test_change_beyond_deadband_is_written(self, mock_coordinator):
+        sensor = self._sensor(mock_coordinator, "500")
+
+        self._update(sensor, mock_coordinator, "511").assert_called_once()
+
+    def test_max_silence_forces_write(self, mock_coordinator):
+        sensor = self._sensor(mock_coordinator, "500")
+
+        write = self._update(sensor, mock_coordinator, "501", now=1000.0 + 3600)
+
+        write.assert_called_once()
+
+    def test_non_numeric_value_is_written(self, mock_coordinator):
+        sensor = self._sensor(mock_coordinator, "500")
+
+        self._update(sensor, mock_coordinator, "n/a").assert_called_once()
+
+    async def test_energy_counter_is_not_filtered(
+        self, mock_coordinator, valid_information
+    ):
+        mock_coordinator.data = valid_information
+        sensor = OBISSensor(
+            coordinator=mock_coordinator,
+            spec=OBISSensorSpec(
+                description=SensorEntityDescription(
+                    key="1-0:1.8.0",
+                    name="Import",
+                    device_class=SensorDeviceClass.ENERGY,
+                    state_class=SensorStateClass.TOTAL_INCREASING,
+                )
+            ),
+        )
+        sensor.hass = MagicMock(data={})
+        sensor.entity_id = "sensor.import"
+
+        with patch("custom_components.ppc_smgw.entity.SMGWEntity.async_added_to_hass"):
+            await sensor.async_added_to_hass()
+
+        assert sensor._deadband is None
+
+
+class TestCompactEntities:
+    """Compact mode folds measurement groups into one entity each."""
+
+    _READINGS = {
+        "1-0:1.8.0": "1234.5",
+        "1-0:16.7.0": "700",
+        "1-0:21.7.0": "250",
+        "1-0:31.7.0": "1.1",
+        "1-0:32.7.0": "230.1",
+    }
+
+    def _coordinator(self, readings: dict[str, str]):
+        coordinator = MagicMock()
+        coordinator.data = _information(
+            {key: _reading(value, key) for key, value in readings.items()}
+        )
+        coordinator.async_add_listener = MagicMock(return_value=MagicMock())
+        return coordinator
+
+    async def _setup(self, hass, ppc_config_data, coordinator):
+        client = MagicMock()
+        client.dynamic_obis_discovery_enabled = True
+        data = {**ppc_config_data, CONF_COMPACT_ENTITIES: True}
+        entry = _entry_with_runtime_data(data, coordinator, client)
+        add_entities = MagicMock()
+
+        await async_setup_entry(hass, entry, add_entities)
+
+        return add_entities
+
+    @pytest.mark.parametrize(
+        ("code", "group"),
+        [
+            ("1-0:1.8.0", None),
+            ("1-0:21.8.0", None),
+            ("1-0:16.7.0", None),
+            ("1-0:32.7.0", "phase_l1"),
+            ("1-0:51.7.0", "phase_l2"),
+            ("1-0:72.7.0", "phase_l3"),
+            ("1-0:3.7.0", "reactive"),
+        ],
+    )
+    def test_measurement_group(self, code, group):
+        assert measurement_group(OBIS.parse(code)) == group
+
+    async def test_phase_values_become_attributes(
+        self, hass: HomeAssistant, ppc_config_data
+    ):
+        coordinator = self._coordinator(self._READINGS)
+
+        add_entities = await self._setup(hass, ppc_config_data, coordinator)
+
+        entities = add_entities.call_args[0][0]
+        keys = [e.entity_description.key for e in entities if isinstance(e, OBISSensor)]
+        assert keys == ["1-0:1.8.0", "1-0:16.7.0", "phase_l1"]
+
+        group = next(e for e in entities if isinstance(e, OBISGroupSensor))
+        assert group.unique_id == "sensor.test_entry_id_phase_l1"
+        assert group._attr_translation_key == "phase_l1"
+        assert group.native_value == "250"
+        assert group.extra_state_attributes == {
+            "current_l1": "1.1",
+            "voltage_l1": "230.1",
+        }
+
+    async def test_new_code_joins_existing_group(
+        self, hass: HomeAssistant, ppc_config_data
+    ):
+        coordinator = self._coordinator(self._READINGS)
+        add_entities = await self._setup(hass, ppc_config_data, coordinator)
+        group = next(
+            e for e in add_entities.call_args[0][0] if isinstance(e, OBISGroupSensor)
+        )
+
+        coordinator.data = _information(
+            {
+                key: _reading(value, key)
+                for key, value in (self._READINGS | {"1-0:22.7.0": "0"}).items()
+            }
+        )
+        coordinator.async_add_listener.call_args[0][0]()
+
+        add_entities.assert_called_once()
+        assert group.extra_state_attributes["active_power_export_l1"] == "0"
+
+    async def test_attribute_change_is_written(
+        self, hass: HomeAssistant, ppc_config_data
+    ):
+        coordinator = self._coordinator(self._READINGS)
+        add_entities = await self._setup(hass, ppc_config_data, coordinator)
+        group = next(
+            e for e in add_entities.call_args[0][0] if isinstance(e, OBISGroupSensor)
+        )
+        group._deadband = Deadband(absolute=10)
+        group._written_fingerprint = group._state_fingerprint()
+
+        coordinator.data = _information(
+            {
+                key: _reading(value, key)
+                for key, value in (self._READINGS | {"1-0:32.7.0": "231.0"}).items()
+            }
+        )
+        with patch.object(group, "async_write_ha_state") as write:
+            group._handle_coordinator_update()
+
+        write.assert_called_once()
+
+    async def test_attribute_jitter_is_not_written(
+        self, hass: HomeAssistant, ppc_config_data
+    ):
+        coordinator = self._coordinator(self._READINGS)
+        add_entities = await self._setup(hass, ppc_config_data, coordinator)
+        group = next(
+            e for e in add_entities.call_args[0][0] if isinstance(e, OBISGroupSensor)
+        )
+        group.hass = MagicMock(data={})
+        group._deadband = Deadband(absolute=10)
+        group._resolve_attribute_deadbands()
+        group._written_fingerprint = group._state_fingerprint()
+        group._written_at = time.monotonic()
+
+        # Voltage and current within their default deadbands
+        coordinator.data = _information(
+            {
+                key: _reading(value, key)
+                for key, value in (
+                    self._READINGS | {"1-0:31.7.0": "1.12", "1-0:32.7.0": "230.3"}
+                ).items()
+            }
+        )
+        with patch.object(group, "async_write_ha_state") as write:
+            group._handle_coordinator_update()
+
+        write.assert_not_called()
+
+    async def test_grouped_single_entities_are_removed(
+        self, hass: HomeAssistant, ppc_config_data, monkeypatch: pytest.MonkeyPatch
+    ):
+        registry = _FakeEntityRegistry(
+            {"sensor.test_entry_id_1_0_32_7_0": "sensor.voltage_l1"}
+        )
+        monkeypatch.setattr(
+            sensor_module.er, "async_get", MagicMock(return_value=registry)
+        )
+
+        await self._setup(hass, ppc_config_data, self._coordinator(self._READINGS))
+
+        assert registry.removed_entities == ["sensor.voltage_l1"]
+
+    async def test_single_entities_of_later_groups_are_removed(
+        self, hass: HomeAssistant, ppc_config_data, monkeypatch: pytest.MonkeyPatch
+    ):
+        registry = _FakeEntityRegistry(
+            {"sensor.test_entry_id_1_0_52_7_0": "sensor.voltage_l2"}
+        )
+        monkeypatch.setattr(
+            sensor_module.er, "async_get", MagicMock(return_value=registry)
+        )
+        coordinator = self._coordinator(self._READINGS)
+        add_entities = await self._setup(hass, ppc_config_data, coordinator)
+        assert registry.removed_entities == []
+
+        coordinator.data = _information(
+            {
+                key: _reading(value, key)
+                for key, value in (self._READINGS | {"1-0:52.7.0": "229.8"}).items()
+            }
+        )
+        coordinator.async_add_listener.call_args[0][0]()
+
+        assert registry.removed_entities == ["sensor.voltage_l2"]
+        new_group = add_entities.call_args[0][0]
+        assert [e.entity_description.key for e in new_group] == ["phase_l2"]
+
+
+class TestDiscoveryPolicy:
+    """The discovery policy decides which discovered sensors start enabled."""
+
+    @pytest.mark.parametrize(
+        ("code", "policy", "enabled"),
+        [
+            ("1-0:1.8.0", DiscoveryPolicy.ENERGY, True),
+            ("1-0:16.7.0", DiscoveryPolicy.ENERGY, False),
+            ("1-0:16.7.0", DiscoveryPolicy.ENERGY_POWER, True),
+            ("1-0:21.7.0", DiscoveryPolicy.ENERGY_POWER, False),
+            ("1-0:32.7.0", DiscoveryPolicy.ENERGY_POWER, False),
+            ("1-0:32.7.0", DiscoveryPolicy.ALL, True),
+        ],
+    )
+    def test_enabled_by_policy(self, code, policy, enabled):
+        assert enabled_by_policy(OBIS.parse(code), policy) is enabled
+
+    async def test_policy_from_entry_applies_to_discovered_sensors(
+        self, hass: HomeAssistant, ppc_config_data
+    ):
+        mock_coordinator = MagicMock()
+        mock_coordinator.data = _information(
+            {
+                code: _reading("1", code)
+                for code in ("1-0:1.8.0", "1-0:16.7.0", "1-0:32.7.0")
+            }
+        )
+        mock_coordinator.async_add_listener = MagicMock(return_value=MagicMock())
+        mock_add_entities = MagicMock()
+        client = MagicMock()
+        client.dynamic_obis_discovery_enabled = True
+        data = {**ppc_config_data, CONF_DISCOVERY_POLICY: "energy_power"}
+        entry = _entry_with_runtime_data(data, mock_coordinator, client)
+
+        await async_setup_entry(hass, entry, mock_add_entities)
+
+        enabled = {
+            entity.entity_description.key: (
+                entity.entity_description.entity_registry_enabled_default
+            )
+            for entity in mock_add_entities.call_args[0][0]
+            if isinstance(entity, OBISSensor)
+        }
+        assert enabled == {
+            "1-0:1.8.0": True,
+            "1-0:16.7.0": True,
+            "1-0:32.7.0": False,
+        }
+
+
 class TestTranslations:
     """Guard the generated entity.sensor translation blocks."""
 
@@ -1,16 +1,23 @@
 """Tests for the Theben Conexa client and MD5 DigestAuth."""
 
+from datetime import UTC, datetime, timedelta
+from decimal import Decimal
+import json
 import logging
-from unittest.mock import AsyncMock, MagicMock
+from unittest.mock import AsyncMock, MagicMock, patch
 
+from homeassistant.components.sensor import SensorEntityDescription
 import httpx
 from obis_parser import OBIS
 import pytest
 
+from custom_components.ppc_smgw.gateways.reading import Reading
 from custom_components.ppc_smgw.gateways.theben.conexa.conexa import (
     ThebenConexaClient,
     ThebenMD5DigestAuth,
 )
+from custom_components.ppc_smgw.gateways.theben.theben import ThebenConexa
+from custom_components.ppc_smgw.sensor import OBISSensor, OBISSensorSpec
 
 # ---------------------------------------------------------------------------
 # Helpers
@@ -21,14 +28,19 @@ def _make_response(json_data, status_code=200, text=None):
     response = MagicMock(spec=httpx.Response)
     response.status_code = status_code
     response.text = text if text is not None else str(json_data)
+    response.content = json.dumps(json_data).encode()
+    response.request = httpx.Request(
+        "POST", "https://192.168.0.1/smgw/m2m/test.sm/json"
+    )
+    response.elapsed = timedelta(milliseconds=5)
     response.json.return_value = json_data
     return response
 
 
 def _make_client(base_url="https://192.168.0.1", username="user", password="pass"):
     httpx_client = MagicMock(spec=httpx.AsyncClient)
-    httpx_client.headers = {}
-    httpx_client.follow_redirects = True
+    httpx_client.headers = httpx.Headers()
+    httpx_client.follow_redirects = False
     logger = logging.getLogger("test")
     return ThebenConexaClient(
         base_url=base_url,
@@ -134,9 +146,38 @@ class TestThebenConexaClient:
         client.httpx_client.post = AsyncMock(
             return_value=_make_response(mock_smgw_info)
         )
-        fw = await client._get_firmware_version()
+        fw = await client.get_firmware_version()
         assert fw == "3.0.12-abcdef01"
 
+    async def test_get_data_reuses_given_firmware_version(self):
+        client = _make_client()
+        client.httpx_client.post = AsyncMock(
+            side_effect=[
+                _make_response({"user-info": {"usage-points": []}}),
+            ]
+        )
+
+        information = await client.get_data(firmware_version="3.0.12-abcdef01")
+
+        assert information.firmware_version == "3.0.12-abcdef01"
+        methods = [
+            call.kwargs["json"]["method"]
+            for call in client.httpx_client.post.call_args_list
+        ]
+        assert "smgw-info" not in methods
+
+    async def test_shared_client_is_not_mutated(self):
+        client = _make_client()
+        client.httpx_client.post = AsyncMock(return_value=_make_response({}))
+
+        await client.get_firmware_version()
+
+        assert "content-type" not in client.httpx_client.headers
+        assert client.httpx_client.follow_redirects is False
+        kwargs = client.httpx_client.post.call_args.kwargs
+        assert kwargs["headers"] == {"Content-Type": "application/json"}
+        assert kwargs["follow_redirects"] is True
+
     async def test_get_usage_point_ids_prefers_running_taf7(self):
         client = _make_client()
         mock_user_info = {
@@ -217,6 +258,41 @@ class TestThebenConexaClient:
         assert obis_export in readings
         assert readings[obis_export].value == pytest.approx(8765.4321)
 
+    async def test_exact_counters_are_decimals(self):
+        client = _make_client()
+        client.exact_counters = True
+        res_json = {
+            "readings": {
+                "channels": [
+                    {
+                        "obis": "0100010800ff",
+                        "readings": [
+                            {
+                                "value": "12345678",
+                                "capture-time": "2026-08-14T12:00:00Z",
+                            }
+                        ],
+                    },
+                    {
+                        "obis": "0100100700ff",
+                        "readings": [
+                            {
+                                "value": "5000000",
+                                "capture-time": "2026-08-14T12:00:00Z",
+                            }
+                        ],
+                    },
+                ]
+            }
+        }
+
+        readings, _ = client._parse_readings(res_json, None)
+
+        assert readings[OBIS(1, 0, 1, 8, 0, 255)].value == Decimal("1234.5678")
+        # Only the energy counters
+        assert readings[OBIS(1, 0, 16, 7, 0, 255)].value == 500.0
+        assert isinstance(readings[OBIS(1, 0, 16, 7, 0, 255)].value, float)
+
     async def test_get_readings_skips_invalid_obis(self):
         client = _make_client()
         mock_user_info = {
@@ -263,3 +339,312 @@ class TestThebenConexaClient:
         readings = await client._get_readings()
         assert len(readings) == 1
         assert OBIS(1, 0, 1, 8, 0, 255) in readings
+
+    async def test_get_readings_only_reports_unwanted_channels(self):
+        client = _make_client()
+        mock_user_info = {
+            "user-info": {
+                "usage-points": [
+                    {
+                        "usage-point-id": "UP001",
+                        "taf-state": "running",
+                        "taf-number": "7",
+                    }
+                ]
+            }
+        }
+        mock_readings = {
+            "readings": {
+                "channels": [
+                    {
+                        "obis": "0100010800ff",
+                        "readings": [
+                            {
+                                "value": "12345678",
+                                "capture-time": "2026-08-14T12:00:00Z",
+                            }
+                        ],
+                    },
+                    {
+                        "obis": "0100020800ff",
+                        "readings": [{"value": "not a number"}],
+                    },
+                ]
+            }
+        }
+        client.httpx_client.post = AsyncMock(
+            side_effect=[
+                _make_response(mock_user_info),
+                _make_response(mock_readings),
+            ]
+        )
+        skipped: set[OBIS] = set()
+
+        readings = await client._get_readings(frozenset({"1-0:1.8.0"}), skipped)
+
+        assert list(readings) == [OBIS(1, 0, 1, 8, 0, 255)]
+        assert skipped == {OBIS(1, 0, 2, 8, 0, 255)}
+
+
+class TestCaptureTimestamps:
+    _USER_INFO = {
+        "user-info": {
+            "usage-points": [
+                {"usage-point-id": "UP001", "taf-state": "running", "taf-number": "7"}
+            ]
+        }
+    }
+
+    @staticmethod
+    def _readings(*capture_times):
+        return {
+            "readings": {
+                "channels": [
+                    {
+                        "obis": obis,
+                        "readings": [{"value": "10000", "capture-time": capture_time}],
+                    }
+                    for obis, capture_time in zip(
+                        ("0100010800ff", "0100020800ff"), capture_times, strict=False
+                    )
+                ]
+            }
+        }
+
+    async def test_last_update_is_newest_capture_time(self):
+        client = _make_client()
+        client.httpx_client.post = AsyncMock(
+            side_effect=[
+                _make_response(self._USER_INFO),
+                _make_response(
+                    self._readings("2026-08-14T12:00:00Z", "2026-08-14T12:15:00Z")
+                ),
+            ]
+        )
+
+        information = await client.get_data(firmware_version="3.0.12")
+
+        import_total = information.readings[OBIS(1, 0, 1, 8, 0, 255)]
+        assert import_total.timestamp == datetime(2026, 8, 14, 12, 0, tzinfo=UTC)
+        assert information.last_update == datetime(2026, 8, 14, 12, 15, tzinfo=UTC)
+
+    async def test_capture_time_without_offset_is_utc(self):
+        client = _make_client()
+
+        readings, _ = client._parse_readings(
+            self._readings("2026-08-14T12:00:00"), None
+        )
+
+        timestamp = readings[OBIS(1, 0, 1, 8, 0, 255)].timestamp
+        assert timestamp == datetime(2026, 8, 14, 12, 0, tzinfo=UTC)
+
+    async def test_invalid_capture_time_uses_fetch_time(self):
+        client = _make_client()
+        before = datetime.now(UTC)
+
+        readings, _ = client._parse_readings(self._readings("yesterday"), None)
+
+        assert readings[OBIS(1, 0, 1, 8, 0, 255)].timestamp >= before
+
+
+class TestParseCache:
+    _USER_INFO = {
+        "user-info": {
+            "usage-points": [
+                {"usage-point-id": "UP001", "taf-state": "running", "taf-number": "7"}
+            ]
+        }
+    }
+    _READINGS = {
+        "readings": {
+            "channels": [
+                {
+                    "obis": "0100010800ff",
+                    "readings": [
+                        {"value": "12345678", "capture-time": "2026-08-14T12:00:00Z"}
+                    ],
+                },
+                {
+                    "obis": "0100020800ff",
+                    "readings": [
+                        {"value": "87654321", "capture-time": "2026-08-14T12:00:00Z"}
+                    ],
+                },
+            ]
+        }
+    }
+
+    async def test_unchanged_readings_are_parsed_once(self):
+        client = _make_client()
+        client.httpx_client.post = AsyncMock(
+            side_effect=[
+                _make_response(self._USER_INFO),
+                _make_response(self._READINGS),
+            ]
+            * 3
+        )
+        wanted = frozenset({"1-0:1.8.0"})
+        skipped: set[OBIS] = set()
+
+        with patch.object(
+            client, "_parse_readings", wraps=client._parse_readings
+        ) as parse:
+            first = await client._get_readings()
+            second = await client._get_readings()
+            third = await client._get_readings(wanted, skipped)
+
+        # Other wanted codes need another parse
+        assert parse.call_count == 2
+        assert second == first
+        assert list(third) == [OBIS(1, 0, 1, 8, 0, 255)]
+        assert skipped == {OBIS(1, 0, 2, 8, 0, 255)}
+
+
+class TestCaptureTime:
+    _USER_INFO = {
+        "user-info": {
+            "usage-points": [
+                {"usage-point-id": "UP001", "taf-state": "running", "taf-number": "7"},
+                {"usage-point-id": "UP002", "taf-state": "running", "taf-number": "7"},
+            ]
+        }
+    }
+    _READINGS = {
+        "readings": {
+            "channels": [
+                {
+                    "obis": "0100010800ff",
+                    "readings": [
+                        {"value": "12345678", "capture-time": "2026-08-14T12:00:00Z"}
+                    ],
+                }
+            ]
+        }
+    }
+
+    async def test_unknown_before_first_readings(self):
+        client = _make_client()
+        client.httpx_client.post = AsyncMock()
+
+        assert await client.get_capture_time() is None
+        client.httpx_client.post.assert_not_awaited()
+
+    async def test_probes_first_usage_point_only(self):
+        client = _make_client()
+        client.httpx_client.post = AsyncMock(
+            side_effect=[
+                _make_response(self._USER_INFO),
+                _make_response(self._READINGS),
+                _make_response(self._READINGS),
+                _make_response(self._READINGS),
+            ]
+        )
+        await client._get_readings()
+
+        captured = await client.get_capture_time()
+
+        assert captured == datetime(2026, 8, 14, 12, 0, tzinfo=UTC)
+        assert client.httpx_client.post.await_count == 4
+        probe = client.httpx_client.post.call_args.kwargs["json"]
+        assert probe["usage-point-id"] == "UP001"
+
+    async def test_failed_probe_returns_none(self):
+        client = _make_client()
+        client._usage_point_ids = ["UP001"]
+        client.httpx_client.post = AsyncMock(return_value=_make_response({}))
+
+        assert await client.get_capture_time() is None
+
+
+def _make_gateway() -> ThebenConexa:
+    return ThebenConexa(
+        host="https://192.168.0.1",
+        username="user",
+        password="pass",
+        websession=MagicMock(),
+        logger=logging.getLogger("test"),
+    )
+
+
+def _stream(*chunks):
+    async def stream_readings(wanted, skipped):
+        for chunk in chunks:
+            yield chunk
+
+    return stream_readings
+
+
+class TestThebenConexaGateway:
+    async def test_firmware_fetched_only_when_requested(self):
+        gateway = _make_gateway()
+        gateway.client.get_firmware_version = AsyncMock(return_value="3.0.12")
+        gateway.client.stream_readings = _stream()
+
+        await gateway.get_data()
+        # Withdrawn by the coordinator after the fetch
+        gateway.metadata_requested = False
+        await gateway.get_data()
+        gateway.metadata_requested = True
+        await gateway.get_data()
+
+        assert gateway.client.get_firmware_version.await_count == 2
+        assert gateway.data.firmware_version == "3.0.12"
+
+    async def test_unknown_firmware_is_fetched_again(self):
+        gateway = _make_gateway()
+        gateway.client.get_firmware_version = AsyncMock(return_value="Unknown")
+        gateway.client.stream_readings = _stream()
+
+        await gateway.get_data()
+        gateway.metadata_requested = False
+        await gateway.get_data()
+
+        assert gateway.client.get_firmware_version.await_count == 2
+        assert gateway.cached_firmware_version() is None
+
+    async def test_readings_streamed_per_usage_point(self):
+        timestamp = datetime(2026, 8, 14, 12, 0, tzinfo=UTC)
+        first = {
+            OBIS(1, 0, 1, 8, 0, 255): Reading(
+                value=1.0, timestamp=timestamp, obis=OBIS(1, 0, 1, 8, 0, 255)
+            )
+        }
+        second = {
+            OBIS(1, 0, 2, 8, 0, 255): Reading(
+                value=2.0, timestamp=timestamp, obis=OBIS(1, 0, 2, 8, 0, 255)
+            )
+        }
+        gateway = _make_gateway()
+        gateway.client.get_firmware_version = AsyncMock(return_value="3.0.12")
+        gateway.client.stream_readings = _stream(first, second)
+
+        chunks = [chunk async for chunk in gateway.stream_readings()]
+
+        assert chunks == [first, second]
+        assert gateway.data.readings == first | second
+        assert gateway.data.last_update == timestamp
+
+    async def test_sensor_of_canonical_code_gets_value(self):
+        """Sensors want codes without F group, the gateway sends F=255."""
+        sensor = OBISSensor(
+            coordinator=MagicMock(),
+            spec=OBISSensorSpec(description=SensorEntityDescription(key="1-0:1.8.0")),
+        )
+        gateway = _make_gateway()
+        gateway.client = _make_client()
+        gateway.client.get_firmware_version = AsyncMock(return_value="3.0.12")
+        gateway.client.httpx_client.post = AsyncMock(
+            side_effect=[
+                _make_response(TestParseCache._USER_INFO),
+                _make_response(TestParseCache._READINGS),
+            ]
+        )
+        gateway.wanted_obis = sensor.obis_codes
+
+        sensor.coordinator.data = await gateway.get_data()
+
+        assert gateway.data.skipped == {OBIS(1, 0, 2, 8, 0, 255)}
+        assert sensor.native_value is not None
+        assert (
+            sensor.native_value == gateway.data.readings[OBIS(1, 0, 1, 8, 0, 255)].value
+        )
@@ -0,0 +1,225 @@
+"""Tests for the snapshot and delta websocket commands."""
+
+from datetime import UTC, datetime, timedelta
+from decimal import Decimal
+from unittest.mock import MagicMock
+
+from homeassistant.components import websocket_api
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import (
+    async_dispatcher_connect,
+    async_dispatcher_send,
+)
+from obis_parser import OBIS
+import pytest
+
+from custom_components.ppc_smgw.const import SIGNAL_READINGS_CHANGED
+from custom_components.ppc_smgw.coordinator import Data, SMGwDataUpdateCoordinator
+from custom_components.ppc_smgw.gateways.reading import Information, Reading
+from custom_components.ppc_smgw.websocket_api import (
+    websocket_snapshot,
+    websocket_subscribe,
+)
+from tests.conftest import create_mock_config_entry
+
+TIMESTAMP = datetime(2024, 12, 20, 16, 0, 1, tzinfo=UTC)
+
+
+def _information(values: dict[str, str | float | Decimal]) -> Information:
+    readings = {}
+    for key, value in values.items():
+        obis = OBIS.parse(key)
+        readings[obis] = Reading(value=value, timestamp=TIMESTAMP, obis=obis)
+    return Information(
+        name="Test Gateway",
+        model="Test Model",
+        manufacturer="Test Manufacturer",
+        firmware_version="1.0.0",
+        last_update=TIMESTAMP,
+        readings=readings,
+    )
+
+
+@pytest.fixture
+def loaded_entry(hass: HomeAssistant, ppc_config_data, mock_gateway):
+    entry = create_mock_config_entry(data=ppc_config_data)
+    entry.add_to_hass(hass)
+    entry.mock_state(hass, ConfigEntryState.LOADED)
+
+    coordinator = MagicMock()
+    coordinator.data = _information({"1-0:1.8.0": "724.9204"})
+    coordinator.last_update_success = True
+    entry.runtime_data = Data(
+        client=mock_gateway, coordinator=coordinator, integration=MagicMock()
+    )
+    return entry
+
+
+class TestSnapshot:
+    async def test_returns_all_loaded_entries(self, hass: HomeAssistant, loaded_entry):
+        connection = MagicMock()
+
+        websocket_snapshot(hass, connection, {"id": 1, "type": "ppc_smgw/snapshot"})
+
+        connection.send_result.assert_called_once_with(
+            1,
+            {
+                "test_entry_id": {
+                    "title": loaded_entry.title,
+                    "last_update_success": True,
+                    "data": {
+                        "name": "Test Gateway",
+                        "model": "Test Model",
+                        "manufacturer": "Test Manufacturer",
+                        "firmware_version": "1.0.0",
+                        "last_update": TIMESTAMP.isoformat(),
+                        "readings": {
+                            "1-0:1.8.0": {
+                                "value": "724.9204",
+                                "timestamp": TIMESTAMP.isoformat(),
+                            }
+                        },
+                    },
+                }
+            },
+        )
+
+    async def test_entry_without_data(self, hass: HomeAssistant, loaded_entry):
+        loaded_entry.runtime_data.coordinator.data = None
+        connection = MagicMock()
+
+        websocket_snapshot(
+            hass,
+            connection,
+            {"id": 1, "type": "ppc_smgw/snapshot", "entry_ids": ["test_entry_id"]},
+        )
+
+        result = connection.send_result.call_args.args[1]
+        assert result["test_entry_id"]["data"] is None
+
+    async def test_unknown_entry(self, hass: HomeAssistant, loaded_entry):
+        connection = MagicMock()
+
+        websocket_snapshot(
+            hass,
+            connection,
+            {"id": 1, "type": "ppc_smgw/snapshot", "entry_ids": ["unknown"]},
+        )
+
+        connection.send_error.assert_called_once_with(
+            1, websocket_api.ERR_NOT_FOUND, "Config entry not loaded"
+        )
+        connection.send_result.assert_not_called()
+
+
+class TestSubscribe:
+    async def test_forwards_deltas_of_selected_entries(
+        self, hass: HomeAssistant, loaded_entry
+    ):
+        connection = MagicMock()
+        connection.subscriptions = {}
+        delta = {"last_update": "", "changed": {"1-0:1.8.0": 1.0}, "removed": []}
+
+        websocket_subscribe(
+            hass,
+            connection,
+            {"id": 7, "type": "ppc_smgw/subscribe", "entry_ids": ["test_entry_id"]},
+        )
+        connection.send_result.assert_called_once_with(7)
+
+        async_dispatcher_send(hass, SIGNAL_READINGS_CHANGED, "other_entry", delta)
+        async_dispatcher_send(hass, SIGNAL_READINGS_CHANGED, "test_entry_id", delta)
+
+        connection.send_message.assert_called_once_with(
+            websocket_api.event_message(7, {"entry_id": "test_entry_id", **delta})
+        )
+
+        connection.subscriptions[7]()
+        async_dispatcher_send(hass, SIGNAL_READINGS_CHANGED, "test_entry_id", delta)
+        assert connection.send_message.call_count == 1
+
+    async def test_unknown_entry(self, hass: HomeAssistant, loaded_entry):
+        connection = MagicMock()
+        connection.subscriptions = {}
+
+        websocket_subscribe(
+            hass,
+            connection,
+            {"id": 7, "type": "ppc_smgw/subscribe", "entry_ids": ["unknown"]},
+        )
+
+        connection.send_error.assert_called_once()
+        assert connection.subscriptions == {}
+
+
+class TestReadingsDelta:
+    async def test_only_changed_values_are_dispatched(
+        self, hass: HomeAssistant, ppc_config_data
+    ):
+        coordinator = SMGwDataUpdateCoordinator(
+            hass=hass, update_interval=timedelta(minutes=5)
+        )
+        coordinator.config_entry = create_mock_config_entry(data=ppc_config_data)
+        deltas = []
+
+        @callback
+        def _record(entry_id, delta):
+            deltas.append((entry_id, delta))
+
+        async_dispatcher_connect(hass, SIGNAL_READINGS_CHANGED, _record)
+
+        coordinator.async_set_updated_data(
+            _information({"1-0:1.8.0": "724.9204", "1-0:2.8.0": "3.0557"})
+        )
+        coordinator.async_set_updated_data(
+            _information({"1-0:1.8.0": "724.9300", "1-0:16.7.0": 230.5})
+        )
+        # Unchanged values don't dispatch an empty delta
+        coordinator.async_set_updated_data(
+            _information({"1-0:1.8.0": "724.9300", "1-0:16.7.0": 230.5})
+        )
+        await hass.async_block_till_done()
+
+        assert deltas == [
+            (
+                "test_entry_id",
+                {
+                    "last_update": TIMESTAMP.isoformat(),
+                    "changed": {"1-0:1.8.0": "724.9204", "1-0:2.8.0": "3.0557"},
+                    "removed": [],
+                },
+            ),
+            (
+                "test_entry_id",
+                {
+                    "last_update": TIMESTAMP.isoformat(),
+                    "changed": {"1-0:1.8.0": "724.9300", "1-0:16.7.0": 230.5},
+                    "removed": ["1-0:2.8.0"],
+                },
+            ),
+        ]
+
+    async def test_exact_counters_are_dispatched_as_numbers(
+        self, hass: HomeAssistant, ppc_config_data
+    ):
+        """JSON has no decimal type, exact counters are sent as floats."""
+        coordinator = SMGwDataUpdateCoordinator(
+            hass=hass, update_interval=timedelta(minutes=5)
+        )
+        coordinator.config_entry = create_mock_config_entry(data=ppc_config_data)
+        deltas = []
+
+        @callback
+        def _record(entry_id, delta):
+            deltas.append(delta)
+
+        async_dispatcher_connect(hass, SIGNAL_READINGS_CHANGED, _record)
+
+        coordinator.async_set_updated_data(
+            _information({"1-0:1.8.0": Decimal("724.9204")})
+        )
+        await hass.async_block_till_done()
+
+        assert deltas[0]["changed"] == {"1-0:1.8.0": 724.9204}
+        assert isinstance(deltas[0]["changed"]["1-0:1.8.0"], float)